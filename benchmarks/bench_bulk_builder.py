@@ -0,0 +1,386 @@
+"""
+Benchmark of the construction of the JSON bulkCreation content from the rows of a TSV.
+
+Compares the previous implementation (three passes: get_families, get_biofiles and
+get_interpretations, with a linear search of the persons of each family) with the
+single-pass BulkConfigurationBuilder, and checks that both produce the same JSON.
+
+Usage (from the root of the repository):
+    python benchmarks/bench_bulk_builder.py --families 2000 --persons 3
+"""
+import argparse
+import inspect
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tabulated2json import BulkConfigurationBuilder
+from utils.logger import log_message
+from utils.tabulated_validator import get_or_compute_checksum, parse_date, remove_empty_keys
+
+SETTINGS = {
+    "checksum_sidecars_enabled": False,
+    "excludeColumns": ["AC", "AF", "DP"],
+    "projects": {"Projet Test": "test-project"},
+}
+
+
+# Appels simulés à l'API (GET projects/<slug>) : nombre et latence
+API_CALLS = {"count": 0, "latency": 0.0}
+
+
+def project_exists(project_slug):
+    """Pas d'appel à l'API pour le benchmark (latence simulée si --api-latency-ms)."""
+    API_CALLS["count"] += 1
+    if API_CALLS["latency"]:
+        time.sleep(API_CALLS["latency"])
+    return project_slug
+
+
+def create_rows(families, persons):
+    """Synthetic rows: 'families' families of 'persons' persons, one multi-sample VCF per family."""
+    rows = {}
+    for family in range(families):
+        for person in range(persons):
+            rows[len(rows)] = {
+                "filename": f"F{family}.vcf.gz", "checksum": f"{family:032x}", "file_type": "SNV",
+                "sample": f"S{family}-{person}", "bam_path": "", "family_id": f"F{family}",
+                "person_id": f"P{family}-{person}", "father_id": f"P{family}-1" if person == 0 else "",
+                "mother_id": f"P{family}-2" if person == 0 else "", "sex": "F" if person % 2 else "M",
+                "is_affected": "1" if person == 0 else "0", "last_name": "NAME", "first_name": "First",
+                "date_of_birth": "25/12/1990", "hpo": "", "interpretation_title": f"F{family} - exome",
+                "is_index": "1" if person == 0 else "0", "project": "Projet Test", "assignee": "",
+                "priority": "2", "person_note": "", "assembly": "GRCh38", "data_title": "",
+            }
+    return rows
+
+
+# Implémentation précédente (référence)
+
+def legacy_get_families(**kwargs):
+    """
+    Get informations about families.
+
+    Returns:
+        list: list of dictionnaries (one dict per family)
+    """
+    function_name = inspect.currentframe().f_code.co_name
+    log_message(function_name, "DEBUG", "Start : GET_FAMILIES.")
+    
+    # Get args
+    data = kwargs.get("data_init")
+
+    # Dictionnaries initilisation
+    dict_families = {}
+    dict_index_case_by_family = {}
+
+    # Foreach sample in data
+    for index, sample_data in data.items():
+        
+        # Get information for the sample
+        sample_id = sample_data.get('sample', '')
+        person_id = sample_data.get('person_id', '')
+        family_id = sample_data.get('family_id', '')
+        sex = sample_data.get('sex', '').strip().lower()
+        sex = {'m': 'male', 'f': 'female'}.get(sex, sex)
+        last_name = sample_data.get('last_name', '')
+        first_name = sample_data.get('first_name', '')
+        date_of_birth = parse_date(sample_data.get('date_of_birth', ''))  # change date format
+        person_note = sample_data.get('person_note', '')
+        
+        # Parents id
+        mother_id = sample_data.get('mother_id', '')
+        father_id = sample_data.get('father_id', '')
+        
+        # Index Case
+        is_index = sample_data.get('is_index', False)
+        if is_index:
+            # Get the person_id of the index case and add it to 'dict_index_case_by_family'
+            index_case_id = person_id
+            dict_index_case_by_family[family_id] = index_case_id
+
+        # Create dictionnary for the person
+        dict_person = {
+            "identifier": person_id,
+            "sex": sex,
+            "firstName": first_name,
+            "lastName": last_name,
+            "birthday": date_of_birth,
+            "motherIdentifier": mother_id,
+            "fatherIdentifier": father_id,
+            "note": person_note
+        }
+
+        # Remove empty key/value
+        dict_person = remove_empty_keys(dict_person)
+
+        # Create or update the family in the dictionnary
+        if family_id in dict_families:  # Check if family already exists
+            persons = dict_families[family_id]["persons"]
+            # Check if the current person already exists in the family, if doesn't exist, add it
+            if not any(person["identifier"] == dict_person["identifier"] for person in persons):
+                dict_families[family_id]["persons"].append(dict_person)
+                log_message(function_name, "DEBUG", f"Existing family: {family_id} + Add person: {person_id}")
+        else:
+            # If the family doesn't exist, create it and add teh current person
+            dict_families[family_id] = {
+                "identifier": family_id,
+                "persons": [dict_person]
+                }
+            log_message(function_name, "DEBUG", f"Create family: {family_id} + Add person: {person_id}")
+    list_families = [value for value in dict_families.values()]
+    return list_families
+    
+    
+def legacy_get_biofiles(**kwargs):
+    """
+    Get informations about biofiles and samples.
+
+    Returns:
+        list: list of dictionnaries (one dict per biofile)
+    """
+    function_name = inspect.currentframe().f_code.co_name
+    log_message(function_name, "DEBUG", "Start : GET_BIOFILES.")
+    
+    # Get args
+    data = kwargs.get("data_init")
+    biofiles_directory = kwargs.get("path_biofiles", None)
+
+    # Initialisation
+    dict_biofiles = {}
+
+    # Foreach sample
+    for index, sample_data in data.items():
+
+        # Get information of the sample
+        sample_id = sample_data.get('sample', '')
+        person_id = sample_data.get('person_id', '')
+        family_id = sample_data.get('family_id', '')
+        bam_path = sample_data.get('bam_path', '')
+        assembly = sample_data.get('assembly', '')
+        filename = sample_data.get('filename', '')
+        
+        
+        # Get the checksum of the biofile or calculate it
+        try:
+            checksum = get_or_compute_checksum(sample_data, sample_id, biofiles_directory)
+        except Exception as e:
+            raise ValueError(e)
+        log_message(function_name, "DEBUG", f"Sample: {sample_id} - Filename: {filename} - Checksum: {checksum}")
+
+        # Create dictionnary for the sample
+        dict_sample = {
+            "name": sample_id,
+            "person": person_id,
+            "bamPath": bam_path
+        }
+        # Remove empty key/value
+        dict_sample = remove_empty_keys(dict_sample)
+
+        # If the current biofile does not exist in the dict_biofile, add it with the current sample
+        if filename not in dict_biofiles:
+            dict_biofiles[filename] = {
+                "filename": filename,
+                "samples": [dict_sample],
+                "checksum": checksum,
+                "assembly": assembly
+            }
+        else:
+            # If the current biofile already exists, add the current sample
+            dict_biofiles[filename]["samples"].append(dict_sample)
+    list_biofiles = [value for value in dict_biofiles.values()]
+    return list_biofiles
+
+
+def legacy_get_interpretations(**kwargs):
+    """
+    Get informations about interpretations.
+
+    Returns:
+        list: list of dictionnaries (one dict per interpretation)
+    """
+    function_name = inspect.currentframe().f_code.co_name
+    log_message(function_name, "DEBUG", "Start GET_INTERPRETATIONS.")
+    
+    # Get args
+    data = kwargs.get("data_init")
+    biofiles_directory = kwargs.get("path_biofiles", None)
+    diagho_api = kwargs.get("diagho_api")
+    settings = kwargs.get("settings")
+
+    # Initialisation
+    dict_interpretations = {}
+
+    # Foreach sample
+    for index, sample_data in data.items():
+
+        # Get information for the sample
+        sample_id = sample_data.get('sample', '')
+        is_index = sample_data.get('is_index', '')
+        index_id = sample_data.get('person_id', '') if (is_index and is_index != "0") else ""
+        biofile_type = sample_data.get('file_type', None)
+        if not biofile_type:
+            log_message(function_name, "INFO", f"Biofile_type is empty for sample: {sample_id} --> Default to 'SNV'.")
+            biofile_type = "SNV"
+        
+        # Get project_slug from config file
+        project = sample_data.get('project', '')
+        project_mapping = settings['projects']
+        project_slug = project_mapping.get(project, project.lower().replace(" ", "-"))
+        kwargs = {
+            "diagho_api": diagho_api,
+            "project_slug": project_slug,
+            }
+        project_exist = project_exists(project_slug)
+        if not project_exist:
+            log_message(function_name, "ERROR", f"Error for sample '{sample_id}': project '{project}' does not exist.")
+            raise ValueError(f"Error for sample '{sample_id}': project '{project}' does not exist.")        
+        
+        priority_tmp = sample_data.get('priority', 2)
+        
+        # priority mapping :
+        priority_mapping = {
+            "1": "low",
+            "2": "normal",
+            "3": "high",
+            "4": "highest"
+        }
+        priority = priority_mapping.get(priority_tmp, "")
+        
+        is_affected = sample_data.get('is_affected', '')
+        is_affected_boolean = (is_affected == "Affected" or str(is_affected) == "1" or is_affected == "true"  or is_affected == "True")
+        assignee = sample_data.get('assignee', '')
+        interpretation_title = sample_data.get('interpretation_title', '')
+        data_title = sample_data.get('data_title', '')
+        
+        # Get the checksum of the biofile or calculate it
+        checksum = get_or_compute_checksum(sample_data, sample_id, biofiles_directory)
+
+        # Create dictionnary
+        interpretation = {
+                "indexCase": index_id,
+                "project": project_slug,
+                "title": interpretation_title,
+                "assignee": assignee,
+                "priority": priority,
+            }
+        
+        v_data_tuple = (data_title or biofile_type, biofile_type, {
+            "name": sample_id,
+            "isAffected": is_affected_boolean,
+            "checksum": checksum,
+        })
+
+        if interpretation_title not in dict_interpretations:
+            dict_interpretations[interpretation_title] = interpretation
+            dict_interpretations[interpretation_title]["datas_tuples"] = [v_data_tuple]
+            
+            log_message(function_name, "DEBUG", f"New interpretation {interpretation_title}, with sample: {sample_id}")
+        else:
+            log_message(function_name, "DEBUG", f"Existing interpretation {interpretation_title}, with sample: {sample_id}")
+            # Met à jour les informations ou échoue en cas d'incohérences
+            for key, value in dict_interpretations[interpretation_title].items():
+                if key == "datas_tuples":
+                    continue
+
+                if key == "priority":
+                    if value < interpretation[key]:
+                        dict_interpretations[interpretation_title][key] = interpretation[key]
+                    continue
+
+                if not value and interpretation[key]:
+                    dict_interpretations[interpretation_title][key] = interpretation[key]
+                
+                if value and interpretation[key] and value != interpretation[key]:
+                    log_message(function_name, "ERROR", f"Conflict detected for '{key}' of '{interpretation_title}': Existing value: '{value}', New value: '{interpretation[key]}'")
+                    raise ValueError(f"Conflict detected for '{key}' of '{interpretation_title}': Existing value: '{value}', New value: '{interpretation[key]}'")
+
+            dict_interpretations[interpretation_title]["datas_tuples"].append(v_data_tuple)
+
+    for interpretation in dict_interpretations.values():
+        # Vérifie qu'il y a bien un cas index
+        if not interpretation["indexCase"]:
+            error_message = str(f"No Index case specified for :", interpretation["title"])
+            log_message(function_name, "ERROR", error_message)
+            raise ValueError(f"No Index case specified for", interpretation["title"])
+
+        datas_dict = {}
+
+        # Créer les objets sample
+        for title, file_type, sample in interpretation["datas_tuples"]:
+            composite_key = (title, file_type)
+            
+            # Charger les colonnes à exclure
+            exclude_columns = settings['excludeColumns']
+            if composite_key not in datas_dict:
+                datas_dict[composite_key] = {
+                    "title": title,
+                    "type": file_type,
+                    "samples": [],
+                    "excludeColumns" : exclude_columns,
+                    "pretags": []
+                }
+                
+            # Ajout des pretags en fonction du projet --> enlever depuis màj diagho
+            # set_pretags_by_project(interpretation, datas_dict, composite_key)
+            
+            datas_dict[composite_key]["samples"].append(sample)
+
+        del interpretation["datas_tuples"]
+        interpretation["datas"] = list(datas_dict.values())
+        
+        # Supprimer 'pretags' si aucun pretag
+        for data in interpretation["datas"]:
+            if "pretags" in data:
+                if all(not tag.get("tag") and not tag.get("filter") for tag in data["pretags"]):
+                    del data["pretags"]
+                    
+    dict_interpretations = remove_empty_keys(dict_interpretations)    
+    list_interpretations = [value for value in dict_interpretations.values()]
+    return list_interpretations
+
+
+def legacy_build(rows):
+    kwargs = {"data_init": rows, "path_biofiles": None, "diagho_api": None, "settings": SETTINGS}
+    return {
+        "families": legacy_get_families(**kwargs),
+        "files": legacy_get_biofiles(**kwargs),
+        "interpretations": legacy_get_interpretations(**kwargs),
+    }
+
+
+def builder_build(rows):
+    builder = BulkConfigurationBuilder(None, None, SETTINGS, project_exists=project_exists)
+    return builder.add_rows(rows).build()
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the JSON bulkCreation builder.")
+    parser.add_argument("--families", type=int, default=2000)
+    parser.add_argument("--persons", type=int, default=3, help="Persons per family (e.g. 3 for trios, 50 for a large pedigree).")
+    parser.add_argument("--api-latency-ms", type=float, default=0, help="Simulated latency of the project check.")
+    args = parser.parse_args()
+    API_CALLS["latency"] = args.api_latency_ms / 1000
+
+    rows = create_rows(args.families, args.persons)
+    legacy_json, legacy_time = timed(legacy_build, rows)
+    legacy_calls, API_CALLS["count"] = API_CALLS["count"], 0
+    builder_json, builder_time = timed(builder_build, rows)
+    identical = json.dumps(legacy_json, sort_keys=False) == json.dumps(builder_json, sort_keys=False)
+    print(f"{len(rows)} rows ({args.families} families x {args.persons} persons): legacy {legacy_time * 1000:.0f}ms ({legacy_calls} API calls)"
+          f" - single pass {builder_time * 1000:.0f}ms ({API_CALLS['count']} API calls) - x{legacy_time / builder_time:.1f} - identical JSON: {identical}")
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
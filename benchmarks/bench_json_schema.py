@@ -0,0 +1,62 @@
+"""
+Benchmark of the validation of the JSON bulkCreation content (utils.json_schema).
+
+Builds a synthetic payload (one interpretation per family), then times the
+compilation of the schema and the validation of the valid payload, and of the
+same payload with errors in every interpretation (all of them are reported).
+
+Usage (from the root of the repository):
+    python benchmarks/bench_json_schema.py --interpretations 10000
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_bulk_builder import SETTINGS, create_rows, project_exists
+from tabulated2json import BulkConfigurationBuilder
+from utils.json_schema import BULK_CONFIGURATION_SCHEMA, compile_schema
+
+
+def best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interpretations", type=int, default=10000)
+    parser.add_argument("--persons", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = create_rows(args.interpretations, args.persons)
+    payload = BulkConfigurationBuilder(None, None, SETTINGS, project_exists=project_exists).add_rows(rows).build()
+
+    start = time.perf_counter()
+    validator = compile_schema(BULK_CONFIGURATION_SCHEMA)
+    print(f"compile:          {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+    elapsed, errors = best_time(lambda: validator(payload), args.repeat)
+    assert errors == [], errors[:5]
+    print(f"valid payload:    {elapsed * 1000:8.2f} ms ({args.interpretations} interpretations, {len(rows)} persons)")
+
+    invalid = copy.deepcopy(payload)
+    for interpretation in invalid["interpretations"]:
+        del interpretation["project"]
+        interpretation["datas"][0]["samples"][0]["checksum"] = "not-a-md5"
+    elapsed, errors = best_time(lambda: validator(invalid), args.repeat)
+    assert len(errors) == 2 * args.interpretations
+    print(f"invalid payload:  {elapsed * 1000:8.2f} ms ({len(errors)} errors, e.g. {errors[0][0]}: {errors[0][1]})")
+
+
+if __name__ == "__main__":
+    main()
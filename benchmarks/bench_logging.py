@@ -0,0 +1,109 @@
+"""
+Benchmark of the per-call cost of the logs (utils.logger.log_message).
+
+Compares the previous pipeline (logging.getLogger at each call, synchronous
+rotating file + console handlers, one lock per handler and per message) with
+the queued one (cached loggers, QueueHandler, a single writer thread), from
+several threads at the same time, for an enabled level (INFO) and a disabled
+one (DEBUG with log level INFO). The console is redirected to /dev/null, as
+when the watcher runs in background.
+
+Usage (from the root of the repository):
+    python benchmarks/bench_logging.py --threads 8 --calls 20000
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from logging.handlers import TimedRotatingFileHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import logger as logger_module
+from utils.logger import LOG_FORMAT, configure_logging, log_biofile_message, stop_logging
+
+
+def legacy_configure(directory, devnull):
+    """Previous configuration: handlers called synchronously by each thread."""
+    logging.basicConfig(
+        level="INFO",
+        format=LOG_FORMAT,
+        handlers=[
+            TimedRotatingFileHandler(os.path.join(directory, "legacy.log"), when="W0", encoding="utf-8"),
+            logging.StreamHandler(devnull),
+        ],
+        force=True)
+
+
+def legacy_log_biofile_message(logger_name, level, biofile_name, message):
+    """Previous implementation of 'log_biofile_message'."""
+    logger = logging.getLogger(logger_name)
+    log_message = f"{biofile_name} - {message}"
+    if level.upper() == 'INFO':
+        logger.info(log_message)
+    elif level.upper() == 'DEBUG':
+        logger.debug(log_message)
+
+
+def legacy_call(level, attempt):
+    legacy_log_biofile_message("check_loading_status", level, "S1.vcf.gz", f"Attempt {attempt}: loading_status = PENDING ... Retry...")
+
+
+def queued_call(level, attempt):
+    log_biofile_message("check_loading_status", level, "S1.vcf.gz", "Attempt %d: loading_status = %s ... Retry...", attempt, "PENDING")
+
+
+def run(call, level, threads, calls):
+    """Per-call time seen by the threads (µs), all threads logging at the same time."""
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        barrier.wait()
+        for attempt in range(calls):
+            call(level, attempt)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for worker_thread in workers:
+        worker_thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker_thread in workers:
+        worker_thread.join()
+    return (time.perf_counter() - start) / (threads * calls) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, "w") as devnull:
+        print(f"{args.threads} threads x {args.calls} calls, per call:")
+
+        legacy_configure(directory, devnull)
+        for level in ("INFO", "DEBUG"):
+            print(f"  legacy  {level:<6} {run(legacy_call, level, args.threads, args.calls):8.2f} µs")
+
+        stdout = sys.stdout
+        sys.stdout = devnull  # console du pipeline en file -> /dev/null
+        try:
+            configure_logging({"logging": {"log_level": "INFO", "log_directory": directory}})
+            results = [(level, run(queued_call, level, args.threads, args.calls)) for level in ("INFO", "DEBUG")]
+            start = time.perf_counter()
+            stop_logging()  # attendre l'écriture de tous les messages
+            drain = time.perf_counter() - start
+        finally:
+            sys.stdout = stdout
+        for level, elapsed in results:
+            print(f"  queued  {level:<6} {elapsed:8.2f} µs")
+        print(f"  (queued: {drain * 1000:.0f} ms to write the remaining records after the threads ended)")
+        logging.getLogger().handlers.clear()
+        logger_module._loggers.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark of the MD5 engine of the biofiles (utils.file.md5).
+
+Compares the previous implementation (8 KB reads in a Python loop) with the
+current one (large 'readinto' buffer), then the sequential and parallel hashing
+of several distinct files (utils.checksum_cache.compute_checksums).
+
+Usage (from the root of the repository):
+    python benchmarks/bench_md5.py --sizes 100M 1G 5G --files 4 --workers 4
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.checksum_cache import compute_checksums, init_checksum_cache
+from utils.file import md5
+
+
+def legacy_md5(filepath):
+    """Previous implementation of 'md5' (8 KB reads)."""
+    hash_md5 = hashlib.md5()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(8192), b""):
+            hash_md5.update(chunk)
+    return hash_md5.hexdigest()
+
+
+def parse_size(size):
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    if size[-1].upper() in units:
+        return int(float(size[:-1]) * units[size[-1].upper()])
+    return int(size)
+
+
+def create_file(path, size, block=4 * 1024 * 1024):
+    """Creates a file of 'size' random bytes."""
+    with open(path, "wb") as f:
+        remaining = size
+        while remaining > 0:
+            f.write(os.urandom(min(block, remaining)))
+            remaining -= block
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the MD5 of the biofiles.")
+    parser.add_argument("--sizes", nargs="+", default=["100M"], help="File sizes (e.g. 100M 1G 5G).")
+    parser.add_argument("--files", type=int, default=4, help="Number of distinct files for the parallel benchmark.")
+    parser.add_argument("--workers", type=int, default=4, help="Number of threads for the parallel benchmark.")
+    parser.add_argument("--directory", default=None, help="Directory of the test files (default: temporary directory).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+        for size_label in args.sizes:
+            size = parse_size(size_label)
+            paths = [os.path.join(directory, f"biofile_{size_label}_{i}.vcf") for i in range(args.files)]
+            for path in paths:
+                create_file(path, size)
+
+            # Un seul fichier : ancienne implémentation vs nouvelle
+            expected, legacy_time = timed(legacy_md5, paths[0])
+            result, new_time = timed(md5, paths[0])
+            assert result == expected
+            print(f"[{size_label}] single file : legacy {legacy_time:.2f}s ({size / legacy_time / 1e6:.0f} MB/s)"
+                  f" - md5 {new_time:.2f}s ({size / new_time / 1e6:.0f} MB/s) - x{legacy_time / new_time:.2f}")
+
+            # Plusieurs fichiers distincts : séquentiel (ancien) vs parallèle (sans cache persistant)
+            _, sequential_time = timed(lambda: [legacy_md5(path) for path in paths])
+            init_checksum_cache(None)
+            _, parallel_time = timed(compute_checksums, paths, args.workers)
+            total = size * len(paths)
+            print(f"[{size_label}] {len(paths)} files  : sequential legacy {sequential_time:.2f}s"
+                  f" - parallel ({args.workers} workers) {parallel_time:.2f}s ({total / parallel_time / 1e6:.0f} MB/s)"
+                  f" - x{sequential_time / parallel_time:.2f}")
+
+            # Deuxième passage : servi par le cache
+            _, cached_time = timed(compute_checksums, paths, args.workers)
+            print(f"[{size_label}] {len(paths)} files  : cached {cached_time * 1000:.1f}ms")
+
+            for path in paths:
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
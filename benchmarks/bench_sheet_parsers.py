@@ -0,0 +1,98 @@
+"""
+Benchmark matrix of the sample sheet parsers (utils.tabulated_parsers).
+
+For each sheet size, parses a synthetic TSV with each engine ('csv', 'pandas',
+'pyarrow') and checks that they give the same table. Two timings are reported:
+  - warm: parse time in this process (modules already imported)
+  - cold: read + parse + validation in a fresh interpreter, import of the
+          engine included (what the watcher pays for its first sheet)
+
+Usage (from the root of the repository):
+    python benchmarks/bench_sheet_parsers.py --rows 100 1000 10000 100000
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tabulated2json import REQUIRED_HEADERS
+from utils.tabulated_parsers import PARSERS, is_available, select_engine
+from utils.tabulated_validator import read_tabulated_file, validate_tsv_columns
+
+COLD_RUN = """
+import sys
+sys.path.insert(0, {root!r})
+from tabulated2json import REQUIRED_HEADERS
+from utils.tabulated_validator import read_tabulated_file, validate_tsv_columns
+validate_tsv_columns(read_tabulated_file(sys.argv[1], "utf-8", sys.argv[2]), REQUIRED_HEADERS)
+"""
+
+
+def create_sheet(path, rows, seed=0):
+    """Synthetic sample sheet of 'rows' rows (trios), with all the required columns."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("\t".join(REQUIRED_HEADERS) + "\n")
+        for i in range(rows):
+            family = i // 3
+            values = {
+                "filename": f"F{family}.vcf.gz", "checksum": "", "file_type": "SNV", "sample": f"S{i}",
+                "bam_path": f"/data/bam/S{i}.bam", "family_id": f"F{family}", "person_id": f"P{i}",
+                "father_id": f"P{i + 1}" if i % 3 == 0 else "", "mother_id": f"P{i + 2}" if i % 3 == 0 else "",
+                "sex": rng.choice(["M", "F"]), "is_affected": rng.choice(["0", "1"]), "last_name": "", "first_name": "",
+                "date_of_birth": f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(1950, 2020)}",
+                "hpo": "HP:0001250", "interpretation_title": f"F{family} - exome", "is_index": "1" if i % 3 == 0 else "0",
+                "project": "Projet", "assignee": "", "priority": "2", "person_note": "", "assembly": "GRCh38", "data_title": "",
+            }
+            file.write("\t".join(values[col] for col in REQUIRED_HEADERS) + "\n")
+
+
+def warm(path, engine, repeat=3):
+    best, table = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        table = read_tabulated_file(path, "utf-8", engine)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, table
+
+
+def cold(path, engine):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", COLD_RUN.format(root=ROOT), path, engine], check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    args = parser.parse_args()
+
+    engines = [engine for engine in PARSERS if is_available(engine)]
+    print(f"{'rows':>8} {'size':>9} " + " ".join(f"{engine + ' warm':>13} {engine + ' cold':>13}" for engine in engines) + "   auto")
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            path = os.path.join(directory, f"sheet_{rows}.tsv")
+            create_sheet(path, rows)
+            size = os.path.getsize(path)
+
+            cells, reference = [], None
+            for engine in engines:
+                warm_time, table = warm(path, engine)
+                records = table.to_records()
+                if reference is None:
+                    reference = records
+                assert records == reference, f"{engine}: table differs from {engines[0]}"
+                validate_tsv_columns(table, REQUIRED_HEADERS)
+                cells.append(f"{warm_time * 1000:>11.1f}ms {cold(path, engine) * 1000:>11.1f}ms")
+            print(f"{rows:>8} {size / 1024:>7.0f}KB " + " ".join(cells) + f"   {select_engine(size)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark of the cold start of the uploader.
+
+Measures, in fresh interpreters:
+  - 'python main.py --help'
+  - the start of the watcher: configuration loaded, logging configured and
+    watcher modules imported (everything before 'watch_directory' loops)
+and checks that the heavy modules (pandas, numpy) are not imported.
+
+The results can be written to a JSON file (--output) to track them over time,
+and the benchmark fails if 'main.py --help' is slower than --max-help-ms.
+
+Usage (from the root of the repository):
+    python benchmarks/bench_startup.py --runs 10 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules qui ne doivent pas être importés au démarrage
+HEAVY_MODULES = ("pandas", "numpy")
+
+WATCHER_START = """
+import sys
+from main import load_config, configure_logging
+config = load_config(sys.argv[1])
+configure_logging(config)
+from file_watcher import watch_directory
+print(",".join(m for m in {heavy!r} if m in sys.modules))
+""".format(heavy=HEAVY_MODULES)
+
+
+def create_config(directory):
+    """Configuration file based on config.example.yaml, with temporary directories."""
+    with open(os.path.join(ROOT, "config", "config.example.yaml"), "r") as file:
+        config = yaml.safe_load(file)
+    for key in ("input_data", "input_biofiles", "backup_data", "backup_biofiles"):
+        config[key] = os.path.join(directory, key)
+        os.makedirs(config[key], exist_ok=True)
+    config["logging"]["log_directory"] = os.path.join(directory, "logs")
+    config["settings"]["checksum_cache"] = ""
+    path = os.path.join(directory, "config.yaml")
+    with open(path, "w") as file:
+        yaml.safe_dump(config, file)
+    return path
+
+
+def run(command, env):
+    """Wall time (ms) and output of 'command' in a fresh interpreter."""
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} failed:\n{result.stderr}")
+    return elapsed, result.stdout
+
+
+def measure(name, command, env, runs):
+    timings, output = [], ""
+    for _ in range(runs):
+        elapsed, output = run(command, env)
+        timings.append(elapsed)
+    result = {
+        "name": name,
+        "median_ms": round(statistics.median(timings), 1),
+        "min_ms": round(min(timings), 1),
+        "max_ms": round(max(timings), 1),
+    }
+    print(f"{name:<16} median {result['median_ms']:>8.1f} ms   min {result['min_ms']:>8.1f} ms   max {result['max_ms']:>8.1f} ms")
+    return result, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--output", help="JSON file where the results are appended")
+    parser.add_argument("--max-help-ms", type=float, help="fail if 'main.py --help' is slower (median)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        config_path = create_config(directory)
+        env = dict(os.environ, CONFIG_PATH=config_path)
+
+        results = []
+        result, _ = measure("main.py --help", [sys.executable, "main.py", "--help"], env, args.runs)
+        results.append(result)
+        result, output = measure("watcher start", [sys.executable, "-c", WATCHER_START, config_path], env, args.runs)
+        results.append(result)
+
+    heavy = [module for module in output.strip().split(",") if module]
+    print(f"Heavy modules imported at watcher start: {heavy or 'none'}")
+
+    if args.output:
+        history = []
+        if os.path.exists(args.output):
+            with open(args.output, "r") as file:
+                history = json.load(file)
+        history.append({"date": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0], "results": results, "heavy_modules": heavy})
+        with open(args.output, "w") as file:
+            json.dump(history, file, indent=4)
+
+    if heavy:
+        sys.exit(f"Heavy modules imported at startup: {heavy}")
+    if args.max_help_ms is not None and results[0]["median_ms"] > args.max_help_ms:
+        sys.exit(f"'main.py --help' too slow: {results[0]['median_ms']} ms > {args.max_help_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
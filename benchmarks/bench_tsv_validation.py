@@ -0,0 +1,82 @@
+"""
+Benchmark of the validation of the TSV sample sheets (utils.tabulated_validator).
+
+Compares the previous per-cell validation (pandas 'apply' of 'validate_column_value',
+stopping at the first error) with the vectorized rule table ('find_invalid_values').
+
+Usage (from the root of the repository):
+    python benchmarks/bench_tsv_validation.py --rows 50000 --errors 100
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from utils.tabulated_validator import COLUMN_RULES, find_invalid_values, validate_column_value
+
+
+def create_table(rows, errors=0, seed=0):
+    """Synthetic sample sheet of 'rows' trios, with 'errors' invalid cells."""
+    rng = random.Random(seed)
+    data = {col: [] for col in COLUMN_RULES}
+    for i in range(rows):
+        family = i // 3
+        data['filename'].append(f"F{family}.vcf.gz")
+        data['file_type'].append("SNV")
+        data['assembly'].append(rng.choice(["GRCh37", "GRCh38"]))
+        data['sample'].append(f"S{i}")
+        data['family_id'].append(f"F{family}")
+        data['person_id'].append(f"P{i}")
+        data['sex'].append(rng.choice(["male", "female"]))
+        data['is_affected'].append(rng.choice(["0", "1"]))
+        data['date_of_birth'].append(f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(1950, 2020)}")
+        data['interpretation_title'].append(f"F{family} - interpretation")
+        data['is_index'].append("1" if i % 3 == 0 else "0")
+        data['project'].append("Project")
+    df = pd.DataFrame(data)
+    for _ in range(errors):
+        df.at[rng.randrange(rows), rng.choice(["sex", "is_index", "assembly"])] = "invalid"
+    return df
+
+
+def legacy_validation(df, columns):
+    """Previous implementation: one Python call per cell, stops at the first error."""
+    for col in columns:
+        invalid_rows = df[df[col].apply(lambda x: not validate_column_value(col, str(x)))]
+        if not invalid_rows.empty:
+            return [invalid_rows.index[0] + 2]
+    return []
+
+
+def timed(function, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the TSV validation.")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--errors", type=int, default=100)
+    args = parser.parse_args()
+
+    columns = list(COLUMN_RULES)
+    for errors in (0, args.errors):
+        df = create_table(args.rows, errors)
+        legacy_errors, legacy_time = timed(legacy_validation, df, columns)
+        new_errors, new_time = timed(find_invalid_values, df, columns)
+        print(f"{args.rows} rows, {errors} invalid cells: legacy {legacy_time * 1000:.0f}ms ({len(legacy_errors)} error reported)"
+              f" - vectorized {new_time * 1000:.0f}ms ({len(new_errors)} errors reported) - x{legacy_time / new_time:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Generators of synthetic inputs for the benchmarks: sample sheets (families, trios,
+multi-sample biofiles, shared projects) and biofiles (VCF, BED) of a chosen size.
+
+All the generators are deterministic for a given 'seed'.
+"""
+import hashlib
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tabulated2json import REQUIRED_HEADERS
+
+CHROMOSOMES = [str(chromosome) for chromosome in range(1, 23)] + ["X", "Y"]
+BASES = "ACGT"
+
+
+def parse_size(size):
+    """'64M' -> bytes (K, M, G suffixes)."""
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    size = str(size)
+    if size[-1].upper() in units:
+        return int(float(size[:-1]) * units[size[-1].upper()])
+    return int(size)
+
+
+def sheet_rows(families, persons=3, samples_per_biofile=None, projects=1, cnv_ratio=0.0, checksums=True, seed=0):
+    """
+    Rows of a synthetic sample sheet (one dict per sample, all the required columns).
+
+    Args:
+        families (int): number of families.
+        persons (int): persons per family (3: trios, proband + father + mother).
+        samples_per_biofile (int, optional): samples per biofile (default: one multi-sample VCF per family).
+        projects (int): number of projects shared by the families.
+        cnv_ratio (float): fraction of the families with a CNV biofile (BED) instead of a SNV one (VCF).
+        checksums (bool): fill the 'checksum' column with a fake MD5 (else the MD5 of the biofiles is computed).
+        seed (int): random seed.
+    """
+    rng = random.Random(seed)
+    samples_per_biofile = samples_per_biofile or persons
+    rows = []
+    for family in range(families):
+        family_id = f"F{family:06d}"
+        file_type = "CNV" if rng.random() < cnv_ratio else "SNV"
+        extension = "bed" if file_type == "CNV" else "vcf"
+        project = f"Projet {family % projects}"
+        for person in range(persons):
+            person_id = f"P{family:06d}-{person}"
+            is_index = person == 0
+            filename = f"{family_id}-{person // samples_per_biofile}.{extension}"
+            rows.append({
+                "filename": filename,
+                "checksum": hashlib.md5(filename.encode()).hexdigest() if checksums else "",
+                "file_type": file_type,
+                "sample": f"S{family:06d}-{person}",
+                "bam_path": f"/data/bam/S{family:06d}-{person}.bam",
+                "family_id": family_id,
+                "person_id": person_id,
+                "father_id": f"P{family:06d}-1" if is_index and persons > 1 else "",
+                "mother_id": f"P{family:06d}-2" if is_index and persons > 2 else "",
+                "sex": "M" if person == 1 else ("F" if person == 2 else rng.choice(["M", "F"])),
+                "is_affected": "1" if is_index else rng.choice(["0", "0", "0", "1"]),
+                "last_name": f"NAME{family}",
+                "first_name": rng.choice(["Alice", "Bob", "Claire", "David"]),
+                "date_of_birth": f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(1950, 2020)}",
+                "hpo": rng.choice(["", "HP:0001250", "HP:0001250,HP:0001263"]),
+                "interpretation_title": f"{family_id} - {'CNV' if file_type == 'CNV' else 'exome'}",
+                "is_index": "1" if is_index else "0",
+                "project": project,
+                "assignee": "",
+                "priority": rng.choice(["1", "2", "3", "4"]),
+                "person_note": "",
+                "assembly": "GRCh38",
+                "data_title": "",
+            })
+    return rows
+
+
+def project_mapping(rows):
+    """'projects' setting of the rows (project name -> slug)."""
+    return {row["project"]: row["project"].lower().replace(" ", "-") for row in rows}
+
+
+def data_init(rows):
+    """Rows as given to the builders by 'diagho_tsv2json' ({index: row})."""
+    return dict(enumerate(rows))
+
+
+def write_sheet(path, rows, delimiter="\t"):
+    """Writes the rows as a TSV (or CSV) sample sheet."""
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(delimiter.join(REQUIRED_HEADERS) + "\n")
+        for row in rows:
+            file.write(delimiter.join(row[column] for column in REQUIRED_HEADERS) + "\n")
+    return path
+
+
+def _write_until(path, header, record, size):
+    """Writes 'header' then records ('record(index)') until 'size' bytes."""
+    with open(path, "w", encoding="utf-8") as file:
+        written = file.write(header)
+        index = 0
+        while written < size:
+            written += file.write(record(index))
+            index += 1
+    return path
+
+
+def write_vcf(path, size, samples=("S1",), seed=0):
+    """Synthetic VCF (text) of about 'size' bytes, with a genotype column per sample."""
+    rng = random.Random(seed)
+    header = (
+        "##fileformat=VCFv4.2\n"
+        "##reference=GRCh38\n"
+        '##INFO=<ID=DP,Number=1,Type=Integer,Description="Total depth">\n'
+        '##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">\n'
+        '##FORMAT=<ID=AD,Number=R,Type=Integer,Description="Allelic depths">\n'
+        "#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\t" + "\t".join(samples) + "\n"
+    )
+
+    def record(index):
+        ref, alt = rng.sample(BASES, 2)
+        genotypes = "\t".join(f"{rng.choice(['0/0', '0/1', '1/1'])}:{rng.randint(0, 60)},{rng.randint(0, 60)}" for _ in samples)
+        return (f"chr{CHROMOSOMES[index % len(CHROMOSOMES)]}\t{10000 + index * 37}\t.\t{ref}\t{alt}\t{rng.randint(20, 99)}\tPASS"
+                f"\tDP={rng.randint(10, 200)}\tGT:AD\t{genotypes}\n")
+    return _write_until(path, header, record, parse_size(size))
+
+
+def write_bed(path, size, seed=0):
+    """Synthetic BED of CNVs of about 'size' bytes."""
+    rng = random.Random(seed)
+
+    def record(index):
+        start = 10000 + index * 5000
+        return f"chr{CHROMOSOMES[index % len(CHROMOSOMES)]}\t{start}\t{start + rng.randint(1000, 4000)}\t{rng.choice(['DEL', 'DUP'])}\t{rng.randint(0, 4)}\n"
+    return _write_until(path, "#chrom\tstart\tend\ttype\tcopy_number\n", record, parse_size(size))
+
+
+def write_biofiles(directory, rows, size, seed=0):
+    """
+    Writes the biofiles referenced by the rows (VCF for SNV, BED for CNV) in 'directory'.
+
+    Returns:
+        list: paths of the biofiles
+    """
+    samples = {}
+    for row in rows:
+        samples.setdefault(row["filename"], (row["file_type"], []))[1].append(row["sample"])
+    paths = []
+    for index, (filename, (file_type, biofile_samples)) in enumerate(samples.items()):
+        path = os.path.join(directory, filename)
+        if file_type == "CNV":
+            write_bed(path, size, seed + index)
+        else:
+            write_vcf(path, size, biofile_samples, seed + index)
+        paths.append(path)
+    return paths
+
+
+def nested_record(entries, empty_ratio=0.3, depth=3, seed=0):
+    """Nested dictionaries with a fraction of empty values (None or ""), as cleaned by 'remove_empty_keys'."""
+    rng = random.Random(seed)
+
+    def build(level):
+        record = {}
+        for index in range(8):
+            if level < depth and index == 0:
+                record[f"nested{index}"] = build(level + 1)
+            elif rng.random() < empty_ratio:
+                record[f"key{index}"] = rng.choice([None, ""])
+            else:
+                record[f"key{index}"] = rng.choice(["value", 42, True, ["HP:0001250"]])
+        return record
+    return {f"record{index}": build(1) for index in range(entries)}
@@ -0,0 +1,231 @@
+"""
+Suite of micro-benchmarks of the conversion and validation steps, on synthetic
+inputs (cf. benchmarks/generators.py): no Diagho server needed.
+
+Each benchmark is run for several sizes; each sample repeats the call enough
+times to last at least --min-time, and the time per call of the best, median
+and mean samples is reported. Results are written as JSON (with the commit and
+the machine) so that two runs can be compared.
+
+Usage (from the root of the repository):
+    python benchmarks/run_benchmarks.py                          # full suite -> benchmarks/results/<date>.json
+    python benchmarks/run_benchmarks.py --quick --filter md5     # small sizes, benchmarks matching 'md5'
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCHMARKS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS_DIRECTORY)
+sys.path.insert(0, ROOT)
+
+import generators
+from tabulated2json import REQUIRED_HEADERS, BulkConfigurationBuilder, diagho_tsv2json, get_biofiles, get_families, get_interpretations
+from utils.file import md5
+from utils.json_validator import validate_json_input
+from utils.tabulated_validator import read_tabulated_file, remove_empty_keys, validate_tsv_columns
+
+EXCLUDE_COLUMNS = ["AC", "AF", "DP"]
+
+# name -> (setup, parameter name, sizes, quick sizes)
+# 'setup(size, directory)' prépare les entrées et retourne la fonction à mesurer (sans argument)
+BENCHMARKS = {}
+
+
+def benchmark(name, parameter, sizes, quick_sizes):
+    def decorator(setup):
+        BENCHMARKS[name] = (setup, parameter, sizes, quick_sizes)
+        return setup
+    return decorator
+
+
+def builder_settings(rows):
+    return {"checksum_sidecars_enabled": False, "excludeColumns": EXCLUDE_COLUMNS, "projects": generators.project_mapping(rows)}
+
+
+def project_exists(project_slug):
+    """Pas d'appel à l'API : tous les projets existent."""
+    return project_slug
+
+
+def section_kwargs(families):
+    rows = generators.sheet_rows(families, projects=5, cnv_ratio=0.1)
+    return {"data_init": generators.data_init(rows), "path_biofiles": None, "diagho_api": None,
+            "settings": builder_settings(rows), "project_exists": project_exists}
+
+
+@benchmark("validate_tsv_columns", "families", [100, 1000, 10000], [100, 1000])
+def setup_validate_tsv_columns(families, directory):
+    path = generators.write_sheet(os.path.join(directory, "sheet.tsv"), generators.sheet_rows(families, projects=5))
+    table = read_tabulated_file(path, "utf-8")
+    return lambda: validate_tsv_columns(table, REQUIRED_HEADERS)
+
+
+@benchmark("diagho_tsv2json", "families", [100, 1000, 10000], [100, 1000])
+def setup_diagho_tsv2json(families, directory):
+    path = generators.write_sheet(os.path.join(directory, "sheet.tsv"), generators.sheet_rows(families, projects=5))
+    settings = {"recipients": "", "sheet_parser": "auto"}
+    return lambda: diagho_tsv2json(path, settings, "utf-8")
+
+
+@benchmark("get_families", "families", [100, 1000, 10000], [100, 1000])
+def setup_get_families(families, directory):
+    kwargs = section_kwargs(families)
+    return lambda: get_families(**kwargs)
+
+
+@benchmark("get_biofiles", "families", [100, 1000, 10000], [100, 1000])
+def setup_get_biofiles(families, directory):
+    kwargs = section_kwargs(families)
+    return lambda: get_biofiles(**kwargs)
+
+
+@benchmark("get_interpretations", "families", [100, 1000, 10000], [100, 1000])
+def setup_get_interpretations(families, directory):
+    kwargs = section_kwargs(families)
+    return lambda: get_interpretations(**kwargs)
+
+
+@benchmark("validate_json_input", "families", [100, 1000, 10000], [100, 1000])
+def setup_validate_json_input(families, directory):
+    rows = generators.sheet_rows(families, projects=5, cnv_ratio=0.1)
+    payload = BulkConfigurationBuilder(None, None, builder_settings(rows), project_exists=project_exists).add_rows(generators.data_init(rows)).build()
+    return lambda: validate_json_input(payload, "bench.json")
+
+
+@benchmark("remove_empty_keys", "records", [100, 1000, 10000], [100, 1000])
+def setup_remove_empty_keys(records, directory):
+    record = generators.nested_record(records)
+    return lambda: remove_empty_keys(record)
+
+
+@benchmark("md5", "size", ["16M", "256M"], ["16M"])
+def setup_md5(size, directory):
+    path = generators.write_vcf(os.path.join(directory, "biofile.vcf"), size, samples=("S1", "S2", "S3"))
+    return lambda: md5(path)
+
+
+def measure(function, repeat, min_time):
+    """
+    Times per call (s) of 'repeat' samples; each sample calls 'function' 'number'
+    times, 'number' being chosen so that a sample lasts at least 'min_time'.
+    """
+    function()  # warm-up (imports, caches)
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        samples.append((time.perf_counter() - start) / number)
+    return samples, number
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(names, quick, repeat, min_time):
+    results = {}
+    for name in names:
+        setup, parameter, sizes, quick_sizes = BENCHMARKS[name]
+        for size in quick_sizes if quick else sizes:
+            with tempfile.TemporaryDirectory() as directory:
+                function = setup(size, directory)
+                samples, number = measure(function, repeat, min_time)
+            key = f"{name}[{parameter}={size}]"
+            result = {
+                "name": name,
+                "params": {parameter: size},
+                "min_s": min(samples),
+                "median_s": statistics.median(samples),
+                "mean_s": statistics.mean(samples),
+                "stdev_s": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+                "repeat": repeat,
+                "number": number,
+            }
+            if parameter == "size":
+                result["mb_per_s"] = round(generators.parse_size(size) / 1024 / 1024 / result["min_s"], 1)
+            results[key] = result
+            throughput = f"  {result['mb_per_s']} MB/s" if "mb_per_s" in result else ""
+            print(f"  {key:<45} {result['min_s'] * 1000:>10.3f} ms  (median {result['median_s'] * 1000:.3f} ms){throughput}")
+    return results
+
+
+def compare(baseline, current, threshold):
+    """Prints the ratio current / baseline of the best times of the benchmarks of both runs."""
+    print(f"\nComparison with {baseline['meta'].get('commit')} ({baseline['meta'].get('date')}):")
+    regressions = 0
+    for key, result in current["benchmarks"].items():
+        previous = baseline["benchmarks"].get(key)
+        if previous is None:
+            continue
+        ratio = result["min_s"] / previous["min_s"]
+        verdict = "slower" if ratio > 1 + threshold else ("faster" if ratio < 1 - threshold else "")
+        regressions += verdict == "slower"
+        print(f"  {key:<45} {previous['min_s'] * 1000:>10.3f} ms -> {result['min_s'] * 1000:>10.3f} ms  x{ratio:.2f} {verdict}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default="", help="Run only the benchmarks whose name contains this string.")
+    parser.add_argument("--quick", action="store_true", help="Small sizes only.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.1, help="Minimum duration (s) of a sample.")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<date>_<commit>.json).")
+    parser.add_argument("--compare", help="Results file of a previous run to compare with.")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change reported as slower/faster.")
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    commit = git_commit()
+    date = datetime.now()
+    print(f"{len(names)} benchmarks, commit {commit}, Python {platform.python_version()}:")
+    current = {
+        "meta": {
+            "date": date.isoformat(timespec="seconds"),
+            "commit": commit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "quick": args.quick,
+        },
+        "benchmarks": run(names, args.quick, args.repeat, args.min_time),
+    }
+
+    output = args.output or os.path.join(BENCHMARKS_DIRECTORY, "results", f"{date:%Y%m%d-%H%M%S}_{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(current, file, indent=2)
+    print(f"Results written: {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if compare(baseline, current, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ FORCE=false
 UPDATE=false
 DEBUG=false
 STATUS=false
+PROFILE=""
 
 
 while [[ $# -gt 0 ]]; do
@@ -34,6 +35,10 @@ while [[ $# -gt 0 ]]; do
       STATUS=true
       shift
       ;;
+    --profile)
+      PROFILE="--profile"
+      shift
+      ;;
     *)
       echo "Option inconnue : $1"
       exit 1
@@ -76,11 +81,11 @@ if [ "$START" = true ]; then
     #################################
     > DEBUG
     "
-    python main.py start_file_watcher
+    python main.py start_file_watcher $PROFILE
   
   else
 
-    nohup python main.py start_file_watcher > /dev/null 2>&1 &
+    nohup python main.py start_file_watcher $PROFILE > /dev/null 2>&1 &
     disown
 
     # Ecrire le PID dans le fichier
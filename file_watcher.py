@@ -8,6 +8,8 @@ import signal
 
 from utils.logger import *
 from uploader import *
+from utils.metrics import JOBS
+from utils.profiling import check_profiling_window
 
 # List files in directory
 def list_files(directory):
@@ -73,10 +75,9 @@ def watch_directory(**kwargs):
     # Get args
     path_input = kwargs.get("path_input")
     path_backup = kwargs.get("path_backup")
-    config = kwargs.get("config")
     config_file = kwargs.get("config_file")
     
-    settings = load_configuration(config)
+    settings = get_settings(config_file)
     recipients = settings["recipients"]
         
     previous_files = list_files(path_input)
@@ -96,44 +97,70 @@ def watch_directory(**kwargs):
                 send_mail_alert(recipients, "Diagho file_watcher has been stopped.")
                 break
             
+            # Fin de la fenêtre de profilage (option --profile, scope 'window')
+            check_profiling_window()
+            
             time.sleep(5)
             current_files = list_files(path_input)
+            
+            # Configuration relue seulement si le fichier a été modifié
+            config = get_config(config_file)
+            settings = get_settings(config_file)
+            recipients = settings["recipients"]
 
             # Comparer les fichiers créés et modifiés
             new_files = set(current_files) - set(previous_files)
-            modified_files = {f for f in current_files if f in previous_files and current_files[f] != previous_files[f]}
+            # Fichiers modifiés (ex. feuille corrigée sur place après un échec) : seulement en mode incrémental
+            modified_files = set()
+            if settings["incremental"]:
+                modified_files = {f for f in current_files if f in previous_files and current_files[f] != previous_files[f]}
 
-            # Si nouveau fichier ou ficher modifier :
+            # Si nouveau fichier ou ficher modifié :
             if new_files or modified_files:
-                for file in new_files:
-                    if file.endswith((".json", ".tsv", ".csv", ".txt")):
-                        file_path = os.path.join(path_input, file)
-                        
-                        log_message("NEW_FILE", "INFO", f"-----------------------------------------------------------------------------------------------")
-                        log_message("NEW_FILE", "INFO", f"New file: {file_path}")
-                        
-                        try:
-                            # Copier le fichier vers le répertoire backup
-                            copy_file(file_path, path_backup)
+                sheets = [file for file in sorted(new_files | modified_files) if file.endswith((".json", ".tsv", ".csv", ".txt"))]
+                JOBS.labels(state="pending").set(len(sheets))
+                for file in sheets:
+                    pending = True
+                    file_path = os.path.join(path_input, file)
+                    
+                    log_message("NEW_FILE", "INFO", f"-----------------------------------------------------------------------------------------------")
+                    log_message("NEW_FILE", "INFO", f"{'New' if file in new_files else 'Modified'} file: {file_path}")
+                    
+                    try:
+                        # Copier le fichier vers le répertoire backup
+                        copy_file(file_path, path_backup)
 
-                            # Traiter le fichier
-                            log_message(function_name, "INFO", f"Processing file: {os.path.basename(file_path)}")
-                            kwargs = {
-                                "file_path": file_path,
-                                "config": config,
-                                "config_file": config_file
-                            }
+                        # Traiter le fichier
+                        log_message(function_name, "INFO", f"Processing file: {os.path.basename(file_path)}")
+                        kwargs = {
+                            "file_path": file_path,
+                            "config": config,
+                            "config_file": config_file
+                        }
+                        # Le job démarre : il n'est plus en attente
+                        JOBS.labels(state="pending").dec()
+                        pending = False
+                        JOBS.labels(state="running").inc()
+                        try:
                             diagho_upload_file(**kwargs)
+                        finally:
+                            JOBS.labels(state="running").dec()
 
-                            # Supprimer le fichier du répertoire 'input_data' après traitement
-                            remove_file(file_path)
-                            log_message(function_name, "INFO", f"Back to file_watcher...\n")
+                        # Supprimer le fichier du répertoire 'input_data' après traitement
+                        remove_file(file_path)
+                        log_message(function_name, "INFO", f"Back to file_watcher...\n")
 
-                        except Exception as e:
-                            log_message(function_name, "ERROR", f"Failed to process file: {os.path.basename(file_path)} - {e}")
+                    except Exception as e:
+                        log_message(function_name, "ERROR", f"Failed to process file: {os.path.basename(file_path)} - {e}")
+                    finally:
+                        # Job non démarré (ex. échec de la copie de sauvegarde)
+                        if pending:
+                            JOBS.labels(state="pending").dec()
 
             # Mettre à jour la liste des fichiers pour la prochaine vérification
             previous_files = current_files
 
     except KeyboardInterrupt:
         log_message(function_name, "WARNING", f"KeyboardInterrupt. Stop watcher.")
+    finally:
+        check_profiling_window(force=True)
@@ -1,29 +1,48 @@
 import sys
 import argparse
 import os
-import yaml
 
-from tabulated2json import *
-from file_watcher import *
-from utils.config_loader import *
+from utils.config_loader import CONFIG_FILE, get_config
+from utils.logger import configure_logging
 
+# Les modules du watcher (requests, pandas,...) sont importés seulement quand une commande les utilise
 
 
 # Load configuration            
 def load_config(config_file):
-    """Load configuration file."""
+    """Load configuration file (parsed once and shared, cf. utils/config_loader.py)."""
     try:
-        with open(config_file, "r") as file:
-            return yaml.safe_load(file)
+        return get_config(config_file)
     except Exception as e:
         print(f"Error when loading configuration file: {e}", file=sys.stderr)
         sys.exit(1)
 
 # Start file watcher
-def run_file_watcher(config_file):
-    """Command for starting the watcher."""
+def run_file_watcher(config_file, profile=None):
+    """Command for starting the watcher ('profile': profiling mode given by --profile)."""
     # Load configuration file
     config = load_config(config_file)
+    configure_logging(config)
+    
+    # Profilage (rapports dans le répertoire des logs)
+    from utils.profiling import configure_profiling
+    try:
+        configure_profiling(config, profile)
+    except ValueError as e:
+        print(f"Error in the profiling configuration: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    from file_watcher import watch_directory
+    
+    # Traces des jobs (timeline des étapes)
+    from utils.tracing import configure_tracing
+    configure_tracing(config)
+    
+    # Endpoint des métriques Prometheus
+    metrics = config.get("metrics", {})
+    if metrics.get("enabled", False):
+        from utils.metrics import start_metrics_server
+        start_metrics_server(host=metrics.get("host", "127.0.0.1"), port=int(metrics.get("port", 9108)))
     
     # Arguments
     kwargs = {
@@ -35,13 +54,31 @@ def run_file_watcher(config_file):
         }
     watch_directory(**kwargs)
 
+# Report of the JSON logs
+def run_log_report(config_file, log_files, as_json=False):
+    """Command for the report of the stages (durations, throughput) from the JSON logs."""
+    from utils.log_report import build_report, find_log_files, format_report, read_json_logs
+    
+    if not log_files:
+        config = load_config(config_file)
+        log_files = find_log_files(config.get("logging", {}).get("log_directory", "logs"))
+    if not log_files:
+        print("No JSON log file found (cf. 'log_format: json' in config.yaml).", file=sys.stderr)
+        sys.exit(1)
+    
+    report = build_report(read_json_logs(log_files))
+    if as_json:
+        import json
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_report(report))
+
 def main():
     """
     Principal script.
     """
-    # Load configuration file
-    config_file = "config/config.yaml"
-    config = load_config(config_file)
+    # Configuration file (loaded by the commands)
+    config_file = CONFIG_FILE
     
     # Arguments parser
     parser = argparse.ArgumentParser()
@@ -50,7 +87,14 @@ def main():
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     # Sub-command for 'start_file_watcher'
-    subparsers.add_parser("start_file_watcher", help="Watch a directory.")
+    watcher_parser = subparsers.add_parser("start_file_watcher", help="Watch a directory.")
+    watcher_parser.add_argument("--profile", nargs="?", const="config", choices=["config", "cprofile", "sampling"],
+                                help="Profile the jobs (mode of the 'profiling' section of config.yaml, or 'cprofile' / 'sampling').")
+    
+    # Sub-command for 'log_report'
+    report_parser = subparsers.add_parser("log_report", help="Stage durations and throughput from the JSON logs.")
+    report_parser.add_argument("log_files", nargs="*", help="JSON log files (default: those of 'logging.log_directory').")
+    report_parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
 
     try:
         # Get arguments
@@ -62,7 +106,9 @@ def main():
 
     # Commands
     if args.command == "start_file_watcher":
-        run_file_watcher(config_file)
+        run_file_watcher(config_file, args.profile)
+    elif args.command == "log_report":
+        run_log_report(config_file, args.log_files, args.json)
     else:
         parser.print_help()
         sys.exit(1)
@@ -1,40 +1,44 @@
 import inspect
 import json
-import pandas as pd
 import sys
 import os
-import sys
-import yaml
 
 from utils.api import api_get_project_from_slug
-from utils.config_loader import load_configuration
+from utils.checksum_cache import compute_checksums
+from utils.checksum_manifest import get_sidecar_checksum, select_sample
+from utils.json_payload import write_json_file_async
+from utils.log_context import stage
 from utils.logger import log_message
 from utils.mail import *
+from utils.tracing import traced
+from utils.tabulated_stream import IndexedSheet, JsonStreamWriter
 from utils.tabulated_validator import *
 
 # Pour encodage fichiers de sortie
 sys.getdefaultencoding()
 
+# Required columns (parsing will fail if missing one of them)
+REQUIRED_HEADERS = ['filename', 'checksum', 'file_type', 'sample', 'bam_path', 'family_id', 'person_id', 'father_id','mother_id', 'sex', 'is_affected', 'last_name', 'first_name', 'date_of_birth', 'hpo', 'interpretation_title', 'is_index', 'project', 'assignee', 'priority', 'person_note', 'assembly', 'data_title']
+
 
-def create_json_files(input_file, output_file, diagho_api, settings):
+@traced()
+def create_json_files(input_file, output_file, diagho_api, settings, stored_checksums=None):
     """
-    Creation of the JSON bulkCreation file.
+    Creation of the JSON bulkCreation content.
 
     Args:
         input_file (str): TSV input file
-        output_file (str): JSON output file
+        output_file (str): JSON output file (audit copy, written in background if 'settings.json_audit')
         diagho_api (dict): endpoints
-        
+        settings (dict): settings (cf. 'get_settings')
+        stored_checksums (dict, optional): {filename: checksum} of the last post of the sheet
+            (incremental re-processing), used for the biofiles already moved to the backup
+
+    Returns:
+        dict: JSON bulkCreation content, or None in streaming mode (only written in 'output_file')
     """
     function_name = inspect.currentframe().f_code.co_name
     
-    # Load configuration file
-    CONFIG_FILE = os.getenv("CONFIG_PATH", "config/config.yaml")
-    with open(CONFIG_FILE, "r") as file:
-        config = yaml.safe_load(file)
-        
-    # Load settings
-    settings = load_configuration(config)
     path_biofiles = settings["path_biofiles"]
     recipients = settings["recipients"]
     
@@ -45,6 +49,12 @@ def create_json_files(input_file, output_file, diagho_api, settings):
         log_message(function_name, "ERROR", f"File not found: {input_file}")
         raise FileNotFoundError(f"File not found: {input_file}.")
     
+    # Très gros fichier : conversion en streaming (mémoire bornée)
+    if use_streaming_conversion(input_file, settings):
+        with stage("parse", streaming=True):
+            create_json_files_streaming(input_file, output_file, diagho_api, settings, stored_checksums)
+        return None
+    
     # Initialisation of the initial dictionnary
     data_init = {}
     try:
@@ -53,239 +63,372 @@ def create_json_files(input_file, output_file, diagho_api, settings):
         log_message(function_name, "ERROR", f"{input_file} : Erreur détectée dans 'diagho_tsv2json': {e}.")
         raise
     
-    # Initialisation of the final dictionnary
-    output_data = {}
+    # Calcul en parallèle des checksums absents du TSV (mis en cache pour 'get_biofiles' et 'get_interpretations')
+    with stage("hash") as fields:
+        fields["files"] = len(precompute_checksums(data_init, path_biofiles, settings))
     
-    kwargs = {
-        'data_init': data_init,
-        'path_biofiles': path_biofiles,
-        'diagho_api': diagho_api,
-        'settings': settings
-    }
+    # Vérification d'un échantillon des checksums fournis par les fichiers '.md5'
+    try:
+        verify_sidecar_checksums(data_init, path_biofiles, settings)
+    except ValueError as e:
+        log_message(function_name, "ERROR", f"{e}")
+        send_mail_alert(recipients, f"{e}")
+        raise
     
-    # Sub-dictionnary for families
+    # Families, biofiles and interpretations : une seule passe sur les lignes
     try:
-        output_data["families"] = get_families(**kwargs)
+        builder = BulkConfigurationBuilder(path_biofiles, diagho_api, settings, stored_checksums=stored_checksums)
+        builder.add_rows(data_init)
+        output_data = builder.build()
     except Exception as e:
-        log_message(function_name, "ERROR", f"Erreur détectée dans 'get_families': {e}")
-        send_mail_alert(recipients, f"Erreur détectée dans 'get_families': \n{e}")
+        log_message(function_name, "ERROR", f"Erreur détectée dans 'BulkConfigurationBuilder': {e}")
+        send_mail_alert(recipients, f"Erreur détectée dans 'BulkConfigurationBuilder': \n{e}")
         raise
-        
-    # Sub-dictionnary for biofiles
+    
+    # Fichier JSON : copie d'audit, écrite en arrière-plan (le contenu est posté directement)
+    if settings["json_audit"] and output_file:
+        write_json_file_async(output_data, output_file)
+    return output_data
+    
+
+def use_streaming_conversion(input_file, settings):
+    """
+    Returns True if the TSV file has to be converted in streaming mode
+    ('settings.streaming_conversion': "always", "never" or "auto" = above 'streaming_threshold_mb').
+    """
+    mode = settings["streaming_conversion"]
+    if mode == "always":
+        return True
+    if mode == "auto":
+        return os.path.getsize(input_file) >= settings["streaming_threshold_mb"] * 1024 * 1024
+    return False
+
+
+@traced()
+def create_json_files_streaming(input_file, output_file, diagho_api, settings, stored_checksums=None):
+    """
+    Creation of the JSON bulkCreation file, in streaming mode (for very large TSV files).
+
+    The TSV is read once to validate the rows and build compact indexes (offset of
+    each row, rows of each family / biofile / interpretation). Then each family,
+    biofile and interpretation is built from its rows only, re-read from disk, and
+    written incrementally: the peak memory of the conversion does not depend on the
+    number of rows. The JSON is identical to the one written by 'create_json_files'.
+    The uploader then loads it whole (validation, pre-flight, POST): only the
+    conversion step is bounded.
+
+    Args:
+        input_file (str): TSV input file
+        output_file (str): JSON output file
+        diagho_api (dict): endpoints
+        settings (dict): settings
+        stored_checksums (dict, optional): cf. 'create_json_files'
+    """
+    function_name = inspect.currentframe().f_code.co_name
+    path_biofiles = settings["path_biofiles"]
+    recipients = settings["recipients"]
+    
+    log_message(function_name, "INFO", f"Streaming conversion of: {input_file}")
+    
+    # Lecture des lignes : validation + index de regroupement
+    sheet = IndexedSheet(input_file, ["family_id", "filename", "interpretation_title"])
     try:
-        output_data["files"] = get_biofiles(**kwargs)
-    except Exception as e:
-        log_message(function_name, "ERROR", f"Erreur détectée dans 'get_biofiles': {e}")
-        send_mail_alert(recipients, f"Erreur détectée dans 'get_biofiles': \n{e}")
+        missing_columns, errors = sheet.build(REQUIRED_HEADERS)
+        if missing_columns:
+            raise TSVValidationError(f"Missing columns: {missing_columns}")
+        if errors:
+            raise TSVValidationError(format_validation_errors(errors), errors)
+    except TSVValidationError as e:
+        log_message(function_name, "ERROR", f"{e}")
+        send_mail_alert(recipients, f"Erreur de validation TSV : \n{e}")
         raise
-            
-    # Sub-dictionnary for interpretations
+    
+    # Calcul en parallèle des checksums absents du TSV + vérification des fichiers '.md5'
+    missing_checksums = {i: {"filename": filename, "checksum": ""} for i, filename in enumerate(sorted(sheet.empty_checksum_filenames))}
+    precompute_checksums(missing_checksums, path_biofiles, settings)
     try:
-        output_data["interpretations"] = get_interpretations(**kwargs)
-    except Exception as e:
-        log_message(function_name, "ERROR", f"Erreur détectée dans 'get_interpretations': {e}")
-        send_mail_alert(recipients, f"Erreur détectée dans 'get_interpretations': \n{e}")
+        verify_sidecar_checksums(missing_checksums, path_biofiles, settings)
+    except ValueError as e:
+        log_message(function_name, "ERROR", f"{e}")
+        send_mail_alert(recipients, f"{e}")
         raise
     
-    with open(output_file,'w', encoding='utf-8') as formatted_file:
-        json.dump(output_data, formatted_file, ensure_ascii=False, indent=4)
-    log_message(function_name, "INFO", f"Write JSON: {output_file}")
+    # Un seul builder pour tout le fichier : l'existence de chaque projet est vérifiée une fois
+    builder = BulkConfigurationBuilder(path_biofiles, diagho_api, settings, stored_checksums=stored_checksums)
+    sections = [
+        ("families", "family_id", builder.get_families),
+        ("files", "filename", builder.get_biofiles),
+        ("interpretations", "interpretation_title", builder.get_interpretations),
+    ]
     
-
-def diagho_tsv2json(input_file, settings, encoding='latin1'):
+    # Ecriture incrémentale (fichier temporaire renommé à la fin)
+    tmp_file = f"{output_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as formatted_file:
+        writer = JsonStreamWriter(formatted_file)
+        for key, column, get_items in sections:
+            writer.start_list(key)
+            for row_numbers in sheet.groups[column].values():
+                try:
+                    builder.reset(sections=(key,)).add_rows(sheet.read_rows(row_numbers))
+                    items = get_items()
+                except Exception as e:
+                    log_message(function_name, "ERROR", f"Erreur détectée dans '{get_items.__name__}': {e}")
+                    send_mail_alert(recipients, f"Erreur détectée dans '{get_items.__name__}': \n{e}")
+                    raise
+                for item in items:
+                    writer.write_item(item)
+        writer.close()
+    os.replace(tmp_file, output_file)
+    log_message(function_name, "INFO", f"Write JSON: {output_file} ({len(sheet)} rows)")
+
+
+@traced()
+def diagho_tsv2json(input_file, settings, encoding=None):
     """
     Converts a TSV (Tab-Separated Values) file to a JSON file.
+    The file is read and parsed once (encoding detected if not given).
     """
     function_name = inspect.currentframe().f_code.co_name
     recipients = settings["recipients"]        
     
     log_message(function_name, "DEBUG", f"Processing input_file: {input_file}")
-    
-    # Remove empty rows
-    remove_trailing_empty_lines(input_file, encoding)
-        
-    # Required columns (parsing will fail if missing one of them)
-    required_headers = ['filename', 'checksum', 'file_type', 'sample', 'bam_path', 'family_id', 'person_id', 'father_id','mother_id', 'sex', 'is_affected', 'last_name', 'first_name', 'date_of_birth', 'hpo', 'interpretation_title', 'is_index', 'project', 'assignee', 'priority', 'person_note', 'assembly', 'data_title']
         
-    # Validate values in columns
+    # Read TSV file (blank lines skipped, parser chosen by size) and validate values in columns
     try:
-        validate_tsv_columns(input_file, required_headers)
+        with stage("parse") as fields:
+            table = read_tabulated_file(input_file, encoding, settings["sheet_parser"])
+            fields["rows"] = len(table)
+        with stage("validate"):
+            validate_tsv_columns(table, REQUIRED_HEADERS)
     except TSVValidationError as e:
         send_mail_alert(recipients, f"Erreur de validation TSV : \n{e}")
         raise
     except Exception as e:
         send_mail_alert(recipients, f"Fonction '{function_name}': Autre erreur : {e}")
         raise
-
-    # Load TSV file into a pandas DataFrame
-    df = pd.read_csv(input_file, delimiter='\t', encoding=encoding, dtype=str)  # dtype=str to keep empty fields
-        
-    # Keep empty strings
-    df = df.where(pd.notnull(df), "")
     
-    # Convert DataFrame to dictionary
-    dict_final = df.to_dict(orient='index')
+    # Convert table to dictionary
+    dict_final = table.to_records()
     
     return dict_final
 
 
-def get_families(**kwargs):
+def precompute_checksums(data_init, path_biofiles, settings):
     """
-    Get informations about families.
+    Computes in parallel the MD5 of the biofiles without checksum in the TSV
+    (nor in a '.md5' checksum file, if enabled).
+    The checksums are stored in the checksum cache, used by 'get_or_compute_checksum'.
+    """
+    if not path_biofiles:
+        return {}
+    use_sidecars = settings["checksum_sidecars_enabled"]
+    filenames = [
+        sample_data["filename"]
+        for sample_data in data_init.values()
+        if not sample_data.get("checksum") and sample_data.get("filename")
+    ]
+    if use_sidecars:
+        filenames = [filename for filename in filenames if not get_sidecar_checksum(path_biofiles, filename)]
+    filepaths = [os.path.join(path_biofiles, filename) for filename in filenames]
+    filepaths = [filepath for filepath in filepaths if os.path.isfile(filepath)]
+    return compute_checksums(filepaths, settings["hash_workers"])
+
+
+def verify_sidecar_checksums(data_init, path_biofiles, settings):
+    """
+    Verification mode 'sample': computes the MD5 of a random sample of the biofiles
+    whose checksum comes from a '.md5' checksum file, and compares them.
+    Other biofiles are verified while uploading (mode 'deferred').
 
-    Returns:
-        list: list of dictionnaries (one dict per family)
+    Raises:
+        ValueError: if a checksum file does not match its biofile.
     """
     function_name = inspect.currentframe().f_code.co_name
-    log_message(function_name, "DEBUG", "Start : GET_FAMILIES.")
-    
-    # Get args
-    data = kwargs.get("data_init")
+    if not settings["checksum_sidecars_enabled"] or settings["checksum_sidecars_verify"] != "sample":
+        return
+
+    filenames = [
+        sample_data["filename"]
+        for sample_data in data_init.values()
+        if not sample_data.get("checksum") and sample_data.get("filename")
+        and get_sidecar_checksum(path_biofiles, sample_data["filename"])
+        and os.path.isfile(os.path.join(path_biofiles, sample_data["filename"]))
+    ]
+    sample = select_sample(filenames, settings["checksum_sidecars_sample_rate"])
+    if not sample:
+        return
+    log_message(function_name, "INFO", f"Verify checksum files of {len(sample)}/{len(set(filenames))} biofiles: {sample}")
+    computed = compute_checksums([os.path.join(path_biofiles, filename) for filename in sample], settings["hash_workers"])
+    for filename in sample:
+        checksum = computed.get(os.path.join(path_biofiles, filename))
+        expected = get_sidecar_checksum(path_biofiles, filename)
+        if checksum is None or checksum.lower() != expected:
+            raise ValueError(f"Checksum file does not match biofile '{filename}': expected {expected}, computed {checksum}.")
+
+
+# priority mapping :
+PRIORITY_MAPPING = {
+    "1": "low",
+    "2": "normal",
+    "3": "high",
+    "4": "highest"
+}
+
+# Sections du JSON bulkCreation
+SECTIONS = ("families", "files", "interpretations")
+
+
+class BulkConfigurationBuilder:
+    """
+    Builds the families, biofiles and interpretations of the JSON bulkCreation file
+    in a single pass over the rows of the TSV.
 
-    # Dictionnaries initilisation
-    dict_families = {}
-    dict_index_case_by_family = {}
+    Hash indexes are used instead of scanning lists: family -> set of persons,
+    filename -> biofile, title -> interpretation. The checksum of each row is
+    obtained once, and the existence of each project is checked once.
 
-    # Foreach sample in data
-    for index, sample_data in data.items():
+    Args:
+        path_biofiles (str): directory of the biofiles (to compute missing checksums).
+        diagho_api (dict): endpoints.
+        settings (dict): settings.
+        sections (tuple, optional): sections to build (default: all).
+        project_exists (callable, optional): project_slug -> bool (default: GET on the API).
+        stored_checksums (dict, optional): {filename: checksum} of the biofiles already moved (cf. 'get_or_compute_checksum').
+    """
+
+    def __init__(self, path_biofiles, diagho_api, settings, sections=SECTIONS, project_exists=None, stored_checksums=None):
+        self.path_biofiles = path_biofiles
+        self.diagho_api = diagho_api
+        self.sections = set(sections)
+        self.use_sidecars = settings["checksum_sidecars_enabled"]
+        self.exclude_columns = settings['excludeColumns']
+        self.project_mapping = settings['projects']
+        self.project_exists = project_exists or self._api_project_exists
+        self.stored_checksums = stored_checksums
+
+        self.families = {}          # family_id -> family
+        self.family_persons = {}    # family_id -> set(person_id)
+        self.biofiles = {}          # filename -> biofile
+        self.interpretations = {}   # interpretation_title -> interpretation
+        self.projects = {}          # project_slug -> bool (projet existant)
+        self._interpretations_list = None
+
+    def reset(self, sections=None):
+        """
+        Clears the families, biofiles and interpretations, and selects the sections to
+        build next; the project checks are kept (streaming conversion, group by group).
+        """
+        if sections is not None:
+            self.sections = set(sections)
+        self.families = {}
+        self.family_persons = {}
+        self.biofiles = {}
+        self.interpretations = {}
+        self._interpretations_list = None
+        return self
+
+    def _api_project_exists(self, project_slug):
+        kwargs = {
+            "diagho_api": self.diagho_api,
+            "project_slug": project_slug,
+            }
+        return api_get_project_from_slug(**kwargs) # return project_slug if project exists
+
+    def add_rows(self, data):
+        """Adds all the rows of 'data' ({index: row}, cf. diagho_tsv2json)."""
+        for index, sample_data in data.items():
+            self.add_row(sample_data)
+        return self
+
+    def add_row(self, sample_data):
+        """Adds one row of the TSV to the families, biofiles and interpretations."""
+        if "families" in self.sections:
+            self._add_person(sample_data)
+        if "files" in self.sections or "interpretations" in self.sections:
+            # Get the checksum of the biofile or calculate it
+            sample_id = sample_data.get('sample', '')
+            try:
+                checksum = get_or_compute_checksum(sample_data, sample_id, self.path_biofiles, self.use_sidecars, self.stored_checksums)
+            except Exception as e:
+                raise ValueError(e)
+            if "files" in self.sections:
+                self._add_biofile(sample_data, checksum)
+            if "interpretations" in self.sections:
+                self._add_interpretation(sample_data, checksum)
+
+    def _add_person(self, sample_data):
+        function_name = "get_families"
         
         # Get information for the sample
-        sample_id = sample_data.get('sample', '')
         person_id = sample_data.get('person_id', '')
         family_id = sample_data.get('family_id', '')
         sex = sample_data.get('sex', '').strip().lower()
         sex = {'m': 'male', 'f': 'female'}.get(sex, sex)
-        last_name = sample_data.get('last_name', '')
-        first_name = sample_data.get('first_name', '')
-        date_of_birth = parse_date(sample_data.get('date_of_birth', ''))  # change date format
-        person_note = sample_data.get('person_note', '')
-        
-        # Parents id
-        mother_id = sample_data.get('mother_id', '')
-        father_id = sample_data.get('father_id', '')
-        
-        # Index Case
-        is_index = sample_data.get('is_index', False)
-        if is_index:
-            # Get the person_id of the index case and add it to 'dict_index_case_by_family'
-            index_case_id = person_id
-            dict_index_case_by_family[family_id] = index_case_id
 
         # Create dictionnary for the person
         dict_person = {
             "identifier": person_id,
             "sex": sex,
-            "firstName": first_name,
-            "lastName": last_name,
-            "birthday": date_of_birth,
-            "motherIdentifier": mother_id,
-            "fatherIdentifier": father_id,
-            "note": person_note
+            "firstName": sample_data.get('first_name', ''),
+            "lastName": sample_data.get('last_name', ''),
+            "birthday": parse_date(sample_data.get('date_of_birth', '')),  # change date format
+            "motherIdentifier": sample_data.get('mother_id', ''),
+            "fatherIdentifier": sample_data.get('father_id', ''),
+            "note": sample_data.get('person_note', '')
         }
 
         # Remove empty key/value
         dict_person = remove_empty_keys(dict_person)
 
         # Create or update the family in the dictionnary
-        if family_id in dict_families:  # Check if family already exists
-            persons = dict_families[family_id]["persons"]
+        if family_id in self.families:  # Check if family already exists
             # Check if the current person already exists in the family, if doesn't exist, add it
-            if not any(person["identifier"] == dict_person["identifier"] for person in persons):
-                dict_families[family_id]["persons"].append(dict_person)
+            persons = self.family_persons[family_id]
+            if person_id not in persons:
+                persons.add(person_id)
+                self.families[family_id]["persons"].append(dict_person)
                 log_message(function_name, "DEBUG", f"Existing family: {family_id} + Add person: {person_id}")
         else:
-            # If the family doesn't exist, create it and add teh current person
-            dict_families[family_id] = {
+            # If the family doesn't exist, create it and add the current person
+            self.families[family_id] = {
                 "identifier": family_id,
                 "persons": [dict_person]
                 }
+            self.family_persons[family_id] = {person_id}
             log_message(function_name, "DEBUG", f"Create family: {family_id} + Add person: {person_id}")
-    list_families = [value for value in dict_families.values()]
-    return list_families
-    
-    
-def get_biofiles(**kwargs):
-    """
-    Get informations about biofiles and samples.
-
-    Returns:
-        list: list of dictionnaries (one dict per biofile)
-    """
-    function_name = inspect.currentframe().f_code.co_name
-    log_message(function_name, "DEBUG", "Start : GET_BIOFILES.")
-    
-    # Get args
-    data = kwargs.get("data_init")
-    biofiles_directory = kwargs.get("path_biofiles", None)
-
-    # Initialisation
-    dict_biofiles = {}
-
-    # Foreach sample
-    for index, sample_data in data.items():
 
+    def _add_biofile(self, sample_data, checksum):
+        function_name = "get_biofiles"
+        
         # Get information of the sample
         sample_id = sample_data.get('sample', '')
-        person_id = sample_data.get('person_id', '')
-        family_id = sample_data.get('family_id', '')
-        bam_path = sample_data.get('bam_path', '')
-        assembly = sample_data.get('assembly', '')
         filename = sample_data.get('filename', '')
-        
-        
-        # Get the checksum of the biofile or calculate it
-        try:
-            checksum = get_or_compute_checksum(sample_data, sample_id, biofiles_directory)
-        except Exception as e:
-            raise ValueError(e)
         log_message(function_name, "DEBUG", f"Sample: {sample_id} - Filename: {filename} - Checksum: {checksum}")
 
         # Create dictionnary for the sample
         dict_sample = {
             "name": sample_id,
-            "person": person_id,
-            "bamPath": bam_path
+            "person": sample_data.get('person_id', ''),
+            "bamPath": sample_data.get('bam_path', '')
         }
         # Remove empty key/value
         dict_sample = remove_empty_keys(dict_sample)
 
         # If the current biofile does not exist in the dict_biofile, add it with the current sample
-        if filename not in dict_biofiles:
-            dict_biofiles[filename] = {
+        if filename not in self.biofiles:
+            self.biofiles[filename] = {
                 "filename": filename,
                 "samples": [dict_sample],
                 "checksum": checksum,
-                "assembly": assembly
+                "assembly": sample_data.get('assembly', '')
             }
         else:
             # If the current biofile already exists, add the current sample
-            dict_biofiles[filename]["samples"].append(dict_sample)
-    list_biofiles = [value for value in dict_biofiles.values()]
-    return list_biofiles
-
-
-def get_interpretations(**kwargs):
-    """
-    Get informations about interpretations.
-
-    Returns:
-        list: list of dictionnaries (one dict per interpretation)
-    """
-    function_name = inspect.currentframe().f_code.co_name
-    log_message(function_name, "DEBUG", "Start GET_INTERPRETATIONS.")
-    
-    # Get args
-    data = kwargs.get("data_init")
-    biofiles_directory = kwargs.get("path_biofiles", None)
-    diagho_api = kwargs.get("diagho_api")
-    settings = kwargs.get("settings")
-
-    # Initialisation
-    dict_interpretations = {}
-
-    # Foreach sample
-    for index, sample_data in data.items():
+            self.biofiles[filename]["samples"].append(dict_sample)
 
+    def _add_interpretation(self, sample_data, checksum):
+        function_name = "get_interpretations"
+        
         # Get information for the sample
         sample_id = sample_data.get('sample', '')
         is_index = sample_data.get('is_index', '')
@@ -295,45 +438,28 @@ def get_interpretations(**kwargs):
             log_message(function_name, "INFO", f"Biofile_type is empty for sample: {sample_id} --> Default to 'SNV'.")
             biofile_type = "SNV"
         
-        # Get project_slug from config file
+        # Get project_slug from config file (existence checked once per project)
         project = sample_data.get('project', '')
-        project_mapping = settings['projects']
-        project_slug = project_mapping.get(project, project.lower().replace(" ", "-"))
-        kwargs = {
-            "diagho_api": diagho_api,
-            "project_slug": project_slug,
-            }
-        project_exist = api_get_project_from_slug(**kwargs) # return project_slug if project exists
-        if not project_exist:
+        project_slug = self.project_mapping.get(project, project.lower().replace(" ", "-"))
+        if project_slug not in self.projects:
+            self.projects[project_slug] = bool(self.project_exists(project_slug))
+        if not self.projects[project_slug]:
             log_message(function_name, "ERROR", f"Error for sample '{sample_id}': project '{project}' does not exist.")
             raise ValueError(f"Error for sample '{sample_id}': project '{project}' does not exist.")        
         
-        priority_tmp = sample_data.get('priority', 2)
-        
-        # priority mapping :
-        priority_mapping = {
-            "1": "low",
-            "2": "normal",
-            "3": "high",
-            "4": "highest"
-        }
-        priority = priority_mapping.get(priority_tmp, "")
+        priority = PRIORITY_MAPPING.get(sample_data.get('priority', 2), "")
         
         is_affected = sample_data.get('is_affected', '')
         is_affected_boolean = (is_affected == "Affected" or str(is_affected) == "1" or is_affected == "true"  or is_affected == "True")
-        assignee = sample_data.get('assignee', '')
         interpretation_title = sample_data.get('interpretation_title', '')
         data_title = sample_data.get('data_title', '')
-        
-        # Get the checksum of the biofile or calculate it
-        checksum = get_or_compute_checksum(sample_data, sample_id, biofiles_directory)
 
         # Create dictionnary
         interpretation = {
                 "indexCase": index_id,
                 "project": project_slug,
                 "title": interpretation_title,
-                "assignee": assignee,
+                "assignee": sample_data.get('assignee', ''),
                 "priority": priority,
             }
         
@@ -343,70 +469,139 @@ def get_interpretations(**kwargs):
             "checksum": checksum,
         })
 
-        if interpretation_title not in dict_interpretations:
-            dict_interpretations[interpretation_title] = interpretation
-            dict_interpretations[interpretation_title]["datas_tuples"] = [v_data_tuple]
-            
+        existing = self.interpretations.get(interpretation_title)
+        if existing is None:
+            interpretation["datas_tuples"] = [v_data_tuple]
+            self.interpretations[interpretation_title] = interpretation
             log_message(function_name, "DEBUG", f"New interpretation {interpretation_title}, with sample: {sample_id}")
-        else:
-            log_message(function_name, "DEBUG", f"Existing interpretation {interpretation_title}, with sample: {sample_id}")
-            # Met à jour les informations ou échoue en cas d'incohérences
-            for key, value in dict_interpretations[interpretation_title].items():
-                if key == "datas_tuples":
-                    continue
-
-                if key == "priority":
-                    if value < interpretation[key]:
-                        dict_interpretations[interpretation_title][key] = interpretation[key]
-                    continue
-
-                if not value and interpretation[key]:
-                    dict_interpretations[interpretation_title][key] = interpretation[key]
+            return
+        
+        log_message(function_name, "DEBUG", f"Existing interpretation {interpretation_title}, with sample: {sample_id}")
+        # Met à jour les informations ou échoue en cas d'incohérences
+        for key, value in existing.items():
+            if key == "datas_tuples":
+                continue
+
+            if key == "priority":
+                if value < interpretation[key]:
+                    existing[key] = interpretation[key]
+                continue
+
+            if not value and interpretation[key]:
+                existing[key] = interpretation[key]
+            
+            if value and interpretation[key] and value != interpretation[key]:
+                log_message(function_name, "ERROR", f"Conflict detected for '{key}' of '{interpretation_title}': Existing value: '{value}', New value: '{interpretation[key]}'")
+                raise ValueError(f"Conflict detected for '{key}' of '{interpretation_title}': Existing value: '{value}', New value: '{interpretation[key]}'")
+
+        existing["datas_tuples"].append(v_data_tuple)
+
+    def get_families(self):
+        """list: list of dictionnaries (one dict per family)"""
+        return list(self.families.values())
+
+    def get_biofiles(self):
+        """list: list of dictionnaries (one dict per biofile)"""
+        return list(self.biofiles.values())
+
+    def get_interpretations(self):
+        """list: list of dictionnaries (one dict per interpretation)"""
+        function_name = "get_interpretations"
+        if self._interpretations_list is not None:
+            return self._interpretations_list
+
+        for interpretation in self.interpretations.values():
+            # Vérifie qu'il y a bien un cas index
+            if not interpretation["indexCase"]:
+                error_message = str(f"No Index case specified for :", interpretation["title"])
+                log_message(function_name, "ERROR", error_message)
+                raise ValueError(f"No Index case specified for", interpretation["title"])
+
+            datas_dict = {}
+
+            # Créer les objets sample
+            for title, file_type, sample in interpretation["datas_tuples"]:
+                composite_key = (title, file_type)
+                if composite_key not in datas_dict:
+                    datas_dict[composite_key] = {
+                        "title": title,
+                        "type": file_type,
+                        "samples": [],
+                        "excludeColumns" : self.exclude_columns,
+                        "pretags": []
+                    }
+                    
+                # Ajout des pretags en fonction du projet --> enlever depuis màj diagho
+                # set_pretags_by_project(interpretation, datas_dict, composite_key)
                 
-                if value and interpretation[key] and value != interpretation[key]:
-                    log_message(function_name, "ERROR", f"Conflict detected for '{key}' of '{interpretation_title}': Existing value: '{value}', New value: '{interpretation[key]}'")
-                    raise ValueError(f"Conflict detected for '{key}' of '{interpretation_title}': Existing value: '{value}', New value: '{interpretation[key]}'")
+                datas_dict[composite_key]["samples"].append(sample)
 
-            dict_interpretations[interpretation_title]["datas_tuples"].append(v_data_tuple)
+            del interpretation["datas_tuples"]
+            interpretation["datas"] = list(datas_dict.values())
+            
+            # Supprimer 'pretags' si aucun pretag
+            for data in interpretation["datas"]:
+                if "pretags" in data:
+                    if all(not tag.get("tag") and not tag.get("filter") for tag in data["pretags"]):
+                        del data["pretags"]
+                        
+        dict_interpretations = remove_empty_keys(self.interpretations)    
+        self._interpretations_list = list(dict_interpretations.values())
+        return self._interpretations_list
+
+    def build(self):
+        """
+        Returns:
+            dict: JSON bulkCreation content {"families", "files", "interpretations"}
+        """
+        return {
+            "families": self.get_families(),
+            "files": self.get_biofiles(),
+            "interpretations": self.get_interpretations(),
+        }
 
-    for interpretation in dict_interpretations.values():
-        # Vérifie qu'il y a bien un cas index
-        if not interpretation["indexCase"]:
-            error_message = str(f"No Index case specified for :", interpretation["title"])
-            log_message(function_name, "ERROR", error_message)
-            raise ValueError(f"No Index case specified for", interpretation["title"])
 
-        datas_dict = {}
+def build_section(section, **kwargs):
+    """
+    Builds only one section of the JSON bulkCreation from 'data_init' (cf. get_families).
+    'project_exists' (optional) replaces the check of the projects on the API.
+    """
+    builder = BulkConfigurationBuilder(kwargs.get("path_biofiles", None), kwargs.get("diagho_api"), kwargs.get("settings"), sections=(section,),
+                                       project_exists=kwargs.get("project_exists"))
+    return builder.add_rows(kwargs.get("data_init"))
 
-        # Créer les objets sample
-        for title, file_type, sample in interpretation["datas_tuples"]:
-            composite_key = (title, file_type)
-            
-            # Charger les colonnes à exclure
-            exclude_columns = settings['excludeColumns']
-            if composite_key not in datas_dict:
-                datas_dict[composite_key] = {
-                    "title": title,
-                    "type": file_type,
-                    "samples": [],
-                    "excludeColumns" : exclude_columns,
-                    "pretags": []
-                }
-                
-            # Ajout des pretags en fonction du projet --> enlever depuis màj diagho
-            # set_pretags_by_project(interpretation, datas_dict, composite_key)
-            
-            datas_dict[composite_key]["samples"].append(sample)
 
-        del interpretation["datas_tuples"]
-        interpretation["datas"] = list(datas_dict.values())
-        
-        # Supprimer 'pretags' si aucun pretag
-        for data in interpretation["datas"]:
-            if "pretags" in data:
-                if all(not tag.get("tag") and not tag.get("filter") for tag in data["pretags"]):
-                    del data["pretags"]
-                    
-    dict_interpretations = remove_empty_keys(dict_interpretations)    
-    list_interpretations = [value for value in dict_interpretations.values()]
-    return list_interpretations
+def get_families(**kwargs):
+    """
+    Get informations about families.
+
+    Returns:
+        list: list of dictionnaries (one dict per family)
+    """
+    function_name = inspect.currentframe().f_code.co_name
+    log_message(function_name, "DEBUG", "Start : GET_FAMILIES.")
+    return build_section("families", **kwargs).get_families()
+    
+    
+def get_biofiles(**kwargs):
+    """
+    Get informations about biofiles and samples.
+
+    Returns:
+        list: list of dictionnaries (one dict per biofile)
+    """
+    function_name = inspect.currentframe().f_code.co_name
+    log_message(function_name, "DEBUG", "Start : GET_BIOFILES.")
+    return build_section("files", **kwargs).get_biofiles()
+
+
+def get_interpretations(**kwargs):
+    """
+    Get informations about interpretations.
+
+    Returns:
+        list: list of dictionnaries (one dict per interpretation)
+    """
+    function_name = inspect.currentframe().f_code.co_name
+    log_message(function_name, "DEBUG", "Start GET_INTERPRETATIONS.")
+    return build_section("interpretations", **kwargs).get_interpretations()
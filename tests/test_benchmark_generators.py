@@ -0,0 +1,28 @@
+from benchmarks import generators
+from tabulated2json import REQUIRED_HEADERS, BulkConfigurationBuilder
+from utils.json_schema import validate_bulk_configuration
+from utils.tabulated_validator import read_tabulated_file, validate_tsv_columns
+
+
+def test_synthetic_sheet_is_valid_and_builds_a_valid_payload(tmp_path):
+    rows = generators.sheet_rows(20, persons=3, samples_per_biofile=1, projects=2, cnv_ratio=0.5)
+    path = generators.write_sheet(str(tmp_path / "sheet.tsv"), rows)
+    assert validate_tsv_columns(read_tabulated_file(path, "utf-8"), REQUIRED_HEADERS)
+
+    settings = {"checksum_sidecars_enabled": False, "excludeColumns": [], "projects": generators.project_mapping(rows)}
+    payload = BulkConfigurationBuilder(None, None, settings, project_exists=lambda slug: slug).add_rows(generators.data_init(rows)).build()
+    assert validate_bulk_configuration(payload) == []
+    assert len(payload["families"]) == 20 and len(payload["files"]) == 60
+    assert {interpretation["project"] for interpretation in payload["interpretations"]} == {"projet-0", "projet-1"}
+
+
+def test_biofiles_have_the_requested_size(tmp_path):
+    rows = generators.sheet_rows(2, cnv_ratio=0.5, seed=1)
+    paths = generators.write_biofiles(str(tmp_path), rows, "64K")
+    assert len(paths) == 2
+    for path in paths:
+        size = (tmp_path / path).stat().st_size
+        assert 64 * 1024 <= size < 64 * 1024 + 1024
+    with open(generators.write_vcf(str(tmp_path / "trio.vcf"), 2048, samples=("S1", "S2", "S3")), encoding="utf-8") as file:
+        header = [line for line in file if line.startswith("#CHROM")][0]
+    assert header.rstrip("\n").split("\t")[-3:] == ["S1", "S2", "S3"]
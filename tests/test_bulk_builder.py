@@ -0,0 +1,67 @@
+import pytest
+
+from tabulated2json import BulkConfigurationBuilder
+
+SETTINGS = {
+    "checksum_sidecars_enabled": False,
+    "excludeColumns": ["AC"],
+    "projects": {"Projet Test": "test-project"},
+}
+CHECKSUM = "393e3d89626987b9bc568d244b94b633"
+
+
+def row(person_id, is_index="0", **values):
+    data = {
+        "filename": "F1.vcf.gz", "checksum": CHECKSUM, "file_type": "SNV", "sample": f"S-{person_id}",
+        "bam_path": "", "family_id": "F1", "person_id": person_id, "father_id": "", "mother_id": "",
+        "sex": "F", "is_affected": is_index, "last_name": "", "first_name": "", "date_of_birth": "25/12/1990",
+        "hpo": "", "interpretation_title": "F1 - exome", "is_index": is_index, "project": "Projet Test",
+        "assignee": "", "priority": "2", "person_note": "", "assembly": "GRCh38", "data_title": "",
+    }
+    data.update(values)
+    return data
+
+
+def build(rows, projects=None):
+    calls = []
+
+    def project_exists(slug):
+        calls.append(slug)
+        return slug if projects is None or slug in projects else None
+
+    builder = BulkConfigurationBuilder(None, None, SETTINGS, project_exists=project_exists)
+    return builder.add_rows(dict(enumerate(rows))).build(), calls
+
+
+def test_trio_in_single_pass():
+    rows = [row("P1", is_index="1", father_id="P2", mother_id="P3"), row("P2", sex="M"), row("P3"), row("P1", is_index="1")]
+    output, calls = build(rows)
+
+    assert output["families"] == [{
+        "identifier": "F1",
+        "persons": [
+            {"identifier": "P1", "sex": "female", "birthday": "1990-12-25", "motherIdentifier": "P3", "fatherIdentifier": "P2"},
+            {"identifier": "P2", "sex": "male", "birthday": "1990-12-25"},
+            {"identifier": "P3", "sex": "female", "birthday": "1990-12-25"},
+        ],
+    }]
+    assert [file["filename"] for file in output["files"]] == ["F1.vcf.gz"]
+    assert len(output["files"][0]["samples"]) == 4
+
+    interpretation, = output["interpretations"]
+    assert interpretation["indexCase"] == "P1"
+    assert interpretation["project"] == "test-project"
+    assert interpretation["priority"] == "normal"
+    assert interpretation["datas"][0]["excludeColumns"] == ["AC"]
+    assert calls == ["test-project"]  # existence du projet vérifiée une seule fois
+
+
+def test_unknown_project():
+    with pytest.raises(ValueError, match="does not exist"):
+        build([row("P1", is_index="1")], projects=[])
+
+
+def test_conflicting_interpretation():
+    rows = [row("P1", is_index="1"), row("P2", is_index="1")]
+    with pytest.raises(ValueError, match="Conflict detected for 'indexCase'"):
+        build(rows)
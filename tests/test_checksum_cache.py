@@ -0,0 +1,104 @@
+import hashlib
+import os
+
+import pytest
+
+from utils.cancellation import JobCancelledError
+from utils.checksum_cache import ChecksumCache, cached_md5, compute_checksums, init_checksum_cache
+from utils.file import md5
+
+
+def counting_md5(calls):
+    def compute(filepath):
+        calls.append(filepath)
+        with open(filepath, "rb") as f:
+            return hashlib.md5(f.read()).hexdigest()
+    return compute
+
+
+def test_checksum_computed_once(tmp_path):
+    biofile = tmp_path / "sample.vcf"
+    biofile.write_bytes(b"##fileformat=VCFv4.2\n")
+    calls = []
+    cache = ChecksumCache()
+
+    first = cache.get_or_compute(str(biofile), compute=counting_md5(calls))
+    second = cache.get_or_compute(str(biofile), compute=counting_md5(calls))
+
+    assert first == second == hashlib.md5(b"##fileformat=VCFv4.2\n").hexdigest()
+    assert len(calls) == 1
+
+
+def test_checksum_persisted_across_instances(tmp_path):
+    biofile = tmp_path / "sample.vcf"
+    biofile.write_bytes(b"content")
+    db_path = str(tmp_path / "cache" / "checksums.sqlite")
+    calls = []
+
+    cache = ChecksumCache(db_path)
+    cache.get_or_compute(str(biofile), compute=counting_md5(calls))
+    cache.close()
+
+    cache = ChecksumCache(db_path)
+    assert cache.get(str(biofile)) == hashlib.md5(b"content").hexdigest()
+    cache.get_or_compute(str(biofile), compute=counting_md5(calls))
+    assert len(calls) == 1
+
+
+def test_checksum_invalidated_when_file_changes(tmp_path):
+    biofile = tmp_path / "sample.vcf"
+    biofile.write_bytes(b"v1")
+    calls = []
+    cache = ChecksumCache()
+    cache.get_or_compute(str(biofile), compute=counting_md5(calls))
+
+    biofile.write_bytes(b"v2-longer")
+    stat = os.stat(biofile)
+    os.utime(biofile, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert cache.get_or_compute(str(biofile), compute=counting_md5(calls)) == hashlib.md5(b"v2-longer").hexdigest()
+    assert len(calls) == 2
+
+
+def test_missing_file_returns_the_error_of_md5(tmp_path):
+    cache = ChecksumCache()
+    missing = str(tmp_path / "missing.vcf.gz")
+    result = cache.get_or_compute(missing)
+    assert result == {"error": f"File not found: {missing}"}
+    assert cache._memory == {}
+
+
+def test_parallel_checksums_match_hashlib(tmp_path):
+    init_checksum_cache("")
+    expected = {}
+    for index, size in enumerate((0, 1, 1024 * 1024 + 3, 3 * 1024 * 1024)):
+        path = tmp_path / f"S{index}.vcf.gz"
+        content = os.urandom(size)
+        path.write_bytes(content)
+        expected[str(path)] = hashlib.md5(content).hexdigest()
+
+    missing = str(tmp_path / "missing.vcf.gz")
+    checksums = compute_checksums(list(expected) + [missing, next(iter(expected))], max_workers=3)
+    assert checksums == expected
+    assert cached_md5(missing) == {"error": f"File not found: {missing}"}
+
+
+def test_md5_across_chunk_boundaries(tmp_path):
+    path = tmp_path / "S1.vcf.gz"
+    content = os.urandom(1000)
+    path.write_bytes(content)
+    assert md5(str(path), chunk_size=7) == hashlib.md5(content).hexdigest()
+
+
+def test_key_lock_released_when_compute_raises(tmp_path):
+    path = tmp_path / "S1.vcf.gz"
+    path.write_bytes(b"biofile")
+    cache = ChecksumCache()
+
+    def cancelled(filepath):
+        raise JobCancelledError("Another biofile failed.")
+
+    with pytest.raises(JobCancelledError):
+        cache.get_or_compute(str(path), compute=cancelled)
+    assert cache._key_locks == {}
+    assert cache.get_or_compute(str(path)) == hashlib.md5(b"biofile").hexdigest()
@@ -0,0 +1,30 @@
+from utils.checksum_manifest import load_checksum_manifests, parse_md5_file, select_sample
+
+MD5_A = "0cc175b9c0f1b6a831c399e269772661"
+MD5_B = "92eb5ffee6ae2fec3ad71c777531578f"
+
+
+def test_parse_sidecar_without_filename(tmp_path):
+    sidecar = tmp_path / "sample.vcf.gz.md5"
+    sidecar.write_text(f"{MD5_A.upper()}\n")
+    assert parse_md5_file(str(sidecar)) == {"sample.vcf.gz": MD5_A}
+
+
+def test_parse_md5sum_and_bsd_formats(tmp_path):
+    manifest = tmp_path / "md5sum.txt"
+    manifest.write_text(f"{MD5_A}  ./run1/a.vcf.gz\n{MD5_B} *b.bed\nMD5 (c.vcf) = {MD5_A}\n\ninvalid line\n")
+    assert parse_md5_file(str(manifest)) == {"a.vcf.gz": MD5_A, "b.bed": MD5_B, "c.vcf": MD5_A}
+
+
+def test_sidecar_overrides_manifest(tmp_path):
+    (tmp_path / "md5sum.txt").write_text(f"{MD5_A}  a.vcf.gz\n{MD5_A}  b.vcf.gz\n")
+    (tmp_path / "a.vcf.gz.md5").write_text(f"{MD5_B}  a.vcf.gz\n")
+    (tmp_path / "a.vcf.gz").write_bytes(b"")
+    assert load_checksum_manifests(str(tmp_path)) == {"a.vcf.gz": MD5_B, "b.vcf.gz": MD5_A}
+
+
+def test_select_sample():
+    filenames = [f"{i}.vcf" for i in range(20)]
+    assert len(select_sample(filenames, 0.1, seed=1)) == 2
+    assert len(select_sample(filenames[:3], 0.1, seed=1)) == 1
+    assert select_sample(filenames, 0) == []
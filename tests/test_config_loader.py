@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from utils.config_loader import ConfigStore, freeze, redact_config, validate_config
+
+CONFIG = """
+input_biofiles: "biofiles"
+backup_biofiles: "backup/biofiles"
+backup_data: "backup/data"
+check_biofile: {max_retries: 3, delay: 1}
+check_loading: {max_retries: 3, delay: 1}
+settings: {max_workers: 2}
+emails: {recipients: "a@example.fr"}
+diagho_api: {url: "http://localhost/api/v1/", username: "user", password: "secret"}
+accessions: {GRCh38: 2}
+interpretations: {excludeColumns: ["AC"], projects: {"Projet": "projet-slug"}}
+"""
+
+
+def write_config(path, content, mtime_ns):
+    path.write_text(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_config_is_read_only():
+    config = freeze({"settings": {"max_workers": 2}, "columns": ["AC"]})
+    with pytest.raises(TypeError):
+        config["settings"]["max_workers"] = 4
+    assert config["columns"] == ("AC",)
+
+
+def test_redact_config():
+    redacted = redact_config(freeze({"diagho_api": {"username": "user", "password": "secret"}}))
+    assert redacted == {"diagho_api": {"username": "user", "password": "***"}}
+
+
+def test_validate_config_reports_all_errors():
+    with pytest.raises(ValueError) as e:
+        validate_config({"settings": {"max_workers": 0, "failure_policy": "never"}})
+    message = str(e.value)
+    assert "missing key 'input_biofiles'" in message
+    assert "'settings.max_workers'" in message
+    assert "'settings.failure_policy'" in message
+
+
+def test_reload_only_when_modified(tmp_path):
+    path = tmp_path / "config.yaml"
+    write_config(path, CONFIG, 1_000_000_000)
+    store = ConfigStore(str(path))
+
+    config, settings = store.get()
+    assert store.get()[0] is config
+    assert settings["max_workers"] == 2
+
+    write_config(path, CONFIG.replace("max_workers: 2", "max_workers: 4"), 2_000_000_000)
+    assert store.get()[1]["max_workers"] == 4
+
+
+def test_invalid_reload_keeps_previous_config(tmp_path):
+    path = tmp_path / "config.yaml"
+    write_config(path, CONFIG, 1_000_000_000)
+    store = ConfigStore(str(path))
+    config, _ = store.get()
+
+    write_config(path, CONFIG.replace("max_workers: 2", "max_workers: -1"), 2_000_000_000)
+    assert store.get()[0] is config
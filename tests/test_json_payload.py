@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from utils.json_payload import dumps, write_json_file, write_json_file_async
+from utils.json_validator import validate_json_input
+
+PAYLOAD = {
+    "families": [{"identifier": "F1", "persons": [{"identifier": "P1", "firstName": "Éloïse"}]}],
+    "files": [{"filename": "F1.vcf.gz", "checksum": "a" * 32, "assembly": "GRCh38", "samples": [{"name": "S1", "person": "P1"}]}],
+    "interpretations": [{"title": "F1 - exome", "indexCase": "P1", "project": "projet", "datas": [
+        {"title": "SNV", "type": "SNV", "samples": [{"name": "S1", "isAffected": True, "checksum": "a" * 32}], "excludeColumns": ("AC", "AF")}
+    ]}],
+}
+
+
+def test_dumps_is_compact_utf8_json():
+    body = dumps(PAYLOAD)
+    assert isinstance(body, bytes)
+    assert json.loads(body) == json.loads(json.dumps(PAYLOAD))
+    assert "Éloïse".encode("utf-8") in body
+
+
+def test_audit_file_is_pretty_printed(tmp_path):
+    output_file = tmp_path / "sheet.json"
+    assert write_json_file_async(PAYLOAD, str(output_file)).result(timeout=10) == str(output_file)
+    assert output_file.read_text(encoding="utf-8") == json.dumps(PAYLOAD, ensure_ascii=False, indent=4)
+    assert not (tmp_path / "sheet.json.tmp").exists()
+
+
+def test_validate_payload_in_memory(tmp_path):
+    assert validate_json_input(PAYLOAD) is PAYLOAD
+    with pytest.raises(ValueError, match="families"):
+        validate_json_input({"files": [], "interpretations": []})
+
+    json_file = tmp_path / "sheet.json"
+    write_json_file(PAYLOAD, str(json_file))
+    assert validate_json_input(str(json_file))["families"] == PAYLOAD["families"]
@@ -0,0 +1,77 @@
+import copy
+
+import pytest
+
+from utils.json_schema import BULK_CONFIGURATION_SCHEMA, SchemaValidationError, compile_schema, validate_bulk_configuration
+from utils.json_validator import validate_json_input
+
+CHECKSUM = "0123456789abcdef0123456789abcdef"
+PAYLOAD = {
+    "families": [{"identifier": "F1", "persons": [
+        {"identifier": "P1", "sex": "female", "birthday": "1990-12-25", "fatherIdentifier": "P2"},
+        {"identifier": "P2", "sex": "male"},
+    ]}],
+    "files": [{"filename": "F1.vcf.gz", "checksum": CHECKSUM, "assembly": "GRCh38",
+               "samples": [{"name": "S1", "person": "P1"}, {"name": "S2", "person": "P2", "bamPath": "/bam/S2.bam"}]}],
+    "interpretations": [{"title": "F1 - exome", "indexCase": "P1", "project": "projet", "priority": "normal", "datas": [
+        {"title": "SNV", "type": "SNV", "excludeColumns": ("AC", "AF"),
+         "samples": [{"name": "S1", "isAffected": True, "checksum": CHECKSUM}, {"name": "S2", "isAffected": False, "checksum": CHECKSUM}]},
+    ]}],
+}
+
+
+def test_valid_payload():
+    assert validate_bulk_configuration(PAYLOAD) == []
+
+
+def test_every_error_is_reported_with_its_path():
+    data = copy.deepcopy(PAYLOAD)
+    del data["families"][0]["persons"][1]["identifier"]
+    data["files"][0]["checksum"] = "abc"
+    data["interpretations"][0]["priority"] = "urgent"
+    data["interpretations"][0]["datas"][0]["samples"][1]["isAffected"] = "0"
+
+    errors = dict(validate_bulk_configuration(data))
+
+    assert set(errors) == {
+        "families[0].persons[1]",
+        "files[0].checksum",
+        "interpretations[0].priority",
+        "interpretations[0].datas[0].samples[1].isAffected",
+    }
+    assert errors["families[0].persons[1]"] == "missing required key 'identifier'"
+    assert errors["interpretations[0].datas[0].samples[1].isAffected"] == "must be of type boolean, not str"
+
+
+def test_wrong_type_stops_the_checks_of_the_value():
+    assert validate_bulk_configuration({"families": {}, "files": [], "interpretations": []}) == [
+        ("families", "must be of type array, not dict")
+    ]
+    assert validate_bulk_configuration([]) == [("<root>", "must be of type object, not list")]
+
+
+def test_integer_is_not_boolean():
+    validator = compile_schema({"type": "object", "properties": {"n": {"type": "integer"}, "b": {"type": "boolean"}}})
+
+    assert validator({"n": 1, "b": False}) == []
+    assert [path for path, _ in validator({"n": True, "b": 1})] == ["n", "b"]
+
+
+def test_validate_json_input_raises_all_errors():
+    data = copy.deepcopy(PAYLOAD)
+    del data["interpretations"][0]["project"]
+    data["files"][0]["samples"] = []
+
+    with pytest.raises(SchemaValidationError) as error:
+        validate_json_input(data, "sheet.json")
+
+    assert len(error.value.errors) == 2
+    assert "interpretations[0]: missing required key 'project'" in str(error.value)
+    assert isinstance(error.value, ValueError)
+
+
+def test_generated_validator():
+    validator = compile_schema(BULK_CONFIGURATION_SCHEMA)
+
+    assert "def validator" in validator.source
+    assert validator(PAYLOAD) == []
@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(code, tmp_path):
+    """Runs 'code' in a fresh interpreter, from a directory without configuration file."""
+    env = dict(os.environ, PYTHONPATH=ROOT, CONFIG_PATH=str(tmp_path / "missing.yaml"))
+    return subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, capture_output=True, text=True)
+
+
+def test_import_without_config_nor_heavy_modules(tmp_path):
+    code = (
+        "import logging, sys\n"
+        "import uploader\n"
+        "print([m for m in ('pandas', 'numpy') if m in sys.modules], logging.getLogger().handlers)\n"
+    )
+    result = run_python(code, tmp_path)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[] []"
+    assert not os.path.exists(tmp_path / "logs")
+
+
+def test_main_help_without_config(tmp_path):
+    result = run_python("import sys; sys.argv = ['main.py', '--help']; import main; main.main()", tmp_path)
+    assert result.returncode == 0, result.stderr
+    assert "start_file_watcher" in result.stdout
@@ -0,0 +1,85 @@
+import concurrent.futures
+import json
+import logging
+
+import pytest
+
+from utils.cancellation import JobCancelledError
+from utils.log_context import JsonFormatter, ContextFilter, biofile_context, job_context, stage, submit_in_context
+from utils.log_report import build_report, read_json_logs
+from utils.logger import configure_logging, log_biofile_message, log_message, stop_logging
+
+
+@pytest.fixture
+def json_logs(tmp_path):
+    """Queued logging pipeline writing JSON lines in 'tmp_path', removed after the test."""
+    root = logging.getLogger()
+    previous = (root.handlers[:], root.level)
+    log_file = configure_logging({"logging": {"log_level": "INFO", "log_directory": str(tmp_path), "log_console": False, "log_format": "json"}})
+    yield log_file
+    stop_logging()
+    root.handlers[:] = previous[0]
+    root.setLevel(previous[1])
+
+
+def read(log_file):
+    stop_logging()
+    return list(read_json_logs([log_file]))
+
+
+def test_records_carry_the_job_context(json_logs):
+    with job_context("sheet.tsv") as job_id:
+        log_message("test", "INFO", "start")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            def task(biofile):
+                with biofile_context(biofile, "a" * 32):
+                    log_biofile_message("test", "INFO", biofile, "uploaded")
+            for future in [submit_in_context(executor, task, name) for name in ("S1.vcf", "S2.vcf")]:
+                future.result()
+    log_message("test", "INFO", "outside")
+
+    records = read(json_logs)
+    assert [record.get("job_id") for record in records] == [job_id, job_id, job_id, None]
+    assert {record.get("biofile") for record in records[1:3]} == {"S1.vcf", "S2.vcf"}
+    assert records[1]["checksum"] == "a" * 32 and records[1]["sheet"] == "sheet.tsv"
+
+
+def test_stage_logs_its_duration_and_status(json_logs):
+    with job_context("sheet.tsv"):
+        with stage("upload", bytes=2048):
+            pass
+        with pytest.raises(ValueError):
+            with stage("post"):
+                raise ValueError("HTTP 500")
+        with pytest.raises(JobCancelledError):
+            with stage("load"):
+                raise JobCancelledError("Another biofile failed.")
+
+    upload, post, load = [record for record in read(json_logs) if record.get("event") == "stage"]
+    assert upload["stage"] == "upload" and upload["status"] == "ok" and upload["bytes"] == 2048
+    assert isinstance(upload["elapsed_ms"], float)
+    assert post["stage"] == "post" and post["status"] == "error"
+    assert load["stage"] == "load" and load["status"] == "cancelled"
+
+
+def test_report_aggregates_stages():
+    records = [
+        {"time": "2026-10-19T10:00:00.000", "job_id": "j1", "sheet": "a.tsv", "event": "stage", "stage": "upload", "status": "ok", "elapsed_ms": 1000.0, "bytes": 10 * 1024 * 1024, "biofile": "S1.vcf"},
+        {"time": "2026-10-19T10:00:30.000", "job_id": "j1", "sheet": "a.tsv", "event": "stage", "stage": "load", "status": "ok", "elapsed_ms": 3000.0, "loaded": True, "biofile": "S1.vcf"},
+        {"time": "2026-10-19T10:01:00.000", "job_id": "j1", "sheet": "a.tsv", "event": "stage", "stage": "post", "status": "error", "elapsed_ms": 200.0},
+    ]
+
+    report = build_report(records)
+
+    assert list(report["stages"]) == ["upload", "load", "post"]
+    assert report["stages"]["post"]["errors"] == 1
+    assert report["jobs"][0]["elapsed_s"] == 60.0 and report["jobs"][0]["biofiles"] == 1
+    assert report["throughput"]["upload_mb_per_s"] == 10.0
+    assert report["throughput"]["biofiles_per_hour"] == 60.0
+
+
+def test_json_formatter_without_context():
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "value: %s", ("x",), None)
+    ContextFilter().filter(record)
+
+    assert json.loads(JsonFormatter().format(record))["message"] == "value: x"
@@ -0,0 +1,51 @@
+import logging
+
+import pytest
+
+from utils import logger as logger_module
+from utils.logger import configure_logging, get_logger, log_biofile_message, log_message, stop_logging
+
+
+@pytest.fixture
+def queued_logs(tmp_path):
+    """Queued logging pipeline writing in 'tmp_path', removed after the test."""
+    root = logging.getLogger()
+    previous = (root.handlers[:], root.level)
+    log_file = configure_logging({"logging": {"log_level": "INFO", "log_directory": str(tmp_path), "log_console": False, "log_format": "text"}})
+    yield log_file
+    stop_logging()
+    root.handlers[:] = previous[0]
+    root.setLevel(previous[1])
+
+
+def test_records_are_written_by_the_listener(queued_logs):
+    log_message("test_logger", "INFO", "processed %d biofiles", 3)
+    log_biofile_message("test_logger", "WARNING", "S1.vcf.gz", "100% uploaded")
+    log_message("test_logger", "DEBUG", "not written")
+    stop_logging()
+
+    with open(queued_logs, encoding="utf-8") as file:
+        lines = file.read().splitlines()
+    assert lines[0].endswith("[INFO][test_logger] processed 3 biofiles")
+    assert lines[1].endswith("[WARNING][test_logger] S1.vcf.gz - 100% uploaded")
+    assert len(lines) == 2
+
+
+def test_disabled_level_is_not_formatted(queued_logs):
+    class Expensive:
+        def __str__(self):
+            raise AssertionError("formatted")
+
+    log_message("test_logger", "DEBUG", "value: %s", Expensive())
+    log_biofile_message("test_logger", "DEBUG", "S1.vcf.gz", "value: %s", Expensive())
+
+
+def test_loggers_are_cached():
+    assert get_logger("test_logger_cache") is get_logger("test_logger_cache")
+    assert "test_logger_cache" in logger_module._loggers
+
+
+def test_unknown_level_is_logged_as_debug(caplog):
+    with caplog.at_level(logging.DEBUG):
+        log_message("test_logger", "trace", "message")
+    assert caplog.records[-1].levelno == logging.DEBUG
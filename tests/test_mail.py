@@ -0,0 +1,117 @@
+import socketserver
+import threading
+
+import pytest
+
+from utils.mail import MailDispatcher
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Local SMTP server keeping the messages received (and closing the connection after 'drop_after' messages)."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, drop_after=None):
+        super().__init__(("127.0.0.1", 0), SMTPHandler)
+        self.messages = []
+        self.connections = 0
+        self.drop_after = drop_after
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.server.connections += 1
+        received = 0
+        self.reply("220 sink ready")
+        while True:
+            line = self.rfile.readline().decode().rstrip("\r\n")
+            if not line:
+                return
+            command = line[:4].upper()
+            if command in ("HELO", "EHLO"):
+                self.reply("250 sink")
+            elif command in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while (data_line := self.rfile.readline().decode()) not in (".\r\n", ""):
+                    data.append(data_line)
+                self.server.messages.append("".join(data))
+                received += 1
+                self.reply("250 OK")
+                if self.server.drop_after and received >= self.server.drop_after:
+                    return  # connexion coupée par le serveur
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+@pytest.fixture
+def sink():
+    servers = []
+
+    def start(**kwargs):
+        server = SMTPSink(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def smtp_settings(server):
+    return {"server": "127.0.0.1", "port": server.server_address[1], "use_tls": False, "from_email_format": "uploader-{hostname}@example.fr"}
+
+
+def test_emails_share_one_connection(sink):
+    server = sink()
+    dispatcher = MailDispatcher(smtp=smtp_settings(server), retry_delay=0)
+    for index in range(5):
+        assert dispatcher.enqueue("a@example.fr, b@example.fr", "[INFO] Diagho-Uploader", f"Biofile {index} loaded.")
+    assert dispatcher.flush(timeout=10)
+    dispatcher.close()
+
+    assert dispatcher.sent == 5 and server.connections == 1
+    assert "Subject: [INFO] Diagho-Uploader" in server.messages[0]
+    assert "Biofile 4 loaded." in server.messages[-1]
+
+
+def test_reconnects_when_the_server_drops_the_connection(sink):
+    server = sink(drop_after=1)
+    dispatcher = MailDispatcher(smtp=smtp_settings(server), retry_delay=0)
+    for index in range(3):
+        dispatcher.enqueue("a@example.fr", "[ALERT] Diagho-Uploader", f"Failure {index}")
+        assert dispatcher.flush(timeout=10)
+    dispatcher.close()
+
+    assert dispatcher.sent == 3 and dispatcher.failed == 0
+    assert len(server.messages) == 3 and server.connections == 3
+
+
+def test_enqueue_does_not_block_when_the_server_is_unreachable(sink):
+    server = sink()
+    port = server.server_address[1]
+    server.shutdown()
+    server.server_close()
+    dispatcher = MailDispatcher(smtp={**smtp_settings(server), "port": port}, queue_size=2, max_retries=1, retry_delay=0.2, timeout=1)
+
+    results = [dispatcher.enqueue("a@example.fr", "[ALERT] Diagho-Uploader", f"Failure {index}") for index in range(10)]
+    assert results.count(True) >= 2 and dispatcher.dropped == results.count(False) > 0
+    assert dispatcher.flush(timeout=10)
+    assert dispatcher.sent == 0 and dispatcher.failed == results.count(True)
+    dispatcher.close()
+
+
+def test_invalid_recipients_are_rejected():
+    dispatcher = MailDispatcher(smtp={})
+    assert not dispatcher.enqueue("not-an-address", "subject", "content")
+    assert dispatcher._thread is None
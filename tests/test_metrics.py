@@ -0,0 +1,55 @@
+import urllib.request
+
+from utils.metrics import Counter, Gauge, Histogram, Registry, start_metrics_server
+
+
+def test_render_counter_and_gauge():
+    registry = Registry()
+    uploaded = registry.register(Counter("uploaded_bytes_total", "Bytes uploaded."))
+    jobs = registry.register(Gauge("jobs", "Jobs by state.", ["state"]))
+    uploaded.inc(1024)
+    jobs.labels(state="running").inc()
+    jobs.labels(state="pending").set(3)
+    jobs.labels(state="pending").dec()
+
+    lines = registry.render().splitlines()
+    assert "# TYPE uploaded_bytes_total counter" in lines
+    assert "uploaded_bytes_total 1024" in lines
+    assert 'jobs{state="pending"} 2' in lines
+    assert 'jobs{state="running"} 1' in lines
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    duration = registry.register(Histogram("duration_seconds", "Durations.", ["stage"], buckets=(0.1, 1, 10)))
+    for value in (0.05, 0.5, 0.7, 5, 50):
+        duration.labels(stage="upload").observe(value)
+
+    lines = registry.render().splitlines()
+    assert 'duration_seconds_bucket{stage="upload",le="0.1"} 1' in lines
+    assert 'duration_seconds_bucket{stage="upload",le="1"} 3' in lines
+    assert 'duration_seconds_bucket{stage="upload",le="10"} 4' in lines
+    assert 'duration_seconds_bucket{stage="upload",le="+Inf"} 5' in lines
+    assert 'duration_seconds_count{stage="upload"} 5' in lines
+    assert 'duration_seconds_sum{stage="upload"} 56.25' in lines
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    errors = registry.register(Counter("errors_total", "Errors.", ["message"]))
+    errors.labels(message='bad "sheet"\n').inc()
+    assert 'errors_total{message="bad \\"sheet\\"\\n"} 1' in registry.render()
+
+
+def test_server_serves_the_metrics():
+    server = start_metrics_server(host="127.0.0.1", port=0)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            body = response.read().decode("utf-8")
+            assert response.headers["Content-Type"].startswith("text/plain")
+        assert "# TYPE diagho_stage_duration_seconds histogram" in body
+        assert "diagho_uploaded_bytes_total" in body
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,142 @@
+import json
+
+import pytest
+import requests
+
+import utils.api as api
+from utils.api import api_get_bulk
+from utils.preflight import PreflightCache, find_conflicts, run_preflight
+
+
+def sheet():
+    return {
+        "families": [
+            {"identifier": "F1", "persons": [{"identifier": "P1"}, {"identifier": "P2"}]},
+            {"identifier": "F2", "persons": [{"identifier": "P3"}]},
+        ],
+        "files": [],
+        "interpretations": [{"title": "F1 - exome", "indexCase": "P1"}],
+    }
+
+
+class FakeDiagho:
+    """Bulk lookups answered from in-memory records, calls recorded."""
+
+    def __init__(self, records, failing=()):
+        self.records = records
+        self.failing = failing
+        self.calls = []
+
+    def __call__(self, endpoint, values):
+        self.calls.append((endpoint, tuple(values)))
+        if endpoint in self.failing:
+            return {"error": "404 Client Error: Not Found"}
+        return [record for record in self.records.get(endpoint, []) if str(record.get("identifier", record.get("title"))) in values]
+
+
+def test_no_conflict_when_sheet_matches_diagho():
+    diagho = FakeDiagho({"get_persons": [{"identifier": "P1", "family": {"identifier": "F1"}}]})
+
+    assert run_preflight(sheet(), {}, fetch=diagho) == []
+    assert len(diagho.calls) == 3  # une requête groupée par endpoint
+
+
+def test_person_already_in_another_family():
+    diagho = FakeDiagho({"get_persons": [{"identifier": "P3", "family": "F9"}]})
+
+    conflicts = run_preflight(sheet(), {}, fetch=diagho)
+
+    assert conflicts == ["Person 'P3' of family 'F2' already exists in Diagho in another family: 'F9'."]
+
+
+def test_person_in_two_families_of_the_sheet():
+    data = sheet()
+    data["families"][1]["persons"].append({"identifier": "P1"})
+
+    assert find_conflicts(data) == ["Person 'P1' is in two families of the sheet: 'F1' and 'F2'."]
+
+
+def test_interpretation_of_another_index_case():
+    diagho = FakeDiagho({"get_interpretations": [{"title": "F1 - exome", "indexCase": {"identifier": "P2"}}]})
+
+    conflicts = run_preflight(sheet(), {}, fetch=diagho)
+
+    assert len(conflicts) == 1 and "'F1 - exome'" in conflicts[0]
+
+
+def test_failed_lookup_is_skipped():
+    diagho = FakeDiagho({"get_families": [{"identifier": "F1", "persons": [{"identifier": "P1"}, {"identifier": "P3"}]}]}, failing={"get_persons"})
+
+    conflicts = run_preflight(sheet(), {}, fetch=diagho)
+
+    # Personnes non vérifiables, mais la famille F1 de Diagho contient P3
+    assert conflicts == ["Person 'P3' of family 'F2' already exists in Diagho in another family: 'F1'."]
+
+
+def test_lookups_are_cached_for_the_run():
+    diagho = FakeDiagho({"get_persons": [{"identifier": "P1", "family": "F1"}]})
+    cache = PreflightCache()
+
+    run_preflight(sheet(), {}, cache=cache, fetch=diagho)
+    run_preflight(sheet(), {}, cache=cache, fetch=diagho)
+
+    assert len(diagho.calls) == 3
+
+
+def test_records_not_requested_are_dropped():
+    cache = PreflightCache()
+    extra = [{"identifier": "P1", "family": "F1"}, {"identifier": "P9", "family": "F9"}]
+
+    found = cache.lookup("get_persons", ["P1", "P2"], lambda endpoint, values: extra)
+
+    assert found == {"P1": extra[0]}
+    assert cache.lookup("get_persons", ["P9"], lambda endpoint, values: []) == {}
+
+
+@pytest.fixture
+def diagho_pages(monkeypatch):
+    """Pages answered by the bulk GET: {url: content}, URLs requested recorded."""
+    pages = {}
+    requested = []
+
+    def get(session, url, params=None, **kwargs):
+        requested.append(url)
+        response = requests.Response()
+        response.status_code, response.url, response._content = 200, url, json.dumps(pages[url]).encode()
+        return response
+
+    monkeypatch.setattr(api, "get_access_token", lambda: "token")
+    monkeypatch.setattr(api, "ssl_verify", lambda: True)
+    monkeypatch.setattr(requests.Session, "get", get)
+    return pages, requested
+
+
+def bulk_get(**kwargs):
+    return api_get_bulk(diagho_api={"get_persons": "http://diagho/api/v1/persons"}, endpoint="get_persons", field="identifier", **kwargs)
+
+
+def test_bulk_get_follows_the_pages(diagho_pages):
+    pages, requested = diagho_pages
+    pages["http://diagho/api/v1/persons/"] = {"results": [{"identifier": "P1"}], "next": "http://diagho/api/v1/persons/?page=2"}
+    pages["http://diagho/api/v1/persons/?page=2"] = {"results": [{"identifier": "P2"}], "next": None}
+
+    assert bulk_get(values=["P1", "P2", "P3"]) == [{"identifier": "P1"}, {"identifier": "P2"}]
+    assert len(requested) == 2
+
+
+def test_bulk_get_aborted_if_the_filter_is_not_applied(diagho_pages):
+    pages, requested = diagho_pages
+    pages["http://diagho/api/v1/persons/"] = {"results": [{"identifier": "P1"}, {"identifier": "P7"}], "next": "http://diagho/api/v1/persons/?page=2"}
+
+    assert bulk_get(values=["P1"]) == {"error": "Filter 'identifier__in' not applied"}
+    assert len(requested) == 1
+
+
+def test_bulk_get_pages_are_capped(diagho_pages):
+    pages, requested = diagho_pages
+    for page in range(1, 5):
+        pages[f"http://diagho/api/v1/persons/?page={page}" if page > 1 else "http://diagho/api/v1/persons/"] = {
+            "results": [{"identifier": "P1"}], "next": f"http://diagho/api/v1/persons/?page={page + 1}"}
+
+    assert "error" in bulk_get(values=["P1"], max_pages=3)
+    assert len(requested) == 3
@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+from utils.profiling import PROFILING, ProfileSession, check_profiling_window, configure_profiling, profile_job
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(100))
+    return total
+
+
+@pytest.fixture
+def profiling(tmp_path):
+    def configure(mode=None, **section):
+        return configure_profiling({"logging": {"log_directory": str(tmp_path)}, "profiling": section}, mode)
+    yield configure
+    check_profiling_window(force=True)
+    PROFILING.enabled = False
+    PROFILING.jobs_profiled = 0
+
+
+def test_sampling_profiler_sees_the_other_threads(tmp_path):
+    session = ProfileSession("sampling", interval=0.002)
+    session.start()
+    worker = threading.Thread(target=busy, args=(0.2,), name="biofile-worker")
+    worker.start()
+    worker.join()
+    session.stop()
+
+    files = session.write(str(tmp_path), "job")
+    assert [file.rsplit("/", 1)[-1] for file in files] == ["job.collapsed", "job.profile.txt"]
+    collapsed = (tmp_path / "job.collapsed").read_text()
+    assert any(line.startswith("biofile-worker;") and "busy (test_profiling.py" in line for line in collapsed.splitlines())
+
+
+def test_job_scope_profiles_max_jobs(profiling, tmp_path):
+    profiling("cprofile", max_jobs=1, tracemalloc=True, tracemalloc_frames=5)
+    with profile_job("sheet_1") as session:
+        assert session is not None
+        data = [bytearray(1024) for _ in range(200)]
+        busy(0.01)
+    with profile_job("sheet_2") as session:
+        assert session is None
+
+    profiles = tmp_path / "profiles"
+    assert sorted(path.name for path in profiles.iterdir()) == ["sheet_1.memory.txt", "sheet_1.prof", "sheet_1.profile.txt"]
+    assert "busy" in (profiles / "sheet_1.profile.txt").read_text()
+    assert "test_profiling.py" in (profiles / "sheet_1.memory.txt").read_text()
+    assert len(data) == 200
+
+
+def test_window_scope_is_closed_by_the_watcher(profiling, tmp_path):
+    profiling(None, enabled=True, scope="window", duration=0.05, tracemalloc=False)
+    with profile_job("sheet_1") as session:
+        assert session is None  # scope "window" : pas de rapport par job
+    assert not check_profiling_window()
+    time.sleep(0.06)
+    assert check_profiling_window()
+    assert len(list((tmp_path / "profiles").glob("window_*.profile.txt"))) == 1
+
+
+def test_disabled_and_invalid_configuration(profiling):
+    profiling(None)
+    with profile_job("sheet_1") as session:
+        assert session is None
+    with pytest.raises(ValueError):
+        profiling(None, enabled=True, scope="forever")
@@ -0,0 +1,140 @@
+import pytest
+import requests
+import urllib3
+
+import utils.api as api
+import utils.sharding as sharding
+from utils.api import request_was_sent
+from utils.sharding import split_payload
+from utils.sheet_state import compute_delta, posted_fingerprints
+
+
+def family(identifier, *persons):
+    return {"identifier": identifier, "persons": [{"identifier": person} for person in persons]}
+
+
+def biofile(filename, *samples):
+    return {"filename": filename, "checksum": f"md5-{filename}", "assembly": "GRCh38",
+            "samples": [{"name": sample, "person": person} for sample, person in samples]}
+
+
+def interpretation(title, index_case, *samples):
+    return {"title": title, "indexCase": index_case, "datas": [{"samples": [{"name": sample} for sample in samples]}]}
+
+
+def payload():
+    return {
+        "families": [family("F1", "P1", "P2"), family("F2", "P3"), family("F3", "P4")],
+        "files": [biofile("a.vcf", ("S1", "P1"), ("S2", "P2")), biofile("b.vcf", ("S3", "P3")), biofile("c.vcf", ("S4", "P4"))],
+        "interpretations": [interpretation("I1", "P1", "S1"), interpretation("I2", "P3", "S3"), interpretation("I3", "P4", "S4")],
+    }
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.text = ""
+
+    def json(self):
+        return {}
+
+
+def test_one_shard_per_family_with_its_files_and_interpretations():
+    shards = split_payload(payload(), families_per_shard=1)
+
+    assert [[f["identifier"] for f in shard["families"]] for shard in shards] == [["F1"], ["F2"], ["F3"]]
+    assert [f["filename"] for f in shards[0]["files"]] == ["a.vcf"]
+    assert [i["title"] for i in shards[2]["interpretations"]] == ["I3"]
+
+
+def test_families_sharing_a_biofile_stay_in_the_same_shard():
+    data = payload()
+    # Un VCF multi-samples couvre F2 et F3
+    data["files"].append(biofile("joint.vcf", ("S3", "P3"), ("S4", "P4")))
+
+    shards = split_payload(data, families_per_shard=1)
+
+    assert [[f["identifier"] for f in shard["families"]] for shard in shards] == [["F1"], ["F2", "F3"]]
+    assert sum(len(shard["files"]) for shard in shards) == 4
+
+
+def test_shards_are_packed_up_to_families_per_shard():
+    shards = split_payload(payload(), families_per_shard=2)
+
+    assert [len(shard["families"]) for shard in shards] == [2, 1]
+    assert sum(len(shard["interpretations"]) for shard in shards) == 3
+
+
+def test_failed_shard_is_retried_then_reported(monkeypatch):
+    calls = []
+    responses = {"F1": [FakeResponse(201)], "F2": [{"error": "Connection refused", "status_code": None, "request_sent": False}, FakeResponse(201)], "F3": [FakeResponse(400)]}
+
+    def fake_post(**kwargs):
+        identifier = kwargs["payload"]["families"][0]["identifier"]
+        calls.append(identifier)
+        return responses[identifier].pop(0)
+
+    monkeypatch.setattr(sharding, "api_post_config", fake_post)
+    monkeypatch.setattr(sharding.time, "sleep", lambda delay: None)
+    settings = {"sharding_families_per_shard": 1, "sharding_max_workers": 2, "sharding_max_retries": 3, "sharding_retry_delay": 0}
+
+    shards, results = sharding.post_config_shards(payload(), settings, json_file="sheet.json")
+
+    assert [(r["status"], r["attempts"]) for r in results] == [("ok", 1), ("ok", 2), ("failed", 1)]
+    assert calls.count("F3") == 1  # 4xx : pas de nouvel essai
+    assert "shard 3 (families: F3)" in sharding.format_shard_report("sheet.json", results)
+
+
+def test_only_unprocessed_posts_are_retried():
+    assert not sharding.is_retryable({"error": "400 Client Error", "status_code": 400, "request_sent": True})
+    assert not sharding.is_retryable({"error": "500 Server Error", "status_code": 500, "request_sent": True})
+    assert sharding.is_retryable({"error": "502 Server Error", "status_code": 502, "request_sent": True})
+    assert sharding.is_retryable(FakeResponse(503))
+    assert sharding.is_retryable({"error": "Connection refused", "status_code": None, "request_sent": False})
+    # Requête envoyée sans réponse : la configuration a pu être créée (doublon)
+    assert not sharding.is_retryable({"error": "Read timed out.", "status_code": None, "request_sent": True})
+
+
+def test_request_was_sent():
+    refused = urllib3.exceptions.NewConnectionError(None, "Connection refused")
+    assert not request_was_sent(requests.exceptions.ConnectionError(urllib3.exceptions.MaxRetryError(None, "/", refused)))
+    assert not request_was_sent(requests.exceptions.ConnectTimeout())
+    assert request_was_sent(requests.exceptions.ReadTimeout())
+    assert request_was_sent(requests.exceptions.ConnectionError(urllib3.exceptions.ProtocolError("Connection aborted.")))
+
+
+@pytest.fixture
+def post_config(monkeypatch):
+    monkeypatch.setattr(api, "get_access_token", lambda: "token")
+    monkeypatch.setattr(api, "ssl_verify", lambda: True)
+    # Port 9 (discard) : connexion refusée
+    return lambda: api.api_post_config(diagho_api={"post_config": "http://127.0.0.1:9/api/v1/configurations/"}, payload={"families": []})
+
+
+def test_api_post_config_returns_the_status_code(monkeypatch, post_config):
+    def post(url, **kwargs):
+        response = requests.Response()
+        response.status_code, response.url, response._content = 400, url, b'{"detail": "invalid"}'
+        return response
+
+    monkeypatch.setattr(api.requests, "post", post)
+    response = post_config()
+    assert response["status_code"] == 400 and response["request_sent"] is True
+    assert not sharding.is_retryable(response)
+
+
+def test_api_post_config_connection_refused_is_retryable(post_config):
+    response = post_config()
+    assert response["status_code"] is None and response["request_sent"] is False
+    assert sharding.is_retryable(response)
+
+
+def test_only_posted_shards_are_stored():
+    data = payload()
+    _, fingerprints, _ = compute_delta(data, {})
+    shards = split_payload(data, families_per_shard=1)
+
+    stored = posted_fingerprints(fingerprints, {}, shards[:2])
+
+    assert ("families", "F1") in stored and ("biofiles", "b.vcf") in stored
+    assert ("families", "F3") not in stored and ("interpretations", "I3") not in stored
@@ -0,0 +1,61 @@
+from utils.sheet_state import SheetState, changed_biofiles, compute_delta, is_empty, stored_checksums
+
+JSON_DATA = {
+    "families": [
+        {"identifier": "F1", "persons": [{"identifier": "P1", "sex": "female"}]},
+        {"identifier": "F2", "persons": [{"identifier": "P2", "sex": "male"}]},
+    ],
+    "files": [
+        {"filename": "F1.vcf.gz", "checksum": "a" * 32, "assembly": "GRCh38", "samples": [{"name": "S1", "person": "P1"}]},
+        {"filename": "F2.vcf.gz", "checksum": "b" * 32, "assembly": "GRCh38", "samples": [{"name": "S2", "person": "P2"}]},
+    ],
+    "interpretations": [
+        {"title": "F1 - exome", "indexCase": "P1"},
+        {"title": "F2 - exome", "indexCase": "P2"},
+    ],
+}
+
+
+def modified_sheet():
+    data = {section: [dict(item) for item in items] for section, items in JSON_DATA.items()}
+    data["families"][1]["persons"] = [{"identifier": "P2", "sex": "female"}]
+    data["files"][0]["samples"] = [{"name": "S1", "person": "P1", "bamPath": "S1.bam"}]
+    data["files"][1]["checksum"] = "c" * 32
+    return data
+
+
+def test_first_version_is_posted_entirely():
+    delta, fingerprints, unchanged = compute_delta(JSON_DATA, {})
+    assert delta == JSON_DATA
+    assert unchanged == 0
+    assert fingerprints[("biofiles", "F1.vcf.gz")] == "a" * 32
+    assert stored_checksums(fingerprints) == {"F1.vcf.gz": "a" * 32, "F2.vcf.gz": "b" * 32}
+
+
+def test_only_modified_entities_are_posted():
+    _, previous, _ = compute_delta(JSON_DATA, {})
+    delta, _, unchanged = compute_delta(modified_sheet(), previous)
+
+    assert [family["identifier"] for family in delta["families"]] == ["F2"]
+    assert [file["filename"] for file in delta["files"]] == ["F1.vcf.gz", "F2.vcf.gz"]
+    assert delta["interpretations"] == []
+    assert unchanged == 3
+    # F1 : seuls les samples ont changé, le biofile est déjà chargé
+    assert changed_biofiles(delta, previous) == ["F2.vcf.gz"]
+
+
+def test_unchanged_sheet():
+    _, previous, _ = compute_delta(JSON_DATA, {})
+    delta, _, _ = compute_delta(JSON_DATA, previous)
+    assert is_empty(delta)
+
+
+def test_state_is_persisted(tmp_path):
+    db_path = str(tmp_path / "sheets.sqlite")
+    _, fingerprints, _ = compute_delta(JSON_DATA, {})
+    state = SheetState(db_path)
+    assert state.get("sheet.tsv") == {}
+    state.commit("sheet.tsv", fingerprints)
+    state.close()
+
+    assert SheetState(db_path).get("sheet.tsv") == fingerprints
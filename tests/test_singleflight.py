@@ -0,0 +1,98 @@
+import threading
+
+import pytest
+
+from utils.cancellation import JobCancelledError
+from utils import singleflight
+from utils.singleflight import SingleFlight
+
+
+@pytest.fixture
+def run_concurrently(monkeypatch):
+    """
+    Runs flights.do("md5", function) in 'callers' threads: the first call (leader)
+    runs 'function' only once all the other callers wait for its result.
+    """
+    waiting = threading.Semaphore(0)
+
+    def log_message(function_name, level, message, *args):
+        if "Already in flight" in message:
+            waiting.release()
+
+    monkeypatch.setattr(singleflight, "log_message", log_message)
+
+    def run(flights, function, callers=4):
+        results = []
+
+        def leader_function():
+            for _ in range(callers - 1):
+                assert waiting.acquire(timeout=5)
+            return function()
+
+        def caller():
+            try:
+                results.append(flights.do("md5", leader_function))
+            except Exception as e:
+                results.append(e)
+
+        threads = [threading.Thread(target=caller) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        return results
+    return run
+
+
+def test_concurrent_callers_share_one_call(run_concurrently):
+    calls = []
+    flights = SingleFlight()
+    results = run_concurrently(flights, lambda: calls.append(1) or True)
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert all(result is True for result, _ in results)
+    assert not flights._calls
+    # Clé libérée : un nouvel appel relance la fonction
+    assert flights.do("md5", lambda: "again") == ("again", False)
+
+
+def test_failure_is_shared(run_concurrently):
+    calls = []
+    error = ValueError("upload failed")
+
+    def fail():
+        calls.append(1)
+        raise error
+
+    results = run_concurrently(SingleFlight(), fail)
+    assert len(calls) == 1
+    assert len(results) == 4
+    assert all(result is error for result in results)
+
+
+def test_follower_calls_again_if_leader_cancelled():
+    flights = SingleFlight()
+    leader_started = threading.Event()
+    release = threading.Event()
+
+    def cancelled_upload():
+        leader_started.set()
+        release.wait(5)
+        raise JobCancelledError("Another biofile failed.")
+
+    def leader():
+        with pytest.raises(JobCancelledError):
+            flights.do("md5", cancelled_upload)
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    leader_started.wait(5)
+    follower = []
+    follower_thread = threading.Thread(target=lambda: follower.append(flights.do("md5", lambda: "uploaded")))
+    follower_thread.start()
+    release.set()
+    thread.join(5)
+    follower_thread.join(5)
+
+    assert follower == [("uploaded", False)]
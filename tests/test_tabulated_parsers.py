@@ -0,0 +1,39 @@
+import pytest
+
+from utils.tabulated_parsers import CSV_MAX_BYTES, PARSERS, is_available, parse_sheet, select_engine
+
+SHEET = (
+    "filename\tsample\tsex\tnote\tnote\n"
+    "F1.vcf.gz\tS1\tfemale\t\"quoted\ttab\"\tNA\n"
+    "F1.vcf.gz\tS2\tmale\tN/A\n"
+    "F2.vcf.gz\tS3\t\tnull\ttext\n"
+)
+
+
+@pytest.mark.parametrize("engine", sorted(PARSERS))
+def test_engines_give_the_same_table(engine):
+    if not is_available(engine):
+        pytest.skip(f"{engine} is not installed")
+    table = parse_sheet(SHEET, engine)
+
+    assert table.columns == ["filename", "sample", "sex", "note", "note.1"]
+    assert len(table) == 3
+    assert table.column("sex") == ["female", "male", ""]
+    assert table.column("note") == ["quoted\ttab", "", ""]
+    assert table.column("note.1") == ["", "", "text"]
+    assert table.to_records()[1] == {"filename": "F1.vcf.gz", "sample": "S2", "sex": "male", "note": "", "note.1": ""}
+
+
+def test_header_only():
+    table = parse_sheet("filename\tsample\n", "csv")
+    assert table.columns == ["filename", "sample"]
+    assert len(table) == 0
+    assert table.to_records() == {}
+
+
+def test_select_engine():
+    assert select_engine(1000) == "csv"
+    assert select_engine(CSV_MAX_BYTES + 1) == ("pyarrow" if is_available("pyarrow") else "pandas")
+    assert select_engine(1000, "pandas") == "pandas"
+    with pytest.raises(ValueError, match="Unknown sheet parser"):
+        select_engine(1000, "polars")
@@ -0,0 +1,71 @@
+import csv
+import json
+
+import pytest
+
+import tabulated2json
+from benchmarks import generators
+from tabulated2json import REQUIRED_HEADERS, create_json_files
+from utils.tabulated_stream import IndexedSheet
+
+
+def write_sheet(path, rows, newline="\n"):
+    """TSV written by 'csv' (values with a line break are quoted)."""
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file, delimiter="\t", lineterminator=newline)
+        writer.writerow(REQUIRED_HEADERS)
+        for row in rows:
+            writer.writerow([row[column] for column in REQUIRED_HEADERS])
+    return str(path)
+
+
+def settings(rows, streaming_conversion):
+    return {
+        "path_biofiles": None, "recipients": "", "sheet_parser": "csv", "json_audit": False,
+        "streaming_conversion": streaming_conversion, "streaming_threshold_mb": 50, "hash_workers": 1,
+        "checksum_sidecars_enabled": False, "excludeColumns": ["AC"], "projects": generators.project_mapping(rows),
+    }
+
+
+@pytest.fixture
+def project_calls(monkeypatch):
+    calls = []
+
+    def api_get_project_from_slug(**kwargs):
+        calls.append(kwargs["project_slug"])
+        return kwargs["project_slug"]
+
+    monkeypatch.setattr(tabulated2json, "api_get_project_from_slug", api_get_project_from_slug)
+    return calls
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_streaming_conversion_writes_the_json_of_create_json_files(tmp_path, project_calls, newline):
+    rows = generators.sheet_rows(30, persons=3, samples_per_biofile=1, projects=3, cnv_ratio=0.3)
+    rows[0]["person_note"] = "Note sur\ndeux lignes"
+    rows[4]["last_name"] = 'NOM "avec" guillemets'
+    rows[7]["first_name"] = "Hélène"
+    path = write_sheet(tmp_path / "sheet.tsv", rows, newline)
+
+    expected = create_json_files(path, None, None, settings(rows, "never"))
+    output_file = str(tmp_path / "sheet.json")
+    project_calls.clear()
+    assert create_json_files(path, output_file, None, settings(rows, "always")) is None
+
+    with open(output_file, encoding="utf-8") as file:
+        assert file.read() == json.dumps(expected, ensure_ascii=False, indent=4)
+    # Un seul builder : chaque projet n'est vérifié qu'une fois
+    assert sorted(project_calls) == ["projet-0", "projet-1", "projet-2"]
+
+
+def test_indexed_sheet_reads_quoted_values_on_several_lines(tmp_path):
+    rows = generators.sheet_rows(2, persons=2)
+    rows[0]["person_note"] = "Ligne 1\nLigne 2\n\nLigne 4"
+    path = write_sheet(tmp_path / "sheet.tsv", rows)
+
+    sheet = IndexedSheet(path, ["family_id"])
+    assert sheet.build(REQUIRED_HEADERS) == ([], [])
+    assert len(sheet) == 4
+    read = sheet.read_rows(range(4))
+    assert read[0]["person_note"] == "Ligne 1\nLigne 2\n\nLigne 4"
+    assert [read[i]["person_id"] for i in range(4)] == [row["person_id"] for row in rows]
@@ -0,0 +1,88 @@
+import pandas as pd
+import pytest
+
+from utils.tabulated_validator import (TSVValidationError, detect_encoding_from_bytes, find_invalid_values,
+                                       read_tabulated_file, validate_tsv_columns)
+
+COLUMNS = ['filename', 'file_type', 'assembly', 'sample', 'family_id', 'person_id', 'sex', 'is_affected',
+           'date_of_birth', 'interpretation_title', 'is_index', 'project']
+
+
+def row(**values):
+    data = {
+        'filename': "F1.vcf.gz", 'file_type': "SNV", 'assembly': "GRCh38", 'sample': "S1",
+        'family_id': "F1", 'person_id': "P1", 'sex': "female", 'is_affected': "1",
+        'date_of_birth': "25/12/1990", 'interpretation_title': "F1", 'is_index': "1", 'project': "Test",
+    }
+    data.update(values)
+    return data
+
+
+def test_valid_table():
+    df = pd.DataFrame([row(), row(person_id="P2", date_of_birth="", sex="M", is_index="0")])
+    assert find_invalid_values(df, COLUMNS) == []
+    assert validate_tsv_columns(df, COLUMNS)
+
+
+def test_all_errors_reported_in_one_pass():
+    df = pd.DataFrame([
+        row(),
+        row(sex="x", is_index="2"),
+        row(filename="", date_of_birth="1990-12-25"),
+    ])
+    errors = find_invalid_values(df, COLUMNS)
+    assert [(error["row"], error["column"]) for error in errors] == [
+        (3, "sex"), (3, "is_index"), (4, "filename"), (4, "date_of_birth"),
+    ]
+
+    with pytest.raises(TSVValidationError) as excinfo:
+        validate_tsv_columns(df, COLUMNS)
+    assert len(excinfo.value.errors) == 4
+    assert "4 valeur(s) invalide(s)" in str(excinfo.value)
+
+
+def test_missing_columns():
+    df = pd.DataFrame([row()]).drop(columns=["project"])
+    with pytest.raises(TSVValidationError, match="Missing columns"):
+        validate_tsv_columns(df, COLUMNS)
+
+
+SHEET = "filename\tsample\tlast_name\nF1.vcf.gz\tS1\tLefèvre\nF2.vcf.gz\tS2\tMüller\n"
+
+
+@pytest.mark.parametrize("content, encoding", [
+    (SHEET.encode("utf-8"), "utf-8"),
+    (b"\xef\xbb\xbf" + SHEET.encode("utf-8"), "utf-8-sig"),
+    (SHEET.encode("utf-16"), "utf-16"),
+    ((SHEET * 20).encode("latin-1"), None),
+])
+def test_detect_encoding_from_bytes(content, encoding):
+    detected = detect_encoding_from_bytes(content)
+    if encoding:
+        assert detected == encoding
+    # Latin-1 : encodage détecté par chardet, qui doit décoder les accents
+    assert content.decode(detected) in (SHEET * 20, SHEET, "\ufeff" + SHEET)
+
+
+@pytest.mark.parametrize("content", [
+    SHEET.encode("utf-8"),
+    b"\xef\xbb\xbf" + SHEET.encode("utf-8"),
+    SHEET.encode("latin-1"),
+    SHEET.replace("\n", "\r\n").encode("utf-8"),
+    (SHEET + "\n\n  \n").encode("utf-8"),
+    ("\n" + SHEET.replace("\n", "\r\n") + "\r\n\r\n").encode("latin-1"),
+], ids=["utf-8", "utf-8-bom", "latin-1", "crlf", "trailing-empty-lines", "latin-1-crlf-empty-lines"])
+@pytest.mark.parametrize("engine", ["csv", "pandas"])
+def test_read_tabulated_file(tmp_path, content, engine):
+    path = tmp_path / "sheet.tsv"
+    path.write_bytes(content)
+
+    table = read_tabulated_file(str(path), engine=engine)
+
+    assert table.columns == ["filename", "sample", "last_name"]
+    assert table.to_records() == {
+        0: {"filename": "F1.vcf.gz", "sample": "S1", "last_name": "Lefèvre"},
+        1: {"filename": "F2.vcf.gz", "sample": "S2", "last_name": "Müller"},
+    }
+    # Le fichier d'entrée n'est pas réécrit
+    assert path.read_bytes() == content
@@ -0,0 +1,76 @@
+import concurrent.futures
+import json
+
+import pytest
+
+from utils.cancellation import JobCancelledError
+from utils.log_context import submit_in_context
+from utils.tracing import TRACER, span, trace, traced
+
+
+@pytest.fixture
+def tracer(tmp_path):
+    TRACER.configure(enabled=True, trace_format="chrome", directory=str(tmp_path))
+    yield tmp_path
+    TRACER.configure(enabled=False)
+
+
+@traced()
+def hash_biofile(name):
+    return name.upper()
+
+
+def test_spans_are_children_of_the_job_and_biofile(tracer):
+    with trace("job", "sheet_1", sheet="sheet.tsv") as root:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            def task(name):
+                with span("biofile", biofile=name):
+                    return hash_biofile(name)
+            futures = [submit_in_context(executor, task, name) for name in ("a.vcf", "b.vcf")]
+            assert sorted(future.result() for future in futures) == ["A.VCF", "B.VCF"]
+
+    with open(tracer / "sheet_1.trace.json", encoding="utf-8") as file:
+        events = [event for event in json.load(file)["traceEvents"] if event["ph"] == "X"]
+    by_id = {event["args"]["span_id"]: event for event in events}
+    biofiles = [event for event in events if event["name"] == "biofile"]
+    assert {event["args"]["parent_id"] for event in biofiles} == {root.span_id}
+    for event in events:
+        if event["name"] == "hash_biofile":
+            assert by_id[event["args"]["parent_id"]]["name"] == "biofile"
+    assert len(events) == 5
+
+
+def test_otlp_export_and_error_status(tracer):
+    TRACER.configure(enabled=True, trace_format="otlp", directory=str(tracer))
+    with pytest.raises(ValueError):
+        with trace("job", "sheet_2"):
+            with span("post"):
+                raise ValueError("400")
+
+    with open(tracer / "sheet_2.otlp.json", encoding="utf-8") as file:
+        spans = json.load(file)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    root, post = spans
+    assert len(root["traceId"]) == 32 and post["traceId"] == root["traceId"]
+    assert post["parentSpanId"] == root["spanId"] and "parentSpanId" not in root
+    assert post["status"] == {"code": 2, "message": "error"}
+
+
+def test_cancelled_span_status(tracer):
+    with trace("job", "sheet_3"):
+        with pytest.raises(JobCancelledError):
+            with span("upload"):
+                raise JobCancelledError("Another biofile failed.")
+
+    with open(tracer / "sheet_3.trace.json", encoding="utf-8") as file:
+        events = {event["name"]: event for event in json.load(file)["traceEvents"] if event["ph"] == "X"}
+    assert events["upload"]["args"]["status"] == "cancelled"
+    assert events["job"]["args"]["status"] == "ok"
+
+
+def test_disabled_or_outside_of_a_trace_is_a_no_op(tmp_path):
+    with span("md5") as current:
+        assert current is None
+    assert hash_biofile("a") == "A"
+    with trace("job", "sheet_3") as root:
+        assert root is None
+    assert not list(tmp_path.iterdir())
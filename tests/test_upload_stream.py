@@ -0,0 +1,115 @@
+import concurrent.futures
+import threading
+import time
+
+import pytest
+import requests
+
+from uploader import wait_for_biofile_tasks
+from utils.cancellation import CancellationToken, JobCancelledError
+from utils.file import md5
+from utils.upload_stream import MultipartFileStream
+
+
+@pytest.fixture
+def biofile(tmp_path):
+    path = tmp_path / "S1.vcf"
+    path.write_bytes(b"##fileformat=VCFv4.2\n" + bytes(range(256)) * 4000)
+    return str(path)
+
+
+def requests_body(biofile, fields, boundary):
+    """Multipart body encoded by 'requests' (files=), with the boundary of the stream."""
+    with open(biofile, "rb") as file:
+        content = file.read()
+    request = requests.Request("POST", "http://diagho/api/v1/biofiles", data=fields,
+                               files={"file": ("S1.vcf", content, "application/octet-stream")}).prepare()
+    requests_boundary = request.headers["Content-Type"].split("boundary=")[1]
+    return request.body.replace(requests_boundary.encode(), boundary.encode())
+
+
+def test_body_is_the_multipart_body_of_requests(biofile):
+    fields = {"accession": "1", "type": "SNV"}
+    with MultipartFileStream(biofile, fields=fields) as body:
+        boundary = body.content_type.split("boundary=")[1]
+        expected = requests_body(biofile, fields, boundary)
+        assert len(body) == len(expected)
+        chunks = iter(lambda: body.read(8192), b"")
+        assert b"".join(chunks) == expected
+        assert body.read() == b""
+
+
+def test_cancellation_is_raised_during_read(biofile):
+    token = CancellationToken()
+    with MultipartFileStream(biofile, cancel_token=token) as body:
+        assert body.read(1000)
+        token.cancel("Another biofile failed.")
+        with pytest.raises(JobCancelledError, match="Another biofile failed."):
+            body.read(1000)
+        assert body.bytes_read < len(body)
+
+
+def test_sibling_tasks_are_cancelled_when_one_biofile_fails():
+    token = CancellationToken()
+    started = threading.Event()
+
+    def running_task():
+        # comme process_biofile_task : l'annulation arrête la tâche, qui échoue
+        started.set()
+        try:
+            token.sleep(10)
+        except JobCancelledError:
+            return False
+        return True
+
+    def failing_task():
+        started.wait(5)
+        return False
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(running_task), executor.submit(failing_task)]
+        futures += [executor.submit(running_task) for _ in range(3)]  # en attente d'un worker
+        start = time.perf_counter()
+        assert wait_for_biofile_tasks(futures, token, "fail-fast", "sheet.json")
+        assert time.perf_counter() - start < 5
+
+    assert futures[0].result() is False
+    assert token.cancelled and "sheet.json" in token.reason
+    # tâches en attente : annulées, ou arrêtées par le token si un worker s'est libéré avant l'annulation
+    assert all(future.cancelled() or future.result() is False for future in futures[2:])
+    assert any(future.cancelled() for future in futures[2:])
+
+
+def test_best_effort_lets_the_other_tasks_finish():
+    token = CancellationToken()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        futures = [executor.submit(lambda: False)] + [executor.submit(lambda: True) for _ in range(3)]
+        assert wait_for_biofile_tasks(futures, token, "best-effort", "sheet.json")
+    assert not token.cancelled
+    assert all(future.result() for future in futures[1:])
+
+
+@pytest.mark.parametrize("chunk_size", [1, 8192, 1024 * 1024])
+def test_md5_while_uploading_is_the_md5_of_the_biofile(biofile, chunk_size):
+    with MultipartFileStream(biofile, fields={"accession": "1"}, compute_md5=True) as body:
+        while body.read(chunk_size):
+            pass
+        assert body.md5_hexdigest() == md5(biofile)
+
+
+def test_md5_while_uploading_after_a_partial_read_and_a_retry(biofile):
+    # Upload interrompu : le MD5 d'une partie du biofile n'est pas retourné
+    with MultipartFileStream(biofile, compute_md5=True) as body:
+        body.read(len(body) // 2)
+        assert body.md5_hexdigest() is None
+
+    # Nouvel essai : nouveau body, MD5 recalculé depuis le début du biofile
+    with MultipartFileStream(biofile, compute_md5=True) as body:
+        body.read()
+        assert body.md5_hexdigest() == md5(biofile)
+
+
+def test_md5_is_not_computed_by_default(biofile):
+    with MultipartFileStream(biofile) as body:
+        body.read()
+        assert body.md5_hexdigest() is None
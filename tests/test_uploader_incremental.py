@@ -0,0 +1,116 @@
+import os
+import shutil
+
+import pytest
+
+import tabulated2json
+import uploader
+import utils.mail
+from benchmarks import generators
+
+CONFIG = """
+input_biofiles: "{root}/biofiles"
+backup_biofiles: "{root}/backup/biofiles"
+backup_data: "{root}/backup/data"
+check_biofile: {{max_retries: 1, delay: 0}}
+check_loading: {{max_retries: 1, delay: 0}}
+settings: {{max_workers: 2, incremental: true, sheet_state: "{root}/sheets.sqlite", checksum_cache: "", json_audit: false, streaming_conversion: "never"}}
+emails: {{recipients: "a@example.fr", send_mail_flag: 0}}
+diagho_api: {{url: "http://localhost/api/v1/", username: "user", password: "secret"}}
+accessions: {{GRCh38: 2}}
+interpretations: {{excludeColumns: ["AC"], projects: {{"Projet 0": "projet-0"}}}}
+"""
+
+
+class FakeResponse:
+    status_code = 201
+    text = ""
+
+
+class FakeDiagho:
+    """Uploads and POSTs recorded; an uploaded biofile is moved to the backup, as by 'process_biofile_task'."""
+
+    def __init__(self, monkeypatch):
+        self.uploaded = []
+        self.posted = []
+        monkeypatch.setattr(uploader, "api_healthcheck", lambda diagho_api: None)
+        monkeypatch.setattr(uploader, "api_login", lambda config, diagho_api: {})
+        monkeypatch.setattr(uploader, "process_biofile_task", self.process_biofile_task)
+        monkeypatch.setattr(uploader, "api_post_config", self.api_post_config)
+        monkeypatch.setattr(uploader.time, "sleep", lambda seconds: None)
+        monkeypatch.setattr(tabulated2json, "api_get_project_from_slug", lambda **kwargs: kwargs["project_slug"])
+        monkeypatch.setattr(utils.mail, "get_send_mail_flag", lambda config_path=None: 0)
+
+    def process_biofile_task(self, settings, biofile, biofile_infos, diagho_api, cancel_token=None):
+        self.uploaded.append(os.path.basename(biofile))
+        return uploader.move_to_backup(biofile, settings["path_backup_biofiles"])
+
+    def api_post_config(self, **kwargs):
+        self.posted.append(kwargs["payload"])
+        return FakeResponse()
+
+
+@pytest.fixture
+def watcher(tmp_path, monkeypatch):
+    for directory in ("biofiles", "backup/biofiles", "backup/data", "input"):
+        os.makedirs(tmp_path / directory)
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text(CONFIG.format(root=tmp_path))
+    return tmp_path, str(config_file), FakeDiagho(monkeypatch)
+
+
+def drop(root, config_file, rows, biofiles=True):
+    """Drops the sheet (and its biofiles, from the backup if already moved) and processes it."""
+    if biofiles:
+        for filename in {row["filename"] for row in rows}:
+            backup = root / "backup" / "biofiles" / filename
+            if backup.exists():
+                shutil.copy(backup, root / "biofiles" / filename)
+            else:
+                generators.write_vcf(str(root / "biofiles" / filename), "1K", samples=(filename,))
+    path = str(root / "input" / "sheet.tsv")
+    generators.write_sheet(path, rows)
+    return uploader.diagho_upload_file(file_path=path, config_file=config_file)
+
+
+def test_redropped_sheet_moves_the_unchanged_biofiles(watcher):
+    root, config_file, diagho = watcher
+    rows = generators.sheet_rows(2, persons=2, samples_per_biofile=1, checksums=False)
+    assert drop(root, config_file, rows)
+    assert sorted(diagho.uploaded) == ["F000000-0.vcf", "F000000-1.vcf", "F000001-0.vcf", "F000001-1.vcf"]
+    checksums = {item["filename"]: item["checksum"] for item in diagho.posted[0]["files"]}
+
+    # Feuille corrigée redéposée avec ses biofiles : aucun nouvel upload, biofiles déplacés en backup
+    rows[0]["first_name"] = "Corrected"
+    assert drop(root, config_file, rows)
+    assert len(diagho.uploaded) == 4
+    assert os.listdir(root / "biofiles") == []
+    assert [family["identifier"] for family in diagho.posted[1]["families"]] == ["F000000"]
+    assert diagho.posted[1]["files"] == []
+
+    # Feuille inchangée redéposée : rien à poster, biofiles déplacés aussi
+    assert drop(root, config_file, rows)
+    assert len(diagho.posted) == 2
+    assert os.listdir(root / "biofiles") == []
+
+    # Feuille corrigée sans les biofiles (déjà en backup) : checksums du dernier POST, pas de nouveau MD5
+    rows[2]["bam_path"] = "/data/bam/corrected.bam"
+    assert drop(root, config_file, rows, biofiles=False)
+    assert len(diagho.uploaded) == 4
+    assert diagho.posted[2]["families"] == []
+    assert [(item["filename"], item["checksum"]) for item in diagho.posted[2]["files"]] == [("F000001-0.vcf", checksums["F000001-0.vcf"])]
+
+
+def test_modified_biofile_is_uploaded_again(watcher):
+    root, config_file, diagho = watcher
+    rows = generators.sheet_rows(1, persons=2, samples_per_biofile=1, checksums=False)
+    assert drop(root, config_file, rows)
+
+    generators.write_vcf(str(root / "backup" / "biofiles" / "F000000-1.vcf"), "2K", samples=("S",), seed=1)
+    assert drop(root, config_file, rows)
+
+    # Seul le biofile modifié est uploadé à nouveau, l'autre est déplacé en backup
+    assert sorted(diagho.uploaded[:2]) == ["F000000-0.vcf", "F000000-1.vcf"]
+    assert diagho.uploaded[2:] == ["F000000-1.vcf"]
+    assert [item["filename"] for item in diagho.posted[1]["files"]] == ["F000000-1.vcf"]
+    assert os.listdir(root / "biofiles") == []
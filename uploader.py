@@ -5,30 +5,70 @@ import concurrent.futures
 
 from tabulated2json import create_json_files
 from utils.api import *
+from utils.cancellation import CancellationToken, JobCancelledError, cancellable_sleep
+from utils.checksum_cache import cached_md5, get_checksum_cache, init_checksum_cache
+from utils.checksum_manifest import get_sidecar_checksum
 from utils.file import *
 from utils.config_loader import *
+from utils.json_payload import write_json_file_async
 from utils.json_validator import validate_json_input
+from utils.log_context import biofile_context, job_context, set_checksum, stage, submit_in_context
 from utils.mail import *
+from utils.metrics import BIOFILE_TASKS_RUNNING, LOADING_WAIT, SHEET_DURATION
+from utils.preflight import PreflightCache, run_preflight
 from utils.logger import *
+from utils.singleflight import get_biofile_flights
+from utils.sharding import format_shard_report, post_config_shards
+from utils.sheet_state import changed_biofiles, compute_delta, init_sheet_state, is_empty, posted_fingerprints, stored_checksums
+from utils.profiling import profile_job
+from utils.tracing import span, trace
 
 
 def diagho_upload_file(**kwargs): # pragma: no cover
     """
     Process input file (JSON) : load biofiles in Diagho and load JSON file.
+    All the logs of the processing carry the same job ID (cf. utils/log_context.py),
+    its spans are exported in a trace file if tracing is enabled (cf. utils/tracing.py).
+
+    Returns:
+        bool: True if the configuration was posted in Diagho (or nothing changed since the last post).
     """
-    function_name = inspect.currentframe().f_code.co_name
+    start = time.perf_counter()
+    posted = False
+    try:
+        sheet = os.path.basename(kwargs.get("file_path"))
+        with job_context(sheet) as job_id:
+            name = f"{os.path.splitext(sheet)[0]}_{job_id}"
+            with profile_job(name), trace("job", name, sheet=sheet, job_id=job_id) as root:
+                posted = _diagho_upload_file(**kwargs)
+                if root is not None:
+                    root.attributes["posted"] = posted
+            return posted
+    finally:
+        SHEET_DURATION.labels(status="ok" if posted else "failed").observe(time.perf_counter() - start)
+
+
+def _diagho_upload_file(**kwargs): # pragma: no cover
+    """
+    Steps of 'diagho_upload_file'.
+    """
+    function_name = "diagho_upload_file"
     
     # Arguments
-    config = kwargs.get("config")
+    config_file = kwargs.get("config_file")
     file_path = kwargs.get("file_path")   
     
     log_message(function_name, "DEBUG", f"START UPLOADER : Input file: {file_path}")
 
-    # Load settings
-    settings = load_configuration(config)
+    # Load configuration and settings (shared, read-only)
+    config = get_config(config_file)
+    settings = get_settings(config_file)
     path_biofiles = settings["path_biofiles"]
     recipients = settings["recipients"]
     
+    # Cache des checksums (évite de recalculer le MD5 d'un biofile inchangé)
+    init_checksum_cache(settings["checksum_cache"])
+    
     # Get API endpoints
     diagho_api = get_api_endpoints(config)
     
@@ -37,7 +77,7 @@ def diagho_upload_file(**kwargs): # pragma: no cover
         api_healthcheck(diagho_api)
     except ValueError as e:
         send_mail_alert(recipients, f"API healthcheck error : {e}")
-        return
+        return False
     
     # API login
     try:
@@ -45,10 +85,15 @@ def diagho_upload_file(**kwargs): # pragma: no cover
         if result.get("error"):
             error_message = result.get("error")
             send_mail_alert(recipients, f"API login error: {error_message} ")
-            return
+            return False
     except ValueError as e:
         send_mail_alert(recipients, f"API login error: {e}")
-        return
+        return False
+    
+    # Retraitement incrémental : empreinte de la dernière version postée de la feuille
+    sheet = os.path.basename(file_path)
+    sheet_state = init_sheet_state(settings["sheet_state"]) if settings["incremental"] else None
+    previous = sheet_state.get(sheet) if sheet_state is not None else {}
     
     # Si le fichier d'input est un fichier tabulé : créer le JSON
     if file_path.endswith((".tsv", ".csv", ".txt")):
@@ -60,41 +105,82 @@ def diagho_upload_file(**kwargs): # pragma: no cover
         output_filename = f"{os.path.splitext(os.path.basename(file_path))[0]}.json"
         json_file = os.path.join(output_directory, output_filename)
         try:
-            create_json_files(file_path, json_file, diagho_api, settings)
+            # Contenu JSON en mémoire (None en mode streaming : écrit seulement dans 'json_file')
+            # Biofiles inchangés déjà déplacés en backup : checksums du dernier POST
+            json_input = create_json_files(file_path, json_file, diagho_api, settings, stored_checksums(previous))
         except Exception as e:
             message = f"{e}"
             log_message(function_name, "ERROR", f"Erreur détectée: {e}.")
             send_mail_alert(recipients, message)
-            return
+            return False
         
-        # Valider que le JSON est bien écrit pour continuer
-        if not os.path.exists(json_file):
-            log_message(function_name, "ERROR", f"JSON file not found: {json_file}")
-            raise FileNotFoundError(f"File not found: {json_file}.")
+        # Mode streaming : valider que le JSON est bien écrit pour continuer
+        if json_input is None:
+            if not os.path.exists(json_file):
+                log_message(function_name, "ERROR", f"JSON file not found: {json_file}")
+                raise FileNotFoundError(f"File not found: {json_file}.")
+            json_input = json_file
         
         log_message(function_name, "DEBUG", f"File: {file_path} --> {json_file}")
-        time.sleep(2)
         
     if file_path.endswith(".json"):
         json_file = file_path
+        json_input = json_file
     
     json_filename = os.path.basename(json_file)
     
-    # Test si fichier JSON OK
+    # Test si JSON OK (le fichier n'est lu que s'il n'est pas déjà en mémoire)
     try:
-        json_data = validate_json_input(json_file)
+        with stage("validate"):
+            json_data = validate_json_input(json_input, json_filename)
     except ValueError as e:
         send_mail_alert(recipients, f"Erreur de validation du fichier JSON: {json_filename}\n\n{e}")
-        return
+        return False
+    
+    # Pre-flight : conflits avec Diagho détectés avant tout upload de biofile
+    if settings["preflight"]:
+        conflicts = run_preflight(json_data, diagho_api, PreflightCache())
+        if conflicts:
+            log_message(function_name, "ERROR", f"{json_filename} - Pre-flight: {len(conflicts)} conflict(s), no biofile uploaded: {conflicts}")
+            send_mail_alert(recipients, f"JSON file: {json_filename}\n\nConflicts with Diagho, no biofile uploaded:\n" + "\n".join(f"- {conflict}" for conflict in conflicts))
+            return False
+    
+    # Retraitement incrémental : ne poster que les familles, biofiles et interprétations modifiés
+    fingerprints = None
+    biofiles_to_upload = None
+    if sheet_state is not None:
+        delta, fingerprints, unchanged = compute_delta(json_data, previous)
+        if previous:
+            biofiles_to_upload = set(changed_biofiles(delta, previous))
+            # Biofiles déjà chargés, redéposés avec la feuille : déplacés en backup sans nouvel upload
+            backup_biofiles(settings, [item.get("filename") for item in json_data["files"] if item.get("filename") not in biofiles_to_upload])
+            if is_empty(delta):
+                log_message(function_name, "INFO", f"{sheet} - No change since the last post, nothing to do.")
+                send_mail_info(recipients, f"Sheet: {sheet}\n\nNo change since the last post in Diagho, nothing to do.")
+                return True
+            log_message(function_name, "INFO", f"{sheet} - Incremental: {unchanged} unchanged entities skipped, {len(biofiles_to_upload)} biofiles to upload.")
+            
+            # JSON à poster : seulement les entités modifiées
+            output_directory = os.path.join(os.path.dirname(file_path), "json")
+            os.makedirs(output_directory, exist_ok=True)
+            json_file = os.path.join(output_directory, f"{os.path.splitext(sheet)[0]}.delta.json")
+            if settings["json_audit"]:
+                write_json_file_async(delta, json_file)
+            json_data = delta
     
     # Traitements parallèles
     futures = []
     max_workers = settings["max_workers"]
+    failure_policy = settings["failure_policy"]
+    cancel_token = CancellationToken()
     with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
         
         # Get filenames of the biofiles
         biofiles = json_data["files"]
         filenames = [item.get("filename") for item in biofiles if "filename" in item]
+        if biofiles_to_upload is not None:
+            # Biofiles déjà chargés (seuls leurs samples ont changé) : pas de nouvel upload
+            filenames = [filename for filename in filenames if filename in biofiles_to_upload]
         log_message(function_name, "DEBUG", f"{os.path.basename(json_file)} - Process each biofile: {filenames}")
         
         # for each biofile...
@@ -104,37 +190,137 @@ def diagho_upload_file(**kwargs): # pragma: no cover
             biofile_infos = get_biofile_informations(biofiles, filename)
                         
             # A partir d'ici : paraléliser les traitements
-            futures.append(executor.submit(process_biofile_task, settings, biofile, biofile_infos, diagho_api))
+            futures.append(submit_in_context(executor, process_biofile_task, settings, biofile, biofile_infos, diagho_api, cancel_token))
 
         # Attendre que toutes les tâches soient terminées avec succès
-        for future in concurrent.futures.as_completed(futures):
-            if not future.result():  # Si une tâche a échoué : log + sortir du traitement
-                time.sleep(5)
-                log_message(function_name, "ERROR", f"FAILED: one task failed, processing stopped. Exit.")
-                return
+        failed = wait_for_biofile_tasks(futures, cancel_token, failure_policy, json_filename)
+
+    # Si une tâche a échoué : log + sortir du traitement
+    if failed:
+        log_message(function_name, "ERROR", f"FAILED: one task failed, processing stopped. Exit.")
+        return False
             
     # Tous les biofiles ont été traités.     
     log_message(function_name, "INFO", f"All biofiles have been loaded in Diagho: {filenames}")
 
-    time.sleep(5)
+    with span("sleep", seconds=5):
+        time.sleep(5)
     
     # Upload JSON file 
     log_message(function_name, "INFO", f"Upload JSON: {os.path.basename(json_file)}") 
     kwargs = {
         'diagho_api': diagho_api,
         'file': json_file,
+        'payload': json_data,
         'recipients': recipients,
         'json_file': os.path.basename(json_file)
     }
-    response = api_post_config(**kwargs)
+    if settings["sharding_enabled"] and len(json_data["families"]) >= settings["sharding_min_families"]:
+        # Gros payload : POST par shards indépendants, en parallèle
+        with stage("post", shards=True):
+            return post_sharded_config(settings, json_data, sheet, sheet_state, fingerprints, **kwargs)
+    with stage("post"):
+        response = api_post_config(**kwargs)
+
+    # Vérifie si import du JSON OK
+    posted = check_api_response(response, **kwargs)
+    if posted and sheet_state is not None:
+        # Empreinte de la feuille enregistrée seulement après un POST réussi
+        sheet_state.commit(sheet, fingerprints)
+    return posted
+
 
-    # Vérifie si import du JSON OK    
-    check_api_response(response, **kwargs)
+def post_sharded_config(settings, json_data, sheet, sheet_state, fingerprints, **kwargs): # pragma: no cover
+    """
+    POST the JSON configuration in shards (cf. utils.sharding) and reports the result of each shard.
+    With incremental re-processing, only the entities of the shards posted are stored: the
+    failed shards are posted again when the sheet is dropped again.
+
+    Returns:
+        bool: True if all the shards were posted.
+    """
+    function_name = inspect.currentframe().f_code.co_name
+    recipients = kwargs.get('recipients')
+    json_file = kwargs.get('json_file')
+
+    shards, results = post_config_shards(json_data, settings, **kwargs)
+    report = format_shard_report(json_file, results)
+    posted = [shard for shard, result in zip(shards, results) if result["status"] == "ok"]
+    if len(posted) == len(shards):
+        log_message(function_name, "INFO", f"{json_file}: {len(shards)} shards posted in Diagho successfully")
+        send_mail_info(recipients, report)
+        if sheet_state is not None:
+            sheet_state.commit(sheet, fingerprints)
+        return True
+
+    log_message(function_name, "ERROR", f"{json_file}: {len(shards) - len(posted)}/{len(shards)} shards failed")
+    send_mail_alert(recipients, report)
+    if sheet_state is not None and posted:
+        sheet_state.commit(sheet, posted_fingerprints(fingerprints, sheet_state.get(sheet), posted))
+    return False
     
 
 
+def wait_for_biofile_tasks(futures, cancel_token, failure_policy, json_filename):
+    """
+    Waits for the biofile tasks of a job. With the 'fail-fast' policy, the first failed
+    task cancels the tasks not started yet and sets 'cancel_token' (the running tasks
+    stop at their next check).
+
+    Returns:
+        bool: True if a task failed.
+    """
+    function_name = "diagho_upload_file"
+    failed = False
+    for future in concurrent.futures.as_completed(futures):
+        if future.cancelled() or future.result():
+            continue
+        # Une tâche a échouée
+        if not failed and failure_policy == "fail-fast":
+            # fail-fast : annuler les tâches en attente et interrompre celles en cours
+            log_message(function_name, "ERROR", f"One task failed, cancel the other biofiles of: {json_filename}")
+            cancel_token.cancel(f"Another biofile of '{json_filename}' failed.")
+            for pending in futures:
+                pending.cancel()
+        failed = True
+    return failed
+
+
+def move_to_backup(biofile, backup_path):
+    """
+    Moves a biofile and its '.md5' file (if any) to the backup directory.
+
+    Returns:
+        bool: False if the biofile was not found (e.g. already moved by another job with the same checksum).
+    """
+    destination_path = os.path.join(backup_path, os.path.basename(biofile))
+    try:
+        shutil.move(biofile, destination_path)
+        moved = True
+    except FileNotFoundError:
+        moved = False
+    try:
+        shutil.move(f"{biofile}.md5", f"{destination_path}.md5")
+    except FileNotFoundError:
+        pass
+    return moved
+
+
+def backup_biofiles(settings, filenames):
+    """
+    Moves to the backup directory the biofiles of a re-processed sheet that are not
+    uploaded again (unchanged since the last post) and are present in the input directory.
+    """
+    function_name = inspect.currentframe().f_code.co_name
+    path_biofiles = settings["path_biofiles"]
+    moved = [filename for filename in filenames if filename and move_to_backup(os.path.join(path_biofiles, filename), settings["path_backup_biofiles"])]
+    if moved:
+        log_message(function_name, "INFO", f"Unchanged biofiles moved to {settings['path_backup_biofiles']}: {moved}")
+    return moved
+
+
 # Gère le traitement d'un biofile
-def process_biofile_task(settings, biofile, biofile_infos, diagho_api): # pragma: no cover
+def process_biofile_task(settings, biofile, biofile_infos, diagho_api, cancel_token=None): # pragma: no cover
     """
     Process one biofile.
 
@@ -143,11 +329,31 @@ def process_biofile_task(settings, biofile, biofile_infos, diagho_api): # pragma
         biofile (str): biofile name.
         biofile_infos (dict): informations about the biofile.
         diagho_api (dict): endpoints.
+        cancel_token (CancellationToken, optional): token of the job, set when another biofile failed.
     """
     function_name = inspect.currentframe().f_code.co_name
     
     biofile_filename = os.path.basename(biofile)
     log_biofile_message(function_name, "DEBUG", biofile_filename, f"Start processing biofile.")
+    
+    BIOFILE_TASKS_RUNNING.inc()
+    try:
+        with biofile_context(biofile_filename, biofile_infos.get("checksum") or None):
+            with span("biofile", biofile=biofile_filename):
+                return _process_biofile(settings, biofile, biofile_infos, diagho_api, cancel_token)
+    except JobCancelledError as e:
+        log_biofile_message(function_name, "WARNING", biofile_filename, f"Job cancelled, stop processing biofile: {e}")
+        return False
+    finally:
+        BIOFILE_TASKS_RUNNING.dec()
+
+
+def _process_biofile(settings, biofile, biofile_infos, diagho_api, cancel_token): # pragma: no cover
+    """
+    Steps of 'process_biofile_task'. Raises JobCancelledError if the job is cancelled.
+    """
+    function_name = "process_biofile_task"
+    biofile_filename = os.path.basename(biofile)
         
     # Récupérer les settings
     path_biofiles = settings["path_biofiles"]
@@ -156,7 +362,7 @@ def process_biofile_task(settings, biofile, biofile_infos, diagho_api): # pragma
     recipients = settings["recipients"]   
     
     # Récupération du biofile (si pas présent au bout de X tentatives... alerte et stop process)
-    if not wait_for_biofile(biofile, max_retries, delay):
+    if not wait_for_biofile(biofile, max_retries, delay, cancel_token):
         send_mail_alert(recipients, f"Failed to process biofile '{biofile_filename}'.\n\nBiofile '{biofile_filename}' does not exist in: {path_biofiles}.")
         log_biofile_message(function_name, "ERROR", biofile_filename, f"Biofile does not exist in: {path_biofiles}")
         return False
@@ -175,11 +381,24 @@ def process_biofile_task(settings, biofile, biofile_infos, diagho_api): # pragma
         return False
     
     # Verifier le checksum fourni et celui calculé du biofile
-    md5_biofile = md5(biofile)
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
     md5_from_json = biofile_infos.get("checksum")
-    if not check_md5sum(md5_biofile, md5_from_json):
-        log_biofile_message(function_name, "ERROR", biofile_filename, f"MD5 checksum mismatch for biofile (TSV -> Calculated).")
-        return False
+    # Checksum fourni par un fichier '.md5' du pipeline : vérifié pendant l'upload (pas de lecture préalable)
+    from_sidecar = settings["checksum_sidecars_enabled"] and bool(md5_from_json) and get_sidecar_checksum(path_biofiles, biofile_filename) == str(md5_from_json).lower()
+    hash_while_uploading = (settings["hash_while_uploading"] or from_sidecar) and bool(md5_from_json) and get_checksum_cache().get(biofile) is None
+    if hash_while_uploading:
+        # Pas de lecture préalable du biofile : le checksum du TSV sert au test d'existence,
+        # le MD5 local est calculé pendant l'upload et vérifié à la fin
+        log_biofile_message(function_name, "DEBUG", biofile_filename, f"Checksum will be computed while uploading.")
+        md5_biofile = md5_from_json
+    else:
+        with stage("hash"):
+            md5_biofile = cached_md5(biofile)
+        set_checksum(md5_biofile)
+        if not check_md5sum(md5_biofile, md5_from_json):
+            log_biofile_message(function_name, "ERROR", biofile_filename, f"MD5 checksum mismatch for biofile (TSV -> Calculated).")
+            return False
     
     # Si checksum identiques : POST biofile
     kwargs = {
@@ -190,22 +409,74 @@ def process_biofile_task(settings, biofile, biofile_infos, diagho_api): # pragma
         "biofile_type": biofile_type,
         "assembly": assembly,
         "accession_id": accession_id,
-        "checksum": md5_biofile
+        "checksum": md5_biofile,
+        "cancel_token": cancel_token,
+        "hash_while_uploading": hash_while_uploading,
+        "md5_from_json": md5_from_json
     }
-    checksum = api_post_biofile(**kwargs).get("checksum")
+    
+    # Upload + chargement une seule fois par checksum : un autre job qui traite le même biofile
+    # au même moment attend et partage le résultat (y compris un échec)
+    loading_status, shared = get_biofile_flights().do(str(md5_biofile).lower(), lambda: upload_and_load_biofile(**kwargs), cancel_token)
+    if shared:
+        log_biofile_message(function_name, "INFO", biofile_filename, f"Biofile uploaded and loaded by another job (same checksum).")
+    if loading_status is None:
+        return False
+    
+    # Move biofile in backup folder (peut déjà avoir été déplacé par un autre job : même checksum)
+    move_to_backup(biofile, settings.get("path_backup_biofiles"))
+    log_biofile_message(function_name, "DEBUG", biofile_filename, f"Move biofile to {settings.get('path_backup_biofiles')}.")
+    
+    return True
+
+
+def upload_and_load_biofile(**kwargs): # pragma: no cover
+    """
+    POST the biofile, verify its checksums and wait for its loading in Diagho.
+
+    Returns:
+        bool: loading status, or None if a checksum does not match (biofile not loaded).
+    """
+    function_name = "process_biofile_task"
+    
+    settings = kwargs.get("settings")
+    biofile = kwargs.get("biofile")
+    biofile_filename = kwargs.get("biofile_filename")
+    md5_biofile = kwargs.get("checksum")
+    md5_from_json = kwargs.get("md5_from_json")
+    hash_while_uploading = kwargs.get("hash_while_uploading")
+    cancel_token = kwargs.get("cancel_token")
+    recipients = settings["recipients"]
+    
+    with stage("upload", bytes=os.path.getsize(biofile)):
+        response = api_post_biofile(**kwargs)
+    checksum = response.get("checksum")
+    
+    # Hash-while-uploading : vérifier le MD5 calculé pendant l'upload (si le biofile a été uploadé)
+    local_checksum = response.get("local_checksum")
+    if hash_while_uploading and "local_checksum" in response:
+        if not local_checksum or not check_md5sum(local_checksum, md5_from_json):
+            log_biofile_message(function_name, "ERROR", biofile_filename, f"MD5 checksum mismatch for biofile (TSV -> Calculated while uploading).")
+            return None
+        get_checksum_cache().put(biofile, local_checksum)
     
     # Vérifier que le checksum du biofile posté est le même que celui du biofile
     if not check_md5sum(checksum, md5_biofile):
         log_biofile_message(function_name, "ERROR", biofile_filename, f"MD5 checksum mismatch for biofile (Calculated -> biofile posted).")
-        return False
+        return None
     log_biofile_message(function_name, "DEBUG", biofile_filename, f"Checksums are identical. Continue.")
         
     # check le statut de chargement
     # TODO: à tester avec la 0.4.0 et remove
-    time.sleep(20) # nécessaire pour l'instant car bug initial (statut en FAILURE)
-    
-    attempt = 1
-    loading_status = check_loading_status(attempt, **kwargs)
+    with stage("load") as fields:
+        with span("sleep", seconds=20):
+            cancellable_sleep(20, cancel_token) # nécessaire pour l'instant car bug initial (statut en FAILURE)
+        
+        attempt = 1
+        start = time.perf_counter()
+        loading_status = check_loading_status(attempt, **kwargs)
+        LOADING_WAIT.labels(result={True: "success", False: "failure"}.get(loading_status, "unknown")).observe(time.perf_counter() - start)
+        fields["loaded"] = bool(loading_status)
     
     # Envoi d'un mail si le biofile n'est pas chargé correctement
     if loading_status: # enlever ça plus tard, garder juste le cas d'erreur
@@ -213,12 +484,4 @@ def process_biofile_task(settings, biofile, biofile_infos, diagho_api): # pragma
     if not loading_status:
         send_mail_alert(recipients, f"Failed to load biofile in Diagho.\n\nBiofile: {biofile_filename}")
     
-    # Move biofile in backup folder
-    backup_path = settings.get("path_backup_biofiles")
-    destination_path = os.path.join(backup_path, biofile_filename)
-    shutil.move(biofile, destination_path)
-    log_biofile_message(function_name, "DEBUG", biofile_filename, f"Move biofile to {backup_path}.")
-    
-    return True
-
-
+    return loading_status
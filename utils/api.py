@@ -3,11 +3,15 @@ import requests
 import os
 import time
 import inspect
-import yaml
 import re
 import sys
 
+from utils.config_loader import get_config
+from utils.json_payload import dumps
 from utils.logger import *
+from utils.metrics import API_DURATION, UPLOADED_BYTES
+from utils.tracing import traced
+from utils.upload_stream import MultipartFileStream
 
 # Problem SSL certificate
 import urllib3
@@ -15,15 +19,45 @@ from utils.mail import *
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-# Charger le fichier de config
-CONFIG_FILE = os.getenv("CONFIG_PATH", "config/config.yaml")
-with open(CONFIG_FILE, "r") as file:
-    config = yaml.safe_load(file)
-    
-# Définir la variable globale (cf. config.yaml)
-ALLOW_INSECURE = config.get("allow_insecure", False)
-# Si allow_insecure = true alors tous les Verify=False
-VERIFY = not ALLOW_INSECURE 
+def ssl_verify():
+    """
+    Value of 'verify' for the requests (cf. 'allow_insecure' in config.yaml).
+    Read from the shared configuration: a modification is taken into account without restart.
+    """
+    # Si allow_insecure = true alors tous les Verify=False
+    return not get_config().get("allow_insecure", False)
+
+def timed_request(endpoint, send, url, **kwargs):
+    """
+    Sends a request ('send': requests.get, requests.post, session.get,...) and records its
+    latency by endpoint, method and status code ("error" if no response, cf. utils/metrics.py).
+    """
+    start = time.perf_counter()
+    status = "error"
+    try:
+        response = send(url, **kwargs)
+        status = str(response.status_code)
+        return response
+    finally:
+        method = getattr(send, "__name__", "request").upper()
+        API_DURATION.labels(endpoint=endpoint, method=method, status=status).observe(time.perf_counter() - start)
+
+def request_was_sent(error):
+    """
+    False if a request exception happened before the request was sent (connection
+    refused, DNS error, connection timeout): the server cannot have received it.
+    True otherwise (e.g. ReadTimeout, connection dropped while waiting for the response):
+    the server may have processed the request.
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return False
+    if isinstance(error, requests.exceptions.SSLError) or not isinstance(error, requests.exceptions.ConnectionError):
+        return True
+    # Connexion impossible : MaxRetryError(reason=NewConnectionError) ; connexion coupée : ProtocolError
+    reason = error.args[0] if error.args else None
+    if isinstance(reason, urllib3.exceptions.MaxRetryError):
+        reason = reason.reason
+    return not isinstance(reason, urllib3.exceptions.NewConnectionError)
 
 def get_api_endpoints(config):
     """
@@ -41,7 +75,10 @@ def get_api_endpoints(config):
         'post_biofile_snv': f"{url_diagho_api}/bio-files/snv/",
         'post_biofile_cnv': f"{url_diagho_api}/bio-files/cnv/",
         'post_config': f"{url_diagho_api}/configurations/",
-        'get_project': f"{url_diagho_api}/projects"
+        'get_project': f"{url_diagho_api}/projects",
+        'get_persons': f"{url_diagho_api}/persons",
+        'get_families': f"{url_diagho_api}/families",
+        'get_interpretations': f"{url_diagho_api}/interpretations"
     }
     
 def api_healthcheck(diagho_api, exit_on_error=False):
@@ -52,7 +89,7 @@ def api_healthcheck(diagho_api, exit_on_error=False):
     url = diagho_api['healthcheck']
     
     try:
-        response = requests.get(url, verify=VERIFY)
+        response = timed_request('healthcheck', requests.get, url, verify=ssl_verify())
         response.raise_for_status()
         return True
     except requests.exceptions.HTTPError as http_err:
@@ -158,7 +195,7 @@ def api_get_connected_user(**kwargs):
     headers = {'Authorization': f'Bearer {access_token}'}
     
     try:
-        response = requests.get(url, headers=headers, verify=VERIFY)
+        response = timed_request('get_user', requests.get, url, headers=headers, verify=ssl_verify())
         response.raise_for_status()
         user_data = response.json()
         if user_data.get('username') == config['diagho_api']['username']:
@@ -193,7 +230,7 @@ def api_post_login(**kwargs):
     
     for attempt in range(1, max_attempts + 1):
         try:
-            response = requests.post(url, headers=headers, json=payload, verify=VERIFY)
+            response = timed_request('login', requests.post, url, headers=headers, json=payload, verify=ssl_verify())
             response.raise_for_status()
             response_json = response.json()
             store_tokens(response_json)
@@ -211,10 +248,15 @@ def api_post_login(**kwargs):
 
 
 
+@traced()
 def api_post_biofile(**kwargs):
     """
     POST request to upload a biofile if it doesn't already exist.
     Returns its checksum.
+
+    If 'hash_while_uploading' is set, the MD5 of the biofile is computed from the
+    chunks being uploaded and returned as 'local_checksum' (only if the biofile
+    has been uploaded: the existence check uses the given 'checksum').
     """
     function_name = inspect.currentframe().f_code.co_name
     
@@ -225,6 +267,8 @@ def api_post_biofile(**kwargs):
     assembly = kwargs.get("assembly")
     accession_id = kwargs.get("accession_id")
     checksum = kwargs.get("checksum")
+    cancel_token = kwargs.get("cancel_token")
+    hash_while_uploading = kwargs.get("hash_while_uploading", False)
     
     # Récupérer l'info en fonction du type de biofile
     def handle_biofile_type(biofile_type, assembly, accession_id):
@@ -259,13 +303,17 @@ def api_post_biofile(**kwargs):
         log_message(function_name, "ERROR", f"{filename} - Invalid biofile_type.")
         return {"error": "Unknown Biofile type"}
     
+    # Job annulé (un autre biofile a échoué) : ne pas commencer l'upload
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+    
     # Check if biofile already exists
     url_get_biofile = diagho_api['get_biofile']
     url_with_params = f"{url_get_biofile}/?checksum={checksum}"
     log_message(function_name, "DEBUG", f"{filename} - Test if Biofile is already uploaded.")
     
     try:
-        response = requests.get(url_with_params, headers=headers, verify=VERIFY)
+        response = timed_request('get_biofile', requests.get, url_with_params, headers=headers, verify=ssl_verify())
         response.raise_for_status()
         biofile_exist = response.json().get('count')
         if biofile_exist > 0:
@@ -276,22 +324,26 @@ def api_post_biofile(**kwargs):
         log_message(function_name, "ERROR", f"{filename} - Error checking biofile existence: {str(e)}")
         return {"error": str(e)}
     
-    # Upload biofile if not already uploaded
+    # Upload biofile if not already uploaded (body streamed from disk, aborted if the job is cancelled)
     try:
-        files = {'file': (filename, open(biofile, 'rb'), 'application/octet-stream')}
         url = get_url_post_biofile(biofile_type)
-        response = requests.post(url, headers=headers, files=files, data=data, verify=VERIFY)
+        with MultipartFileStream(biofile, fields=data, cancel_token=cancel_token, compute_md5=hash_while_uploading) as body:
+            headers['Content-Type'] = body.content_type
+            response = timed_request(f'post_biofile_{biofile_type.lower()}', requests.post, url, headers=headers, data=body, verify=ssl_verify())
         response.raise_for_status()
         response_json = response.json()
         if isinstance(response_json, dict):
             # On récupère le checksum du biofile posté
             checksum = response_json.get('checksum')
+            UPLOADED_BYTES.inc(os.path.getsize(biofile))
             log_message(function_name, "INFO", f"{filename} - POST Biofile completed. Checksum: {checksum}")
-            # On retourne le checksum
+            # On retourne le checksum (+ celui calculé pendant l'upload)
+            if hash_while_uploading:
+                return {"checksum": checksum, "local_checksum": body.md5_hexdigest()}
             return {"checksum": checksum}
         log_message(function_name, "ERROR", f"{filename} - Error with POST biofile response.")
         return {"error": "Error with POST biofile response."}
-    except (requests.exceptions.RequestException, ValueError) as e:
+    except (requests.exceptions.RequestException, ValueError, OSError) as e:
         log_message(function_name, "ERROR", f"{filename} - Error uploading biofile: {str(e)}")
         return {"error": f"Error uploading biofile: {str(e)}"}
 
@@ -316,7 +368,7 @@ def api_get_loadingstatus(**kwargs):
     url_with_params = f"{url}/?checksum={checksum}"
     
     try:
-        response = requests.get(url_with_params, headers=headers, verify=VERIFY)
+        response = timed_request('get_biofile', requests.get, url_with_params, headers=headers, verify=ssl_verify())
         response.raise_for_status()
         results = response.json().get('results', [])
         if not results:
@@ -341,14 +393,83 @@ def api_get_loadingstatus(**kwargs):
         return {"error": str(e)}
 
 
+def api_get_bulk(**kwargs):
+    """
+    GET the records of an endpoint whose 'field' is one of 'values', in a few requests
+    ('batch_size' values per request, at most 'max_pages' pages followed per request).
+
+    If the endpoint ignores the '<field>__in' filter (records not requested in the
+    response) or returns more than 'max_pages' pages, the lookup is aborted.
+
+    Returns:
+        list: records found, or {"error": ...} if a request failed or the filter was not applied.
+    """
+    function_name = inspect.currentframe().f_code.co_name
+
+    diagho_api = kwargs.get("diagho_api")
+    endpoint = kwargs.get("endpoint")
+    field = kwargs.get("field")
+    values = list(kwargs.get("values"))
+    batch_size = kwargs.get("batch_size", 100)
+    max_pages = kwargs.get("max_pages", 10)
+
+    access_token = get_access_token()
+    headers = {
+        'Authorization': f'Bearer {access_token}',
+        'Accept': 'application/json'
+    }
+
+    records = []
+    try:
+        with requests.Session() as session:
+            for start in range(0, len(values), batch_size):
+                batch = [str(value) for value in values[start:start + batch_size]]
+                requested = set(batch)
+                url = f"{diagho_api[endpoint]}/"
+                params = {f"{field}__in": ",".join(batch), "page_size": batch_size}
+                pages = 0
+                while url:
+                    pages += 1
+                    if pages > max_pages:
+                        log_message(function_name, "WARNING", f"{endpoint}: more than {max_pages} pages for {len(batch)} values, filter '{field}__in' probably not applied.")
+                        return {"error": f"More than {max_pages} pages: filter '{field}__in' not applied"}
+                    response = timed_request(endpoint, session.get, url, headers=headers, params=params, verify=ssl_verify())
+                    response.raise_for_status()
+                    content = response.json()
+                    page = content if isinstance(content, list) else content.get('results', [])
+                    # Filtre ignoré par l'endpoint : enregistrements non demandés dans la réponse
+                    not_requested = [record for record in page if str(record.get(field)) not in requested]
+                    if not_requested:
+                        log_message(function_name, "WARNING", f"{endpoint}: filter '{field}__in' not applied ({len(not_requested)} records not requested).")
+                        return {"error": f"Filter '{field}__in' not applied"}
+                    records.extend(page)
+                    if isinstance(content, list):
+                        break
+                    # Page suivante : l'URL 'next' contient déjà les paramètres
+                    url, params = content.get('next'), None
+        return records
+
+    except requests.exceptions.RequestException as e:
+        log_message(function_name, "WARNING", f"{endpoint}: {str(e)}")
+        return {"error": str(e)}
+    except ValueError:
+        log_message(function_name, "WARNING", f"{endpoint}: response is not in JSON format")
+        return {"error": "Response is not in JSON format"}
+
+
+@traced()
 def api_post_config(**kwargs):
     """
-    POST request to upload a JSON configuration file.
+    POST request to upload a JSON configuration.
+
+    The configuration is the 'payload' (dict) when it is given, else it is read from 'file'.
+    It is serialized once (cf. utils/json_payload.py) into the request body.
     """
     function_name = inspect.currentframe().f_code.co_name
     
     diagho_api = kwargs.get("diagho_api")
     file = kwargs.get("file")
+    json_data = kwargs.get("payload")
     
     access_token = get_access_token()
     headers = {
@@ -357,27 +478,29 @@ def api_post_config(**kwargs):
         'Content-Type': 'application/json'
     }
     
-    # Charger le fichier JSON
-    try:
-        with open(file, 'r') as json_file:
-            json_data = json.load(json_file)
-    except json.JSONDecodeError:
-        log_message(function_name, "ERROR", f"Config file '{file}' is not valid JSON")
-        return {"error": f"Config file '{file}' is not valid JSON"}
-    
-    url = diagho_api['post_config']
+    # Charger le fichier JSON (si le contenu n'est pas déjà en mémoire)
+    if json_data is None:
+        try:
+            with open(file, 'r') as json_file:
+                json_data = json.load(json_file)
+        except json.JSONDecodeError:
+            log_message(function_name, "ERROR", f"Config file '{file}' is not valid JSON")
+            return {"error": f"Config file '{file}' is not valid JSON"}
+    body = dumps(json_data)
     
     # POST config
     try:
         url = diagho_api['post_config']
-        response = requests.post(url, headers=headers, json=json_data, verify=VERIFY)
-        print(response.json())
+        response = timed_request('post_config', requests.post, url, headers=headers, data=body, verify=ssl_verify())
+        log_message(function_name, "DEBUG", f"POST config response ({response.status_code}): {response.text}")
         response.raise_for_status()
-        log_message(function_name, "INFO", f"JSON file '{file}' posted successfully.")
+        log_message(function_name, "INFO", f"JSON file '{file}' posted successfully ({len(body)} bytes).")
         return response
     except requests.exceptions.RequestException as e:
         log_message(function_name, "ERROR", str(e))
-        return {"error": str(e)}
+        # 'status_code' : None si pas de réponse ; 'request_sent' : False si le serveur n'a pas pu recevoir la requête
+        status_code = e.response.status_code if e.response is not None else None
+        return {"error": str(e), "status_code": status_code, "request_sent": status_code is not None or request_was_sent(e)}
 
 
 
@@ -390,13 +513,19 @@ def check_api_response(response, **kwargs):
     recipients = kwargs.get('recipients')
     json_file = kwargs.get('json_file')
     
+    # Erreur avant la réponse de l'API (cf. 'api_post_config')
+    if isinstance(response, dict):
+        log_message(function_name, "ERROR", f"{os.path.basename(json_file)}: error in POST configuration: {response.get('error')}")
+        send_mail_alert(recipients, f"JSON file: {json_file}\n\nError in POST configuration: {response.get('error')}")
+        return False
+    
     log_message(function_name, "INFO", f"response.status_code = {response.status_code}")
 
     # Si OK
     if response.status_code == 201:
         log_message(function_name, "INFO", f"{os.path.basename(json_file)}: configuration file was posted in Diagho successfully")
         send_mail_info(recipients, f"JSON file: {json_file}\n\nThe JSON configuration file was posted in Diagho successfully")
-        return
+        return True
 
     # Si KO
     if response.status_code == 400:
@@ -412,6 +541,7 @@ def check_api_response(response, **kwargs):
         send_mail_alert(recipients, alert_message)
         log_message(function_name, "ERROR", f"{os.path.basename(json_file)}: error in POST configuration")
         log_message(function_name, "ERROR", f"{json_response}")
+    return False
         
         
 
@@ -434,7 +564,7 @@ def api_get_project_from_slug(**kwargs):
     url_with_params = f"{url}/{project_slug}/"
     
     try:
-        response = requests.get(url_with_params, headers=headers, verify=VERIFY)
+        response = timed_request('get_project', requests.get, url_with_params, headers=headers, verify=ssl_verify())
         response.raise_for_status()
         slug = response.json().get('slug', [])
         return slug
@@ -0,0 +1,57 @@
+import threading
+import time
+
+
+class JobCancelledError(Exception):
+    """Exception levée quand le job (fichier TSV/JSON) a été annulé."""
+    pass
+
+
+class CancellationToken:
+    """
+    Cancellation token shared by all the biofile tasks of a job.
+
+    Set by the uploader when a task fails (fail-fast policy): the other tasks
+    check it between their retries, while streaming the biofile upload and while
+    polling the loading status, and stop as soon as possible.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason = None
+
+    def cancel(self, reason=None):
+        """Cancel the job. The first reason is kept."""
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        """Raise JobCancelledError if the job has been cancelled."""
+        if self._event.is_set():
+            raise JobCancelledError(self.reason or "Job cancelled.")
+
+    def sleep(self, delay):
+        """
+        Sleep 'delay' seconds, or less if the job is cancelled meanwhile.
+
+        Raises:
+            JobCancelledError: if the job is (or becomes) cancelled.
+        """
+        self.raise_if_cancelled()
+        if self._event.wait(delay):
+            self.raise_if_cancelled()
+
+
+def cancellable_sleep(delay, cancel_token=None):
+    """
+    time.sleep() which can be interrupted by a cancellation token (if any).
+    """
+    if cancel_token is None:
+        time.sleep(delay)
+    else:
+        cancel_token.sleep(delay)
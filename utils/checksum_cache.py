@@ -0,0 +1,188 @@
+import concurrent.futures
+import inspect
+import os
+import sqlite3
+import threading
+import time
+
+from utils.file import md5
+from utils.log_context import submit_in_context
+from utils.logger import log_message
+
+
+class ChecksumCache:
+    """
+    Cache of the MD5 checksums of the biofiles.
+
+    Entries are keyed by the identity of the file (device, inode, size, mtime_ns):
+    an unchanged biofile is hashed only once, even if it is referenced by several
+    rows or sheets. Entries are held in memory and, if 'db_path' is set, persisted
+    in a SQLite database to survive restarts of the watcher.
+
+    Args:
+        db_path (str, optional): SQLite database file. In-memory only if empty.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self._memory = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._db = None
+        if db_path:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS checksums ("
+                "device INTEGER, inode INTEGER, size INTEGER, mtime_ns INTEGER, "
+                "path TEXT, md5 TEXT NOT NULL, "
+                "PRIMARY KEY (device, inode, size, mtime_ns))"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def file_key(filepath):
+        """Identity of a file: (device, inode, size, mtime_ns)."""
+        stat = os.stat(filepath)
+        return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def _get(self, key):
+        with self._lock:
+            checksum = self._memory.get(key)
+            if checksum is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT md5 FROM checksums WHERE device=? AND inode=? AND size=? AND mtime_ns=?", key
+                ).fetchone()
+                if row:
+                    checksum = row[0]
+                    self._memory[key] = checksum
+            return checksum
+
+    def _put(self, key, filepath, checksum):
+        with self._lock:
+            self._memory[key] = checksum
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO checksums (device, inode, size, mtime_ns, path, md5) VALUES (?, ?, ?, ?, ?, ?)",
+                    (*key, os.path.abspath(filepath), checksum)
+                )
+                self._db.commit()
+
+    def get(self, filepath):
+        """Returns the cached checksum of the file, or None."""
+        return self._get(self.file_key(filepath))
+
+    def put(self, filepath, checksum):
+        """Stores the checksum of the file (for its current identity)."""
+        self._put(self.file_key(filepath), filepath, checksum)
+
+    def get_or_compute(self, filepath, compute=md5):
+        """
+        Returns the checksum of the file, computed with 'compute' only if it is not cached.
+        Concurrent calls for the same file wait for a single computation.
+        """
+        function_name = inspect.currentframe().f_code.co_name
+        try:
+            key = self.file_key(filepath)
+        except OSError:
+            # Fichier absent ou illisible : pas de cache, 'compute' retourne l'erreur (cf. md5)
+            return compute(filepath)
+        checksum = self._get(key)
+        if checksum is not None:
+            log_message(function_name, "DEBUG", f"{os.path.basename(filepath)} - Checksum found in cache: {checksum}")
+            return checksum
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            try:
+                # Calculé par un autre thread pendant l'attente ?
+                checksum = self._get(key)
+                if checksum is not None:
+                    return checksum
+                checksum = compute(filepath)
+                # Ne pas mettre en cache une erreur ou un fichier modifié (ou supprimé) pendant le calcul
+                try:
+                    unchanged = self.file_key(filepath) == key
+                except OSError:
+                    unchanged = False
+                if isinstance(checksum, str) and unchanged:
+                    self._put(key, filepath, checksum)
+                return checksum
+            finally:
+                # Verrou libéré même si 'compute' lève une exception (ex. JobCancelledError)
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+# Cache partagé par tout le process (cf. 'settings.checksum_cache')
+_checksum_cache = ChecksumCache()
+
+
+def init_checksum_cache(db_path):
+    """
+    (Re)initializes the process-wide checksum cache with the SQLite file 'db_path'.
+    Nothing is done if the cache already uses this file.
+    """
+    global _checksum_cache
+    if _checksum_cache.db_path == (db_path or None):
+        return _checksum_cache
+    _checksum_cache.close()
+    _checksum_cache = ChecksumCache(db_path or None)
+    return _checksum_cache
+
+
+def get_checksum_cache():
+    """Returns the process-wide checksum cache."""
+    return _checksum_cache
+
+
+def cached_md5(filepath):
+    """
+    MD5 of a file, computed only once per file identity (cf. ChecksumCache).
+    """
+    return _checksum_cache.get_or_compute(filepath)
+
+
+def compute_checksums(filepaths, max_workers=4):
+    """
+    Computes (or gets from the cache) the MD5 of several files, in parallel.
+
+    Distinct files are hashed concurrently on 'max_workers' threads (to size according
+    to the storage: a few threads for NFS, more for local SSD).
+
+    Args:
+        filepaths (iterable): paths of the files.
+        max_workers (int): number of threads.
+
+    Returns:
+        dict: {filepath: checksum}. Files which can't be hashed are not returned.
+    """
+    function_name = inspect.currentframe().f_code.co_name
+    filepaths = list(dict.fromkeys(filepaths))  # dédoublonnage en gardant l'ordre
+    if not filepaths:
+        return {}
+
+    start = time.monotonic()
+    checksums = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {submit_in_context(executor, cached_md5, filepath): filepath for filepath in filepaths}
+        for future in concurrent.futures.as_completed(futures):
+            filepath = futures[future]
+            try:
+                checksum = future.result()
+            except OSError as e:
+                log_message(function_name, "WARNING", f"{os.path.basename(filepath)} - Can't calculate MD5: {e}")
+                continue
+            if isinstance(checksum, str):
+                checksums[filepath] = checksum
+    log_message(function_name, "DEBUG", f"{len(checksums)}/{len(filepaths)} checksums computed in {time.monotonic() - start:.1f}s ({max_workers} workers).")
+    return checksums
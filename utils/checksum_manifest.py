@@ -0,0 +1,119 @@
+import inspect
+import os
+import random
+import re
+import threading
+
+from utils.logger import log_message
+
+# Extensions des fichiers checksums écrits par le pipeline (sidecar 'sample.vcf.gz.md5' ou manifeste md5sum)
+SIDECAR_EXTENSIONS = (".md5", ".md5sum")
+MANIFEST_NAMES = ("md5sum.txt", "md5sums.txt", "MD5SUMS", "checksums.md5")
+
+# 'md5sum' : "<md5>  <file>" ou "<md5> *<file>" (binaire) ; BSD : "MD5 (<file>) = <md5>" ; sidecar : "<md5>"
+MD5SUM_LINE = re.compile(r"^\\?([0-9a-fA-F]{32})(?:\s+\*?(.+))?$")
+BSD_LINE = re.compile(r"^MD5 \((.+)\) = ([0-9a-fA-F]{32})$")
+
+
+def parse_md5_file(path):
+    """
+    Parses a '.md5' sidecar or a 'md5sum'-format manifest.
+
+    A line without filename (sidecar 'sample.vcf.gz.md5') applies to the file
+    named like the sidecar without its extension.
+
+    Returns:
+        dict: {filename: checksum}, filenames without directory.
+    """
+    function_name = inspect.currentframe().f_code.co_name
+    checksums = {}
+    default_filename = os.path.splitext(os.path.basename(path))[0]
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as file:
+            for line in file:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                match = MD5SUM_LINE.match(line)
+                if match:
+                    checksum, filename = match.group(1), match.group(2) or default_filename
+                else:
+                    match = BSD_LINE.match(line)
+                    if not match:
+                        log_message(function_name, "WARNING", f"{os.path.basename(path)} - Invalid line ignored: {line}")
+                        continue
+                    filename, checksum = match.group(1), match.group(2)
+                checksums[os.path.basename(filename.strip())] = checksum.lower()
+    except OSError as e:
+        log_message(function_name, "WARNING", f"Can't read checksum file {path}: {e}")
+    return checksums
+
+
+def is_checksum_file(filename):
+    """True if 'filename' is a '.md5' sidecar or a md5sum manifest."""
+    return filename.endswith(SIDECAR_EXTENSIONS) or filename in MANIFEST_NAMES
+
+
+def load_checksum_manifests(directory):
+    """
+    Discovers and parses in bulk all the checksum files of 'directory'.
+    Sidecars ('sample.vcf.gz.md5') override the values of the manifests.
+
+    Returns:
+        dict: {filename: checksum}
+    """
+    function_name = inspect.currentframe().f_code.co_name
+    manifests, sidecars = {}, {}
+    try:
+        entries = [entry for entry in os.scandir(directory) if entry.is_file() and is_checksum_file(entry.name)]
+    except OSError as e:
+        log_message(function_name, "WARNING", f"Can't list checksum files in {directory}: {e}")
+        return {}
+    for entry in entries:
+        target = sidecars if entry.name.endswith(SIDECAR_EXTENSIONS) else manifests
+        target.update(parse_md5_file(entry.path))
+    checksums = {**manifests, **sidecars}
+    log_message(function_name, "DEBUG", f"{len(checksums)} checksums found in {len(entries)} checksum files of: {directory}")
+    return checksums
+
+
+# Manifestes déjà chargés, par répertoire (rechargés si le contenu du répertoire change)
+_manifests = {}
+_manifests_lock = threading.Lock()
+
+
+def get_sidecar_checksums(directory):
+    """
+    Checksums provided by the checksum files of 'directory' ({filename: checksum}).
+    Loaded once, and again only when the mtime of the directory changes.
+    """
+    try:
+        mtime_ns = os.stat(directory).st_mtime_ns
+    except OSError:
+        return {}
+    with _manifests_lock:
+        cached = _manifests.get(directory)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+    checksums = load_checksum_manifests(directory)
+    with _manifests_lock:
+        _manifests[directory] = (mtime_ns, checksums)
+    return checksums
+
+
+def get_sidecar_checksum(directory, filename):
+    """Checksum of 'filename' provided by a checksum file of 'directory', or None."""
+    if not directory or not filename:
+        return None
+    return get_sidecar_checksums(directory).get(os.path.basename(filename))
+
+
+def select_sample(filenames, sample_rate, seed=None):
+    """
+    Random sample of 'filenames' to verify (at least one file if 'sample_rate' > 0).
+    """
+    filenames = sorted(set(filenames))
+    if not filenames or sample_rate <= 0:
+        return []
+    count = min(len(filenames), max(1, round(len(filenames) * sample_rate)))
+    return random.Random(seed).sample(filenames, count)
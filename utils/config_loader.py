@@ -1,17 +1,210 @@
 import inspect
+import logging
+import os
+import threading
+from types import MappingProxyType
+
 import yaml
 
-from utils.logger import log_message
+# Fichier de configuration par défaut
+CONFIG_FILE = os.getenv("CONFIG_PATH", "config/config.yaml")
+
+# Clés obligatoires du fichier de configuration
+REQUIRED_KEYS = [
+    "input_biofiles", "backup_biofiles", "backup_data",
+    "check_biofile.max_retries", "check_biofile.delay",
+    "check_loading.max_retries", "check_loading.delay",
+    "settings.max_workers",
+    "emails.recipients",
+    "diagho_api.url",
+    "accessions",
+    "interpretations.excludeColumns", "interpretations.projects",
+]
+
+# Valeurs autorisées de certaines clés
+ALLOWED_VALUES = {
+    "settings.failure_policy": ("fail-fast", "best-effort"),
+    "settings.sheet_parser": ("auto", "csv", "pandas", "pyarrow"),
+    "settings.streaming_conversion": ("auto", "always", "never"),
+    "checksum_sidecars.verify": ("deferred", "sample"),
+    "logging.log_format": ("text", "json"),
+    "tracing.format": ("chrome", "otlp"),
+    "profiling.mode": ("cprofile", "sampling"),
+    "profiling.scope": ("job", "window"),
+}
+
+# Clés dont la valeur n'est jamais écrite dans les logs
+SECRET_KEYS = ("password",)
+
+
+# Pas de 'log_message' dans ce module : 'utils.logger' lit sa configuration ici
+def _log(function_name, level, message):
+    logging.getLogger(function_name).log(logging.getLevelName(level), message)
+
+
+def freeze(value):
+    """
+    Immutable copy of a configuration value: dicts become read-only mappings, lists become tuples.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def redact_config(config):
+    """
+    Copy of the configuration (plain dicts and lists) without the secrets, to be logged.
+    """
+    if isinstance(config, (dict, MappingProxyType)):
+        return {key: "***" if key in SECRET_KEYS and value else redact_config(value) for key, value in config.items()}
+    if isinstance(config, (list, tuple)):
+        return [redact_config(item) for item in config]
+    return config
+
+
+def _get_key(config, dotted_key):
+    value = config
+    for key in dotted_key.split("."):
+        if not isinstance(value, (dict, MappingProxyType)) or key not in value:
+            raise KeyError(dotted_key)
+        value = value[key]
+    return value
+
+
+def validate_config(config):
+    """
+    Checks the configuration: required keys, allowed values and 'max_workers'.
+
+    Raises:
+        ValueError: list of all the errors found.
+    """
+    if not isinstance(config, (dict, MappingProxyType)):
+        raise ValueError("Invalid configuration: the file must contain a YAML mapping.")
+
+    errors = []
+    for dotted_key in REQUIRED_KEYS:
+        try:
+            _get_key(config, dotted_key)
+        except KeyError:
+            errors.append(f"missing key '{dotted_key}'")
+
+    for dotted_key, allowed in ALLOWED_VALUES.items():
+        try:
+            value = _get_key(config, dotted_key)
+        except KeyError:
+            continue
+        if value not in allowed:
+            errors.append(f"invalid value for '{dotted_key}': {value!r} (allowed: {', '.join(allowed)})")
+
+    try:
+        max_workers = _get_key(config, "settings.max_workers")
+        if not isinstance(max_workers, int) or max_workers < 1:
+            errors.append(f"invalid value for 'settings.max_workers': {max_workers!r} (positive integer expected)")
+    except KeyError:
+        pass
+
+    if errors:
+        raise ValueError("Invalid configuration: " + "; ".join(errors) + ".")
+
+
+class ConfigStore:
+    """
+    Configuration file parsed once, shared by all the modules.
+
+    The file is parsed again only when its mtime changes: edits are taken into
+    account without restarting the watcher. If the new content is invalid, the
+    previous configuration is kept.
+
+    Args:
+        config_path (str): YAML configuration file.
+    """
+
+    def __init__(self, config_path):
+        self.config_path = config_path
+        self.config = None
+        self.settings = None
+        self._mtime_ns = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with open(self.config_path, "r") as file:
+            config = yaml.safe_load(file)
+        validate_config(config)
+        config = freeze(config)
+        return config, load_configuration(config)
+
+    def get(self):
+        """
+        Current configuration, parsed again only if the file has been modified.
+
+        Returns:
+            tuple: (config, settings), both read-only.
+        """
+        function_name = inspect.currentframe().f_code.co_name
+        try:
+            mtime_ns = os.stat(self.config_path).st_mtime_ns
+        except OSError:
+            if self.config is None:
+                raise
+            return self.config, self.settings
+        if mtime_ns == self._mtime_ns:
+            return self.config, self.settings
+
+        with self._lock:
+            if mtime_ns != self._mtime_ns:
+                try:
+                    config, settings = self._load()
+                except (OSError, ValueError, yaml.YAMLError) as e:
+                    if self.config is None:
+                        raise
+                    # Configuration modifiée mais invalide : garder la précédente
+                    _log(function_name, "ERROR", f"Can't reload config_file {self.config_path}, previous configuration kept: {e}")
+                    self._mtime_ns = mtime_ns
+                    return self.config, self.settings
+                action = "Reload" if self.config is not None else "Load"
+                self.config, self.settings, self._mtime_ns = config, settings, mtime_ns
+                _log(function_name, "INFO", f"{action} config_file: {self.config_path}")
+                _log(function_name, "DEBUG", f"Config: {redact_config(config)}")
+        return self.config, self.settings
+
+
+# Configurations chargées, par fichier
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def _get_store(config_path=None):
+    config_path = os.path.abspath(config_path or CONFIG_FILE)
+    with _stores_lock:
+        store = _stores.get(config_path)
+        if store is None:
+            store = _stores[config_path] = ConfigStore(config_path)
+    return store
+
+
+def get_config(config_path=None):
+    """
+    Read-only configuration of 'config_path' (default: CONFIG_PATH or config/config.yaml).
+    Parsed once, and again only when the file is modified.
+    """
+    return _get_store(config_path).get()[0]
+
+
+def get_settings(config_path=None):
+    """
+    Read-only settings of 'config_path' (cf. 'load_configuration'), shared by all the modules.
+    """
+    return _get_store(config_path).get()[1]
+
 
 def load_config(config_path):
     """
-    Loads a YAML configuration file and returns it as a dictionary.
+    Loads a YAML configuration file and returns it as a (read-only) dictionary.
     """
-    function_name = inspect.currentframe().f_code.co_name
-    log_message(function_name, "INFO", f"Load config_file: {config_path}")
-    with open(config_path, "r") as file:
-        return yaml.safe_load(file)
-    
+    return get_config(config_path)
+
 
 def load_configuration(config):
     """
@@ -21,12 +214,9 @@ def load_configuration(config):
         config (dict): settings dict
 
     Returns:
-        dict: structured dict
+        dict: structured dict (read-only)
     """
-    function_name = inspect.currentframe().f_code.co_name
-    log_message(function_name, "DEBUG", f"Load config: {config}")
-    
-    return {
+    return MappingProxyType({
         "recipients": config['emails']['recipients'],
         "path_biofiles": config['input_biofiles'],
         "path_backup_biofiles": config['backup_biofiles'],
@@ -36,7 +226,27 @@ def load_configuration(config):
         "check_loading_max_retries": config['check_loading']['max_retries'],
         "check_loading_delay": config['check_loading']['delay'],
         "max_workers": config['settings']['max_workers'],
+        "failure_policy": config['settings'].get('failure_policy', 'fail-fast'),
+        "checksum_cache": config['settings'].get('checksum_cache', ''),
+        "incremental": config['settings'].get('incremental', False),
+        "sheet_state": config['settings'].get('sheet_state', ''),
+        "hash_workers": config['settings'].get('hash_workers', 4),
+        "hash_while_uploading": config['settings'].get('hash_while_uploading', False),
+        "sheet_parser": config['settings'].get('sheet_parser', 'auto'),
+        "streaming_conversion": config['settings'].get('streaming_conversion', 'auto'),
+        "streaming_threshold_mb": config['settings'].get('streaming_threshold_mb', 50),
+        "json_audit": config['settings'].get('json_audit', True),
+        "preflight": config['settings'].get('preflight', False),
+        "checksum_sidecars_enabled": config.get('checksum_sidecars', {}).get('enabled', False),
+        "checksum_sidecars_verify": config.get('checksum_sidecars', {}).get('verify', 'deferred'),
+        "checksum_sidecars_sample_rate": config.get('checksum_sidecars', {}).get('sample_rate', 0.1),
+        "sharding_enabled": config.get('sharding', {}).get('enabled', False),
+        "sharding_families_per_shard": config.get('sharding', {}).get('families_per_shard', 1),
+        "sharding_max_workers": config.get('sharding', {}).get('max_workers', 4),
+        "sharding_max_retries": config.get('sharding', {}).get('max_retries', 3),
+        "sharding_retry_delay": config.get('sharding', {}).get('retry_delay', 5),
+        "sharding_min_families": config.get('sharding', {}).get('min_families', 50),
         "accessions": config['accessions'],
         "excludeColumns": config['interpretations']['excludeColumns'],
         "projects": config['interpretations']['projects']
-    }
+    })
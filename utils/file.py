@@ -5,7 +5,10 @@ import os
 import time
 
 from utils.api import api_get_loadingstatus
+from utils.cancellation import cancellable_sleep
 from utils.logger import *
+from utils.metrics import MD5_BYTES, MD5_SECONDS
+from utils.tracing import traced
 
 
 def get_biofile_informations(data, filename):
@@ -15,9 +18,13 @@ def get_biofile_informations(data, filename):
     return next((item for item in data if item.get("filename") == filename), None)
 
 
-def wait_for_biofile(biofile, max_retries=100, delay=10):
+@traced()
+def wait_for_biofile(biofile, max_retries=100, delay=10, cancel_token=None):
     """
     Waits for the biofile to exist, with a limited number of attempts.
+
+    Raises:
+        JobCancelledError: if the job is cancelled while waiting.
     """
     function_name = inspect.currentframe().f_code.co_name
     biofile_filename = os.path.basename(biofile)
@@ -32,8 +39,8 @@ def wait_for_biofile(biofile, max_retries=100, delay=10):
         if os.path.exists(biofile):
             log_biofile_message(function_name, "INFO", biofile_filename, f"Biofile found. Continue.")
             return True
-        log_biofile_message(function_name, "WARNING", biofile_filename, f"Biofile not found... attempt {attempt}")
-        time.sleep(delay)
+        log_biofile_message(function_name, "WARNING", biofile_filename, "Biofile not found... attempt %d", attempt)
+        cancellable_sleep(delay, cancel_token)
         
     log_biofile_message(function_name, "ERROR", biofile_filename, f"Biofile not found after {max_retries} attempt. Exit.")
     return False  # Fail after all attempts
@@ -58,16 +65,35 @@ def get_biofile_type(biofile):
         raise ValueError(error_message)
 
  
-def md5(filepath):
+# Taille du buffer de lecture pour le calcul du MD5 (hashlib libère le GIL sur les gros buffers)
+MD5_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+@traced()
+def md5(filepath, chunk_size=MD5_CHUNK_SIZE):
     """
     Computes the MD5 hash of a file.
+
+    The file is read with 'readinto' in a single pre-allocated buffer of 'chunk_size'
+    bytes: no allocation per chunk, and hashlib releases the GIL while hashing each
+    chunk, so several files can be hashed in parallel by threads.
     """
     function_name = inspect.currentframe().f_code.co_name
     hash_md5 = hashlib.md5()
+    start = time.perf_counter()
+    total = 0
     try:
-        with open(filepath, 'rb') as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                hash_md5.update(chunk)
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        with open(filepath, 'rb', buffering=0) as f:
+            while True:
+                size = f.readinto(buffer)
+                if not size:
+                    break
+                hash_md5.update(view[:size])
+                total += size
+        MD5_BYTES.inc(total)
+        MD5_SECONDS.inc(time.perf_counter() - start)
         return hash_md5.hexdigest()
     except FileNotFoundError:
         error_msg = f"File not found: {filepath}"
@@ -91,6 +117,7 @@ def check_md5sum(checksum1, checksum2):
     return checksum1.lower() == checksum2.lower()
 
 
+@traced()
 def check_loading_status(attempt, **kwargs):
     """
     Check the loadinfg status.
@@ -99,11 +126,15 @@ def check_loading_status(attempt, **kwargs):
         True : file is loaded (status = 'success')
         False : loading failed (status = 'failure')
         None : if number of attempts exceeded or status unknown
+
+    Raises:
+        JobCancelledError: if the job is cancelled ('cancel_token') while polling.
     """
     function_name = inspect.currentframe().f_code.co_name
     
     settings = kwargs.get("settings")
     biofile_filename = kwargs.get("biofile_filename")
+    cancel_token = kwargs.get("cancel_token")
     
     max_retries = settings["check_loading_max_retries"]
     delay = settings["check_loading_delay"]
@@ -113,12 +144,12 @@ def check_loading_status(attempt, **kwargs):
 
     # Obtenir le statut de chargement initial
     status = get_status()
-    log_biofile_message(function_name, "DEBUG", biofile_filename, f"Loading initial status: {status}")
+    log_biofile_message(function_name, "DEBUG", biofile_filename, "Loading initial status: %s", status)
 
     # Plusieurs tentatives... Tant que le statut n'est pas 0 ou 3 (FAILURE ou SUCCESS)
     while status.lower() not in ["failure", "success"] and attempt < max_retries:
-        log_biofile_message(function_name, "INFO", biofile_filename, f"Attempt {attempt + 1}: loading_status = {status} ... Retry...")
-        time.sleep(delay)
+        log_biofile_message(function_name, "INFO", biofile_filename, "Attempt %d: loading_status = %s ... Retry...", attempt + 1, status)
+        cancellable_sleep(delay, cancel_token)
         status = get_status()
         attempt += 1
     
@@ -0,0 +1,58 @@
+import concurrent.futures
+import inspect
+import json
+import os
+
+from utils.logger import log_message
+
+# Encodeur JSON rapide si disponible (optionnel : 'pip install orjson')
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def dumps(payload):
+    """
+    Serializes the payload for the request body (compact UTF-8 JSON, bytes).
+    Uses 'orjson' if it is installed, else the standard 'json' module.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def write_json_file(payload, output_file):
+    """
+    Writes the payload in a pretty-printed JSON file (audit of what is posted).
+    Written in a temporary file then renamed: the file is never seen partially written.
+    """
+    function_name = inspect.currentframe().f_code.co_name
+    tmp_file = f"{output_file}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as formatted_file:
+        json.dump(payload, formatted_file, ensure_ascii=False, indent=4)
+    os.replace(tmp_file, output_file)
+    log_message(function_name, "INFO", f"Write JSON: {output_file}")
+    return output_file
+
+
+# Un seul thread : les fichiers d'audit sont écrits dans l'ordre, hors du chemin critique
+_audit_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="json-audit")
+
+
+def _write_audit_file(payload, output_file):
+    function_name = "write_json_file_async"
+    try:
+        return write_json_file(payload, output_file)
+    except (OSError, TypeError, ValueError) as e:
+        log_message(function_name, "WARNING", f"Can't write JSON audit file {output_file}: {e}")
+
+
+def write_json_file_async(payload, output_file):
+    """
+    Writes the audit JSON file in background. The payload must not be modified afterwards.
+
+    Returns:
+        Future: result = 'output_file' (None if the file could not be written).
+    """
+    return _audit_executor.submit(_write_audit_file, payload, output_file)
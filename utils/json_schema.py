@@ -0,0 +1,298 @@
+import re
+
+# Schéma JSON (draft 7, sous-ensemble) du JSON bulkCreation posté dans Diagho
+# (cf. tabulated2json.BulkConfigurationBuilder)
+IDENTIFIER = {"type": "string", "minLength": 1}
+CHECKSUM = {"type": "string", "pattern": r"^[0-9a-fA-F]{32}$"}
+
+PERSON_SCHEMA = {
+    "type": "object",
+    "required": ["identifier"],
+    "properties": {
+        "identifier": IDENTIFIER,
+        "sex": {"type": "string"},
+        "firstName": {"type": "string"},
+        "lastName": {"type": "string"},
+        "birthday": {"type": "string", "pattern": r"^\d{4}-\d{2}-\d{2}$"},
+        "motherIdentifier": {"type": "string"},
+        "fatherIdentifier": {"type": "string"},
+        "note": {"type": "string"},
+    },
+}
+
+FAMILY_SCHEMA = {
+    "type": "object",
+    "required": ["identifier", "persons"],
+    "properties": {
+        "identifier": IDENTIFIER,
+        "persons": {"type": "array", "minItems": 1, "items": PERSON_SCHEMA},
+    },
+}
+
+FILE_SCHEMA = {
+    "type": "object",
+    "required": ["filename", "checksum", "assembly", "samples"],
+    "properties": {
+        "filename": IDENTIFIER,
+        "checksum": CHECKSUM,
+        "assembly": IDENTIFIER,
+        "samples": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["name", "person"],
+                "properties": {
+                    "name": IDENTIFIER,
+                    "person": IDENTIFIER,
+                    "bamPath": {"type": "string"},
+                },
+            },
+        },
+    },
+}
+
+INTERPRETATION_SCHEMA = {
+    "type": "object",
+    "required": ["title", "indexCase", "project", "datas"],
+    "properties": {
+        "title": IDENTIFIER,
+        "indexCase": IDENTIFIER,
+        "project": IDENTIFIER,
+        "assignee": {"type": "string"},
+        "priority": {"enum": ["low", "normal", "high", "highest"]},
+        "datas": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["title", "type", "samples"],
+                "properties": {
+                    "title": IDENTIFIER,
+                    "type": IDENTIFIER,
+                    "samples": {
+                        "type": "array",
+                        "minItems": 1,
+                        "items": {
+                            "type": "object",
+                            "required": ["name", "checksum"],
+                            "properties": {
+                                "name": IDENTIFIER,
+                                "isAffected": {"type": "boolean"},
+                                "checksum": CHECKSUM,
+                            },
+                        },
+                    },
+                    "excludeColumns": {"type": "array", "items": {"type": "string"}},
+                    "pretags": {"type": "array", "items": {"type": "object"}},
+                },
+            },
+        },
+    },
+}
+
+BULK_CONFIGURATION_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "title": "Diagho bulkCreation configuration",
+    "type": "object",
+    "required": ["families", "files", "interpretations"],
+    "properties": {
+        "families": {"type": "array", "items": FAMILY_SCHEMA},
+        "files": {"type": "array", "items": FILE_SCHEMA},
+        "interpretations": {"type": "array", "items": INTERPRETATION_SCHEMA},
+    },
+}
+
+# Types JSON -> types Python (un contenu en mémoire peut contenir des tuples, cf. config figée)
+TYPES = {
+    "object": (dict,),
+    "array": (list, tuple),
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "null": (type(None),),
+}
+
+
+class SchemaValidationError(ValueError):
+    """JSON content not valid: 'errors' holds every violation, as (path, message)."""
+
+    def __init__(self, errors, max_reported=20):
+        self.errors = errors
+        lines = [f"{path}: {message}" for path, message in errors[:max_reported]]
+        if len(errors) > max_reported:
+            lines.append(f"... and {len(errors) - max_reported} more error(s).")
+        super().__init__(f"{len(errors)} error(s) in the JSON content:\n" + "\n".join(lines))
+
+
+class _CodeGenerator:
+    """
+    Generates the source of a validator function for a schema: one Python function
+    with all the checks inlined (no call per node), the path of a value being
+    built only when an error is reported.
+    """
+
+    def __init__(self):
+        self.lines = []
+        self.constants = {}
+        self._counter = 0
+
+    def name(self, prefix):
+        self._counter += 1
+        return f"{prefix}{self._counter}"
+
+    def constant(self, value):
+        name = self.name("_c")
+        self.constants[name] = value
+        return name
+
+    def emit(self, indent, line):
+        self.lines.append("    " * indent + line)
+
+    def error(self, indent, path, message_expr):
+        self.emit(indent, f"append(({path.expr()}, {message_expr}))")
+
+    def node(self, schema, var, path, indent):
+        """Emits the checks of 'schema' for the variable 'var' at 'indent'."""
+        known = None
+        if "type" in schema:
+            names = [schema["type"]] if isinstance(schema["type"], str) else list(schema["type"])
+            python_types = tuple(t for n in names for t in TYPES[n])
+            condition = f"isinstance({var}, {self.constant(python_types)})"
+            if bool not in python_types and int in python_types:
+                # bool est un int en Python, mais pas un nombre en JSON
+                condition = f"({condition} and not isinstance({var}, bool))"
+            self.emit(indent, f"if not {condition}:")
+            self.error(indent + 1, path, f"{repr('must be of type ' + str(schema['type']) + ', not ')} + type({var}).__name__")
+            if not self.has_checks(schema):
+                return
+            # Les vérifications suivantes ne s'appliquent que si le type est bon
+            self.emit(indent, "else:")
+            indent += 1
+            known = names[0] if len(names) == 1 else None
+        self.checks(schema, var, path, indent, known)
+
+    @staticmethod
+    def has_checks(schema):
+        return any(keyword in schema for keyword in ("enum", "minLength", "pattern", "required", "properties", "items", "minItems"))
+
+    def guard(self, indent, var, known, json_type, python_types):
+        """Emits an 'isinstance' guard unless the type is already checked. Returns the indent of the block."""
+        if known == json_type:
+            return indent
+        self.emit(indent, f"if isinstance({var}, {python_types}):")
+        return indent + 1
+
+    def checks(self, schema, var, path, indent, known=None):
+        if not self.has_checks(schema):
+            self.emit(indent, "pass")
+            return
+
+        if "enum" in schema:
+            allowed = self.constant(list(schema["enum"]))
+            self.emit(indent, f"if {var} not in {allowed}:")
+            self.error(indent + 1, path, f"{repr('must be one of ' + str(list(schema['enum'])) + ', not ')} + repr({var})")
+
+        if "minLength" in schema or "pattern" in schema:
+            block = self.guard(indent, var, known, "string", "str")
+            min_length = schema.get("minLength", 0)
+            keyword = "if"
+            if min_length:
+                message = "must not be empty" if min_length == 1 else f"must have at least {min_length} characters"
+                self.emit(block, f"if len({var}) < {min_length}:")
+                self.error(block + 1, path, repr(message))
+                keyword = "elif"
+            if "pattern" in schema:
+                pattern = self.constant(re.compile(schema["pattern"]))
+                self.emit(block, f"{keyword} not {pattern}.search({var}):")
+                self.error(block + 1, path, f"repr({var}) + {repr(' does not match ' + schema['pattern'])}")
+
+        if "required" in schema or "properties" in schema:
+            block = self.guard(indent, var, known, "object", "dict")
+            for key in schema.get("required", []):
+                self.emit(block, f"if {key!r} not in {var}:")
+                self.error(block + 1, path, repr(f"missing required key '{key}'"))
+            for key, sub_schema in schema.get("properties", {}).items():
+                child = self.name("v")
+                self.emit(block, f"{child} = {var}.get({key!r}, _MISSING)")
+                self.emit(block, f"if {child} is not _MISSING:")
+                self.node(sub_schema, child, path.key(key), block + 1)
+
+        if "items" in schema or "minItems" in schema:
+            block = self.guard(indent, var, known, "array", "(list, tuple)")
+            if schema.get("minItems"):
+                self.emit(block, f"if len({var}) < {schema['minItems']}:")
+                self.error(block + 1, path, repr(f"must have at least {schema['minItems']} item(s)"))
+            if "items" in schema:
+                index, item = self.name("i"), self.name("v")
+                self.emit(block, f"for {index}, {item} in enumerate({var}):")
+                self.node(schema["items"], item, path.index(index), block + 1)
+
+
+class _Path:
+    """Path of a value in the generated code: literal keys and loop index variables."""
+
+    def __init__(self, parts=()):
+        self.parts = parts
+
+    def key(self, key):
+        return _Path(self.parts + (("." if self.parts else "") + str(key).replace("{", "{{").replace("}", "}}"),))
+
+    def index(self, variable):
+        return _Path(self.parts + (f"[{{{variable}}}]",))
+
+    def expr(self):
+        if not self.parts:
+            return repr("<root>")
+        return "f" + repr("".join(self.parts))
+
+
+_MISSING = object()
+
+
+def compile_schema(schema):
+    """
+    Compiles a JSON Schema (keywords: type, enum, required, properties, items,
+    minItems, minLength, pattern) once into a validator function: Python source
+    with every check inlined is generated, then compiled (as fastjsonschema does),
+    so that validating a document costs a few bytecodes per value.
+
+    Returns:
+        callable: validator(instance) -> list of errors (path, message), empty if valid.
+            Every violation is reported, not only the first one.
+    """
+    generator = _CodeGenerator()
+    generator.node(schema, "data", _Path(), 2)
+    # Constantes et built-ins en variables locales / de closure (plus rapides que les globales)
+    names = ", ".join(["_MISSING", *generator.constants])
+    header = [
+        f"def _make_validator({names}):",
+        "    def validator(data, isinstance=isinstance, enumerate=enumerate, len=len, type=type, repr=repr):",
+        "        errors = []",
+        "        append = errors.append",
+    ]
+    source = "\n".join(header + generator.lines + ["        return errors", "    return validator"])
+
+    namespace = {}
+    exec(compile(source, "<json_schema>", "exec"), namespace)
+    validator = namespace["_make_validator"](_MISSING, *generator.constants.values())
+    validator.source = source
+    return validator
+
+
+# Validateur du JSON bulkCreation, compilé une seule fois
+_bulk_validator = None
+
+
+def validate_bulk_configuration(json_data):
+    """
+    Validates a JSON bulkCreation content against BULK_CONFIGURATION_SCHEMA.
+
+    Returns:
+        list: every violation as (path, message), empty if the content is valid.
+    """
+    global _bulk_validator
+    if _bulk_validator is None:
+        _bulk_validator = compile_schema(BULK_CONFIGURATION_SCHEMA)
+    return _bulk_validator(json_data)
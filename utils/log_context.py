@@ -0,0 +1,120 @@
+import contextlib
+import contextvars
+import inspect
+import json
+import logging
+import time
+import uuid
+
+from utils.cancellation import JobCancelledError
+from utils.logger import log_message
+from utils.metrics import STAGE_DURATION
+
+# Contexte du job en cours, ajouté à chaque log (cf. ContextFilter). Les contextvars suivent
+# le thread qui les définit : les tâches des executors sont lancées avec 'submit_in_context'
+JOB_ID = contextvars.ContextVar("job_id", default=None)
+SHEET = contextvars.ContextVar("sheet", default=None)
+BIOFILE = contextvars.ContextVar("biofile", default=None)
+CHECKSUM = contextvars.ContextVar("checksum", default=None)
+STAGE = contextvars.ContextVar("stage", default=None)
+
+CONTEXT_FIELDS = {"job_id": JOB_ID, "sheet": SHEET, "biofile": BIOFILE, "checksum": CHECKSUM, "stage": STAGE}
+
+# Étapes d'un job (cf. 'stage')
+STAGES = ("parse", "validate", "hash", "upload", "load", "post")
+
+
+@contextlib.contextmanager
+def job_context(sheet):
+    """Context of the processing of a sheet: a new job ID, set in all its logs."""
+    tokens = [(JOB_ID, JOB_ID.set(uuid.uuid4().hex[:12])), (SHEET, SHEET.set(sheet))]
+    try:
+        yield JOB_ID.get()
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+@contextlib.contextmanager
+def biofile_context(biofile, checksum=None):
+    """Context of the processing of one biofile of the job."""
+    tokens = [(BIOFILE, BIOFILE.set(biofile)), (CHECKSUM, CHECKSUM.set(checksum))]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def set_checksum(checksum):
+    """Checksum of the biofile, once known (computed after the start of 'biofile_context')."""
+    CHECKSUM.set(checksum)
+
+
+@contextlib.contextmanager
+def stage(name, **fields):
+    """
+    Stage of the job (parse, validate, hash, upload, load, post): logs its start and
+    its end, with its duration ('elapsed_ms') and its status ('ok', 'error' or 'cancelled').
+
+    Args:
+        name (str): stage name.
+        **fields: other fields of the end record (e.g. bytes=...), in the JSON logs.
+    """
+    function_name = inspect.currentframe().f_code.co_name
+    token = STAGE.set(name)
+    start = time.perf_counter()
+    log_message(function_name, "DEBUG", "Stage '%s' started.", name)
+    status = "ok"
+    try:
+        yield fields
+    except BaseException as e:
+        status = "cancelled" if isinstance(e, JobCancelledError) else "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_DURATION.labels(stage=name, status=status).observe(elapsed)
+        elapsed_ms = round(elapsed * 1000, 1)
+        logging.getLogger(function_name).info(
+            "Stage '%s' %s in %.1f ms.", name, "done" if status == "ok" else status, elapsed_ms,
+            extra={"event": "stage", "elapsed_ms": elapsed_ms, "status": status, "fields": fields},
+        )
+        STAGE.reset(token)
+
+
+def submit_in_context(executor, function, *args, **kwargs):
+    """executor.submit(), the task running in a copy of the context of the caller (job, sheet,...)."""
+    return executor.submit(contextvars.copy_context().run, function, *args, **kwargs)
+
+
+class ContextFilter(logging.Filter):
+    """Adds the context of the job (job_id, sheet, biofile, checksum, stage) to the records."""
+
+    def filter(self, record):
+        for field, var in CONTEXT_FIELDS.items():
+            if getattr(record, field, None) is None:
+                setattr(record, field, var.get())
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, context of the job and stage fields."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        for field in ("event", "elapsed_ms", "status"):
+            if hasattr(record, field):
+                entry[field] = getattr(record, field)
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
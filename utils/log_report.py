@@ -0,0 +1,126 @@
+import glob
+import json
+import os
+from datetime import datetime
+
+from utils.log_context import STAGES
+
+
+def read_json_logs(paths):
+    """
+    Records of JSON-lines log files (cf. 'log_format: json'), rotated files included.
+    Lines that are not JSON (e.g. text logs) are skipped.
+    """
+    for path in paths:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                line = line.strip()
+                if not line.startswith("{"):
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def find_log_files(log_directory, filename="diagho_uploader.jsonl"):
+    """JSON log file of 'log_directory' and its rotated copies, oldest first."""
+    files = glob.glob(os.path.join(log_directory, f"{filename}*"))
+    return sorted(files, key=lambda path: (path == os.path.join(log_directory, filename), path))
+
+
+def percentile(values, fraction):
+    """Percentile of sorted 'values' (nearest rank)."""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(fraction * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+def build_report(records):
+    """
+    Aggregates the stage records of the JSON logs.
+
+    Returns:
+        dict: {"stages": {stage: statistics}, "jobs": [job summary], "throughput": {...}}
+    """
+    durations = {}
+    errors = {}
+    jobs = {}
+    uploaded_bytes = 0
+    upload_ms = 0.0
+    biofiles_loaded = 0
+    for record in records:
+        job_id = record.get("job_id")
+        if job_id:
+            job = jobs.setdefault(job_id, {"job_id": job_id, "sheet": record.get("sheet"), "start": record["time"], "end": record["time"],
+                                           "biofiles": set(), "stages_ms": {}, "errors": 0})
+            job["start"], job["end"] = min(job["start"], record["time"]), max(job["end"], record["time"])
+            if record.get("biofile"):
+                job["biofiles"].add(record["biofile"])
+        if record.get("event") != "stage":
+            continue
+
+        name = record.get("stage")
+        elapsed_ms = float(record.get("elapsed_ms", 0))
+        durations.setdefault(name, []).append(elapsed_ms)
+        if record.get("status") != "ok":
+            errors[name] = errors.get(name, 0) + 1
+            if job_id:
+                jobs[job_id]["errors"] += 1
+        if job_id:
+            stages_ms = jobs[job_id]["stages_ms"]
+            stages_ms[name] = stages_ms.get(name, 0.0) + elapsed_ms
+        if name == "upload" and record.get("status") == "ok":
+            uploaded_bytes += int(record.get("bytes", 0))
+            upload_ms += elapsed_ms
+        if name == "load" and record.get("loaded"):
+            biofiles_loaded += 1
+
+    stages = {}
+    for name in sorted(durations, key=lambda name: (STAGES.index(name) if name in STAGES else len(STAGES), str(name))):
+        values = sorted(durations[name])
+        stages[name] = {
+            "count": len(values),
+            "errors": errors.get(name, 0),
+            "total_ms": round(sum(values), 1),
+            "mean_ms": round(sum(values) / len(values), 1),
+            "p50_ms": percentile(values, 0.5),
+            "p95_ms": percentile(values, 0.95),
+            "max_ms": values[-1],
+        }
+
+    job_list = []
+    for job in sorted(jobs.values(), key=lambda job: job["start"]):
+        elapsed = datetime.fromisoformat(job["end"]) - datetime.fromisoformat(job["start"])
+        job_list.append({**job, "biofiles": len(job["biofiles"]), "elapsed_s": round(elapsed.total_seconds(), 1)})
+
+    hours = sum(job["elapsed_s"] for job in job_list) / 3600
+    return {
+        "stages": stages,
+        "jobs": job_list,
+        "throughput": {
+            "uploaded_bytes": uploaded_bytes,
+            "upload_mb_per_s": round(uploaded_bytes / 1024 / 1024 / (upload_ms / 1000), 2) if upload_ms else 0.0,
+            "biofiles_loaded": biofiles_loaded,
+            "biofiles_per_hour": round(biofiles_loaded / hours, 1) if hours else 0.0,
+        },
+    }
+
+
+def format_report(report):
+    """Text version of the report (cf. 'build_report')."""
+    lines = ["Stages:", f"  {'stage':<10} {'count':>7} {'errors':>7} {'total s':>10} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10}"]
+    for name, stats in report["stages"].items():
+        lines.append(f"  {name:<10} {stats['count']:>7} {stats['errors']:>7} {stats['total_ms'] / 1000:>10.1f} "
+                     f"{stats['mean_ms']:>10.1f} {stats['p50_ms']:>10.1f} {stats['p95_ms']:>10.1f} {stats['max_ms']:>10.1f}")
+    lines += ["", "Jobs:"]
+    for job in report["jobs"]:
+        slowest = max(job["stages_ms"], key=job["stages_ms"].get) if job["stages_ms"] else "-"
+        lines.append(f"  {job['start']}  {job['job_id']}  {job['sheet']}: {job['elapsed_s']} s, {job['biofiles']} biofiles, "
+                     f"{job['errors']} failed stages, slowest stage: {slowest}")
+    throughput = report["throughput"]
+    lines += ["", "Throughput:",
+              f"  uploaded: {throughput['uploaded_bytes'] / 1024 / 1024:.1f} MB at {throughput['upload_mb_per_s']} MB/s",
+              f"  biofiles loaded: {throughput['biofiles_loaded']} ({throughput['biofiles_per_hour']} per hour of job)"]
+    return "\n".join(lines)
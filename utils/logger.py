@@ -1,54 +1,149 @@
+import atexit
 import logging
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 import os
+import queue
 import sys
-import yaml
 
-# Charger la configuration depuis config.yaml
-config_file = "config/config.yaml"
-with open(config_file, "r") as file:
-    config = yaml.safe_load(file)
+# Paramètres des logs (cf. section 'logging' de config.yaml), appliqués par 'configure_logging'
+LOG_FORMAT = "[%(asctime)s][%(levelname)s][%(name)s] %(message)s"
+LOG_LEVEL = "INFO"
+LOG_DIRECTORY = "logs"
+LOG_ROTATION_WHEN = "W0"
+LOG_ROTATION_INTERVAL = 1
+LOG_BACKUP_COUNT = 52
+LOG_CONSOLE = True
+LOG_FORMAT_TYPE = "text"
+
+# Niveaux acceptés par 'log_message' (un niveau inconnu est logué en DEBUG)
+LEVELS = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+    "CRITICAL": logging.CRITICAL,
+}
+
+# Chemin du fichier de log pour FILE_WATCHER (JSON lines si 'log_format: json')
+log_filename = "diagho_uploader.log"
+json_log_filename = "diagho_uploader.jsonl"
 
-# Récupérer le niveau de logs du fichier de config (par défaut = INFO)
-LOG_LEVEL = config.get("logging", {}).get("log_level", "INFO")
+# Configuration du logger
+logger = logging.getLogger("FILE_WATCHER")
 
-# Récupérer le répertoire des logs depuis la config
-LOG_DIRECTORY = config.get("logging", {}).get("log_directory", "logs")
-os.makedirs(LOG_DIRECTORY, exist_ok=True)
 
-# Récupérer les paramètres de rotation des logs depuis la config
-LOG_ROTATION_WHEN = config.get("logging", {}).get("log_rotation_when", "W0")
-LOG_ROTATION_INTERVAL = config.get("logging", {}).get("log_rotation_interval", 1)
-LOG_BACKUP_COUNT = config.get("logging", {}).get("log_backup_count", 52)
+# Thread unique d'écriture des logs (cf. 'configure_logging')
+_listener = None
 
-# Chemin du fichier de log pour FILE_WATCHER
-log_filename = "diagho_uploader.log"
-log_file = os.path.join(LOG_DIRECTORY, log_filename)
+# Loggers déjà créés, par nom (évite 'logging.getLogger' et son verrou à chaque message)
+_loggers = {}
 
-# Configuration du logger
-logger = logging.getLogger("FILE_WATCHER")
-logger.setLevel(LOG_LEVEL)
 
+def get_logger(name):
+    """Returns the logger 'name' (cached)."""
+    logger = _loggers.get(name)
+    if logger is None:
+        logger = _loggers[name] = logging.getLogger(name)
+    return logger
+
+
+def configure_logging(config):
+    """
+    Configures the logs (rotating file + console) from the 'logging' section of the configuration.
+    Called explicitly by 'main' : importing the modules does not open any log file.
+
+    The threads only put their records in a queue (QueueHandler, no lock on the
+    file or the console): a single thread (QueueListener) formats and writes them.
+    Each record gets the context of its job (cf. utils/log_context.py); with
+    'log_format: json' the log file is written as JSON lines.
+
+    Args:
+        config (dict): configuration (cf. utils/config_loader.py)
 
-def setup_logger(name, log_file, level=LOG_LEVEL):
+    Returns:
+        str: log file
+    """
+    global LOG_LEVEL, LOG_DIRECTORY, LOG_ROTATION_WHEN, LOG_ROTATION_INTERVAL, LOG_BACKUP_COUNT, LOG_CONSOLE, LOG_FORMAT_TYPE, _listener
+    from utils.log_context import ContextFilter, JsonFormatter
+    logging_config = config.get("logging", {})
+
+    # Niveau de logs (par défaut = INFO), répertoire et rotation des logs
+    LOG_LEVEL = logging_config.get("log_level", LOG_LEVEL)
+    LOG_DIRECTORY = logging_config.get("log_directory", LOG_DIRECTORY)
+    LOG_ROTATION_WHEN = logging_config.get("log_rotation_when", LOG_ROTATION_WHEN)
+    LOG_ROTATION_INTERVAL = logging_config.get("log_rotation_interval", LOG_ROTATION_INTERVAL)
+    LOG_BACKUP_COUNT = logging_config.get("log_backup_count", LOG_BACKUP_COUNT)
+    LOG_CONSOLE = logging_config.get("log_console", LOG_CONSOLE)
+    LOG_FORMAT_TYPE = logging_config.get("log_format", LOG_FORMAT_TYPE)
+
+    os.makedirs(LOG_DIRECTORY, exist_ok=True)
+    log_file = os.path.join(LOG_DIRECTORY, json_log_filename if LOG_FORMAT_TYPE == "json" else log_filename)
+    logger.setLevel(LOG_LEVEL)
+
+    # Reconfiguration : vider la file et fermer les handlers précédents (pas de handlers en double)
+    stop_logging()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [
+        TimedRotatingFileHandler(
+            log_file, 
+            when=LOG_ROTATION_WHEN,
+            interval=LOG_ROTATION_INTERVAL,
+            backupCount=LOG_BACKUP_COUNT,
+            encoding="utf-8", 
+            delay=False),                                               # Rotation de logs
+    ]
+    handlers[0].setFormatter(JsonFormatter() if LOG_FORMAT_TYPE == "json" else formatter)
+    if LOG_CONSOLE:
+        handlers.append(logging.StreamHandler(sys.stdout))              # Afficher les logs sur la console
+        handlers[-1].setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()                                     # Non bornée : un thread ne bloque jamais sur un log
+    _listener = QueueListener(log_queue, *handlers)
+    _listener.start()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())                            # Contexte du job : lu dans le thread qui logue
+    root.addHandler(queue_handler)
+    root.setLevel(LOG_LEVEL)                                            # Définir le niveau de log minimum
+    return log_file
+
+
+def stop_logging():
+    """Writes the records still in the queue and stops the writer thread (at exit, or before a reconfiguration)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+def setup_logger(name, log_file, level=None):
     """
     Creates and returns a logger with a specific file.
 
     Args:
         name (str): logger name
         log_file (str): logs file
-        level (str, optional): log level. Defaults to logging.INFO.
+        level (str, optional): log level. Defaults to LOG_LEVEL.
 
     Returns:
         logger
     """
     logger = logging.getLogger(name)
-    logger.setLevel(level)
+    logger.setLevel(level or LOG_LEVEL)
     
     # Vérifier si le logger a déjà des handlers pour éviter les doublons
     if not logger.hasHandlers():
         # Format du message
-        formatter = logging.Formatter("[%(asctime)s][%(levelname)s][%(name)s] %(message)s")
+        formatter = logging.Formatter(LOG_FORMAT)
         
         # Handler pour la rotation des logs
         file_handler = TimedRotatingFileHandler(
@@ -72,51 +167,24 @@ def setup_logger(name, log_file, level=LOG_LEVEL):
     return logger
 
 
-# Empêcher les handlers en double si le script est relancé
-if not logger.handlers:
-    
-    logging.basicConfig(
-        level=LOG_LEVEL,                                                # Définir le niveau de log minimum
-        format="[%(asctime)s][%(levelname)s][%(name)s] %(message)s",    # Format du message
-        handlers=[
-            TimedRotatingFileHandler(
-                log_file, 
-                when=LOG_ROTATION_WHEN,
-                interval=LOG_ROTATION_INTERVAL,
-                backupCount=LOG_BACKUP_COUNT,
-                encoding="utf-8", 
-                delay=False),                                           # Rotation de logs
-            logging.StreamHandler(sys.stdout),                          # Afficher les logs sur la console
-        ],
-        force=True)  # Force la reconfiguration et l'écriture immédiate
-
-
 # Fonction de log générique
-def log_message(logger_name, level, message):
+def log_message(logger_name, level, message, *args):
     """
     Logs a message at a given level.
 
     Args:
         logger_name (str): logger name.
         level (str): log level (INFO, WARNING, ERROR, etc.).
-        message (str): Message.
+        message (str): Message, formatted with 'args' ('%' style) only if the level is enabled.
     """
-    logger = logging.getLogger(logger_name)
-
-    if level.upper() == 'INFO':
-        logger.info(message)
-    elif level.upper() == 'WARNING':
-        logger.warning(message)
-    elif level.upper() == 'ERROR':
-        logger.error(message)
-    elif level.upper() == 'DEBUG':
-        logger.debug(message)
-    else:
-        logger.log(logging.DEBUG, message)
+    levelno = LEVELS.get(level) or LEVELS.get(level.upper(), logging.DEBUG)
+    logger = get_logger(logger_name)
+    if logger.isEnabledFor(levelno):
+        logger.log(levelno, message, *args)
 
 
 # Fonction de log générique pour un biofile
-def log_biofile_message(logger_name, level, biofile_name, message):
+def log_biofile_message(logger_name, level, biofile_name, message, *args):
     """
     Logs a message for a BIOFILE file at a given level.
     The message is of the form: BIOFILE_NAME - MESSAGE
@@ -125,19 +193,12 @@ def log_biofile_message(logger_name, level, biofile_name, message):
         logger_name (str): logger name.
         level (str): log level (INFO, WARNING, ERROR, etc.).
         biofile_name (str): name of the biofile.
-        message (str): Message.
+        message (str): Message, formatted with 'args' ('%' style) only if the level is enabled.
     """
-    logger = logging.getLogger(logger_name)
-    log_message = f"{biofile_name} - {message}"
-
-    if level.upper() == 'INFO':
-        logger.info(log_message)
-    elif level.upper() == 'WARNING':
-        logger.warning(log_message)
-    elif level.upper() == 'ERROR':
-        logger.error(log_message)
-    elif level.upper() == 'DEBUG':
-        logger.debug(log_message)
-    else:
-        logger.log(logging.DEBUG, log_message)
-
+    levelno = LEVELS.get(level) or LEVELS.get(level.upper(), logging.DEBUG)
+    logger = get_logger(logger_name)
+    if logger.isEnabledFor(levelno):
+        if args:
+            logger.log(levelno, "%s - " + message, biofile_name, *args, extra={"biofile": biofile_name})
+        else:
+            logger.log(levelno, "%s - %s", biofile_name, message, extra={"biofile": biofile_name})
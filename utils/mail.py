@@ -1,85 +1,289 @@
+import atexit
 import inspect
+import queue
 import smtplib
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.utils import formataddr
 import socket
-import yaml
 import re
 
+from utils.config_loader import get_config
 from utils.logger import *
 
-CONFIG_FILE = os.getenv("CONFIG_PATH", "config/config.yaml")
+# Validation des adresses email (compilée une fois)
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
 
-def get_send_mail_flag(config_path):
+# Fin du thread d'envoi (cf. MailDispatcher.close)
+_STOP = object()
+
+
+def get_send_mail_flag(config_path=None):
     """Get the value of 'send_mail_flag" in config."""
-    with open(config_path, 'r') as file:
-        config = yaml.safe_load(file)
+    config = get_config(config_path)
     return config.get('emails', {}).get('send_mail_flag', 0)
 
-SEND_MAIL_FLAG = get_send_mail_flag(CONFIG_FILE)
 
-def send_mail(recipients: str, subject: str, content: str, config=CONFIG_FILE):
+def parse_recipients(recipients):
+    """
+    List of the addresses of 'recipients' (separated by commas), or None if one of them is invalid.
+    """
+    recipient_list = [email.strip() for email in recipients.split(',')]
+    if not all(EMAIL_PATTERN.match(email) for email in recipient_list):
+        log_message("EMAIL", "ERROR", f"Invalid email address in recipient list: {recipient_list}")
+        return None
+    return recipient_list
+
+
+def build_message(from_email, recipient_list, subject, content):
+    """Plain text email."""
+    message = MIMEMultipart()
+    message['From'] = from_email
+    message['To'] = ', '.join(recipient_list)
+    message['Subject'] = subject
+    message.attach(MIMEText(content, 'plain'))
+    return message.as_string()
+
+
+def send_mail(recipients: str, subject: str, content: str, config=None):
     """
-    Sends an email.
-    
+    Sends an email synchronously, on a new SMTP connection (cf. MailDispatcher for the watcher).
+
     Args:
         recipients (str): One or more recipients, separated by commas.
         subject (str): Subject of the email.
         content (str): Content of the email.
+        config (str, optional): configuration file (default: CONFIG_PATH).
     """
     function_name = inspect.currentframe().f_code.co_name
-    
-    # Lire la configuration dans fichier YAML
-    with open(config, 'r') as file:
-        config = yaml.safe_load(file)
-        
+
+    # Configuration partagée (relue seulement si le fichier a été modifié)
+    config = get_config(config)
+
     # Paramètres du serveur SMTP
     smtp_server = config['smtp']['server']
     smtp_port = config['smtp']['port']
     use_tls = config['smtp']['use_tls']
     from_email = config['smtp']['from_email_format'].format(hostname=socket.gethostname())
-    
-    # Split la string des destinataires
-    recipient_list = [email.strip() for email in recipients.split(',')]
-    
-    # Validation des adresses email
-    def validate_email(email):
-        regex = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return re.match(regex, email) is not None
-    if not all(validate_email(email) for email in recipient_list):
-        log_message("EMAIL", "ERROR", f"Invalid email address in recipient list: {recipient_list}")
+
+    # Split la string des destinataires + validation des adresses email
+    recipient_list = parse_recipients(recipients)
+    if recipient_list is None:
         return
-    
-    # Création du message
-    message = MIMEMultipart()
-    message['From'] = from_email
-    message['To'] = ', '.join(recipient_list)
-    message['Subject'] = subject
-    message.attach(MIMEText(content, 'plain'))
-    
+
     try:
         with smtplib.SMTP(smtp_server, smtp_port) as server:
             server.helo()
             if use_tls:
                 server.starttls()
-            server.sendmail(from_email, recipient_list, message.as_string())
+            server.sendmail(from_email, recipient_list, build_message(from_email, recipient_list, subject, content))
         log_message(function_name, "INFO", f"Email sent successfully to: {recipient_list}")
     except Exception as e:
         log_message(function_name, "ERROR", f": {str(e)}")
-        
+
+
+class MailDispatcher:
+    """
+    Sends the emails from a background thread, on one long-lived SMTP connection.
+
+    'enqueue' never blocks the caller (upload and polling threads): the emails wait in
+    a bounded queue (an email is dropped, and logged, if the queue is full). The
+    connection is opened at the first email, closed after 'idle_timeout' seconds
+    without email, and reopened when the server drops it (each email is retried
+    'max_retries' times, 'retry_delay' seconds apart).
+
+    Args:
+        smtp (dict, optional): 'smtp' section (server, port, use_tls, from_email_format);
+            default: that of the configuration, read at each connection.
+        config_path (str, optional): configuration file (default: CONFIG_PATH).
+    """
+
+    def __init__(self, smtp=None, config_path=None, queue_size=100, idle_timeout=60, max_retries=3, retry_delay=5, timeout=30):
+        self.smtp = smtp
+        self.config_path = config_path
+        self.idle_timeout = idle_timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.connections = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._server = None
+        self._from_email = None
+
+    def enqueue(self, recipients, subject, content):
+        """
+        Queues an email (non-blocking).
+
+        Returns:
+            bool: False if the recipients are invalid or the queue is full (email dropped).
+        """
+        function_name = inspect.currentframe().f_code.co_name
+        recipient_list = parse_recipients(recipients)
+        if recipient_list is None:
+            return False
+        self._start()
+        try:
+            self._queue.put_nowait((recipient_list, subject, content))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            log_message(function_name, "ERROR", "Mail queue full (%d emails): email '%s' to %s dropped.", self._queue.maxsize, subject, recipient_list)
+            return False
+        return True
+
+    def flush(self, timeout=None):
+        """
+        Waits until the queued emails are sent (or failed).
+
+        Returns:
+            bool: False if 'timeout' expired first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout=30):
+        """Sends the queued emails (at most 'timeout' seconds), then stops the thread and closes the connection."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="mail-dispatcher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                self._disconnect()  # connexion inactive : fermée avant que le serveur ne la coupe
+                continue
+            try:
+                if item is _STOP:
+                    self._disconnect()
+                    return
+                self._deliver(*item)
+            finally:
+                self._queue.task_done()
+
+    def _connect(self):
+        smtp = self.smtp if self.smtp is not None else get_config(self.config_path)['smtp']
+        server = smtplib.SMTP(smtp['server'], smtp['port'], timeout=self.timeout)
+        try:
+            server.helo()
+            if smtp.get('use_tls', False):
+                server.starttls()
+        except BaseException:
+            server.close()
+            raise
+        self._server = server
+        self._from_email = smtp['from_email_format'].format(hostname=socket.gethostname())
+        self.connections += 1
+
+    def _disconnect(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            self._server.close()
+        self._server = None
+
+    def _deliver(self, recipient_list, subject, content):
+        function_name = "send_mail"
+        for attempt in range(self.max_retries + 1):
+            try:
+                if self._server is None:
+                    self._connect()
+                self._server.sendmail(self._from_email, recipient_list, build_message(self._from_email, recipient_list, subject, content))
+                self.sent += 1
+                log_message(function_name, "INFO", f"Email sent successfully to: {recipient_list}")
+                return True
+            except smtplib.SMTPRecipientsRefused as e:
+                # Erreur permanente : pas de nouvel essai
+                log_message(function_name, "ERROR", f"Recipients refused: {e.recipients}")
+                break
+            except (smtplib.SMTPException, OSError) as e:
+                # Connexion coupée ou serveur indisponible : reconnexion au prochain essai
+                self._disconnect()
+                if attempt < self.max_retries:
+                    log_message(function_name, "WARNING", "Attempt %d: failed to send email '%s' (%s). Retry in %s s.", attempt + 1, subject, e, self.retry_delay)
+                    time.sleep(self.retry_delay)
+                else:
+                    log_message(function_name, "ERROR", f"Failed to send email '{subject}' to {recipient_list}: {e}")
+        self.failed += 1
+        return False
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_mail_dispatcher(config_path=None):
+    """Dispatcher of the process, created at the first email (settings of the 'smtp' section)."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            smtp = get_config(config_path).get('smtp', {})
+            _dispatcher = MailDispatcher(
+                config_path=config_path,
+                queue_size=smtp.get('queue_size', 100),
+                idle_timeout=smtp.get('idle_timeout', 60),
+                max_retries=smtp.get('max_retries', 3),
+                retry_delay=smtp.get('retry_delay', 5),
+                timeout=smtp.get('timeout', 30),
+            )
+        return _dispatcher
+
+
+def close_mail_dispatcher(timeout=30):
+    """Sends the emails still queued (e.g. the alert of the stop of the watcher) before exit."""
+    with _dispatcher_lock:
+        dispatcher = _dispatcher
+    if dispatcher is not None:
+        dispatcher.close(timeout)
+
+
+atexit.register(close_mail_dispatcher)
+
 
 # Ces deux fonctions pour spécifier l'objet du mail par défaut : ALERT ou INFO
-def send_mail_alert(recipients: str, content: str,send_mail_flag=SEND_MAIL_FLAG):
+# L'envoi est asynchrone : le mail est mis en file (cf. MailDispatcher)
+def send_mail_alert(recipients: str, content: str, send_mail_flag=None):
+    if send_mail_flag is None:
+        send_mail_flag = get_send_mail_flag()
     if send_mail_flag and recipients:
         function_name = inspect.currentframe().f_code.co_name
         log_message(function_name, "WARNING", f"Send alert.")
         subject = "[ALERT] Diagho-Uploader"
-        send_mail(recipients, subject, content)
+        get_mail_dispatcher().enqueue(recipients, subject, content)
 
-def send_mail_info(recipients: str, content: str, send_mail_flag=SEND_MAIL_FLAG):
+def send_mail_info(recipients: str, content: str, send_mail_flag=None):
+    if send_mail_flag is None:
+        send_mail_flag = get_send_mail_flag()
     if send_mail_flag and recipients:
         function_name = inspect.currentframe().f_code.co_name
         log_message(function_name, "INFO", f"Send info.")
         subject = "[INFO] Diagho-Uploader"
-        send_mail(recipients, subject, content)
+        get_mail_dispatcher().enqueue(recipients, subject, content)
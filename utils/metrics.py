@@ -0,0 +1,233 @@
+import http.server
+import inspect
+import threading
+
+from utils.logger import log_message
+
+# Bornes (s) des histogrammes de durées : de la requête API (ms) au chargement d'un biofile (heures)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200, 14400)
+
+
+def _escape(value):
+    """Label value escaped as in the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    """Metric with labels: one child (value) per combination of label values."""
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def labels(self, **labels):
+        """Child of the metric for these label values."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        return self._children[()]
+
+    def collect(self):
+        """Lines of the metric in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            children = list(self._children.items())
+        for key, child in sorted(children):
+            lines.extend(child.collect(self.name, self.labelnames, key))
+        return lines
+
+
+class _Value:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+    def collect(self, name, labelnames, key):
+        return [f"{name}{_format_labels(labelnames, key)} {_format_value(self.value)}"]
+
+
+class Counter(_Metric):
+    """Monotonic counter (e.g. bytes uploaded)."""
+
+    type = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+
+class Gauge(_Metric):
+    """Value that goes up and down (e.g. jobs running)."""
+
+    type = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+    def dec(self, amount=1):
+        self._default().dec(amount)
+
+    def set(self, value):
+        self._default().set(value)
+
+
+class _HistogramValue:
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        with self._lock:
+            self.sum += value
+            self.count += 1
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[index] += 1
+                    break
+
+    def collect(self, name, labelnames, key):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f"{name}_bucket{_format_labels(labelnames, key, [('le', _format_value(bound))])} {cumulative}")
+        lines.append(f"{name}_bucket{_format_labels(labelnames, key, [('le', '+Inf')])} {count}")
+        lines.append(f"{name}_sum{_format_labels(labelnames, key)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labelnames, key)} {count}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Distribution of durations (count, sum and cumulative buckets)."""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+
+class Registry:
+    """Metrics of the process, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.collect()) + "\n"
+
+
+REGISTRY = Registry()
+
+# Métriques du watcher
+SHEET_DURATION = REGISTRY.register(Histogram(
+    "diagho_sheet_duration_seconds", "Processing time of a sheet (conversion to configuration POST).", ["status"]))
+STAGE_DURATION = REGISTRY.register(Histogram(
+    "diagho_stage_duration_seconds", "Duration of the stages of a job (parse, validate, hash, upload, load, post).", ["stage", "status"]))
+API_DURATION = REGISTRY.register(Histogram(
+    "diagho_api_request_duration_seconds", "Latency of the Diagho API calls.", ["endpoint", "method", "status"]))
+UPLOADED_BYTES = REGISTRY.register(Counter(
+    "diagho_uploaded_bytes_total", "Bytes of biofiles uploaded to Diagho."))
+MD5_BYTES = REGISTRY.register(Counter(
+    "diagho_md5_bytes_total", "Bytes hashed (MD5 of the biofiles)."))
+MD5_SECONDS = REGISTRY.register(Counter(
+    "diagho_md5_seconds_total", "Time spent hashing (MD5 throughput = rate(bytes) / rate(seconds))."))
+JOBS = REGISTRY.register(Gauge(
+    "diagho_jobs", "Sheets detected by the watcher, by state.", ["state"]))
+BIOFILE_TASKS_RUNNING = REGISTRY.register(Gauge(
+    "diagho_biofile_tasks_running", "Biofiles being processed (wait, hash, upload, load)."))
+LOADING_WAIT = REGISTRY.register(Histogram(
+    "diagho_loading_wait_seconds", "Time waiting for the loading of a biofile in Diagho (check_loading_status).", ["result"]))
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # pas de log par requête de scraping
+
+
+def start_metrics_server(host="127.0.0.1", port=9108):
+    """
+    Serves the metrics (GET /metrics) from a background thread.
+
+    Returns:
+        ThreadingHTTPServer: the server ('server_address' holds the port, if 0 was given).
+    """
+    function_name = inspect.currentframe().f_code.co_name
+    server = http.server.ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    log_message(function_name, "INFO", f"Metrics served on http://{server.server_address[0]}:{server.server_address[1]}/metrics")
+    return server
+
@@ -0,0 +1,160 @@
+import inspect
+import threading
+
+from utils.api import api_get_bulk
+from utils.logger import log_message
+
+# Recherches faites avant tout upload : endpoint -> champ recherché
+LOOKUPS = {
+    "get_persons": "identifier",
+    "get_families": "identifier",
+    "get_interpretations": "title",
+}
+
+
+def _identifier(value, key="identifier"):
+    """Identifier of a nested record ({"identifier": ...}) or of a plain reference."""
+    if isinstance(value, dict):
+        return value.get(key)
+    return value
+
+
+class PreflightCache:
+    """
+    Records already looked up in Diagho during the run, by (endpoint, value).
+    A value not found is cached too (None): it is not looked up again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records = {}
+
+    def lookup(self, endpoint, values, fetch):
+        """
+        Records of 'endpoint' for 'values': only the values not in the cache are fetched.
+
+        Args:
+            endpoint (str): key of the endpoint in 'diagho_api'.
+            values (iterable): values of the field looked up.
+            fetch (callable): fetch(endpoint, values) -> list of records, or {"error": ...}.
+
+        Returns:
+            dict: {value: record} for the values found, or None if the fetch failed.
+        """
+        function_name = inspect.currentframe().f_code.co_name
+        field = LOOKUPS[endpoint]
+        values = {str(value) for value in values if value not in (None, "")}
+        with self._lock:
+            missing = sorted(value for value in values if (endpoint, value) not in self._records)
+        if missing:
+            records = fetch(endpoint, missing)
+            missing = set(missing)
+            if isinstance(records, dict):
+                log_message(function_name, "WARNING", f"Pre-flight lookup '{endpoint}' skipped: {records.get('error')}")
+                return None
+            with self._lock:
+                for value in missing:
+                    self._records.setdefault((endpoint, value), None)
+                # Seuls les enregistrements demandés sont gardés
+                for record in records:
+                    value = str(record.get(field))
+                    if value in missing:
+                        self._records[(endpoint, value)] = record
+        with self._lock:
+            return {value: self._records[(endpoint, value)] for value in values if self._records.get((endpoint, value)) is not None}
+
+
+def sheet_identifiers(json_data):
+    """Identifiers of the persons, families and interpretations of the JSON content."""
+    families = json_data.get("families", [])
+    return {
+        "get_persons": {person.get("identifier") for family in families for person in family.get("persons", [])},
+        "get_families": {family.get("identifier") for family in families},
+        "get_interpretations": {interpretation.get("title") for interpretation in json_data.get("interpretations", [])},
+    }
+
+
+def find_conflicts(json_data, persons=None, families=None, interpretations=None):
+    """
+    Conflicts between the JSON content and the records already in Diagho, which
+    would make the configuration POST fail.
+
+    Args:
+        json_data (dict): JSON bulkCreation content.
+        persons (dict, optional): {identifier: person record} found in Diagho.
+        families (dict, optional): {identifier: family record} found in Diagho.
+        interpretations (dict, optional): {title: interpretation record} found in Diagho.
+
+    Returns:
+        list: one message per conflict (empty if none).
+    """
+    conflicts = []
+
+    # Famille de chaque personne : dans la feuille, puis dans Diagho
+    sheet_family = {}
+    for family in json_data.get("families", []):
+        for person in family.get("persons", []):
+            person_id = person.get("identifier")
+            if person_id in sheet_family and sheet_family[person_id] != family.get("identifier"):
+                conflicts.append(f"Person '{person_id}' is in two families of the sheet: '{sheet_family[person_id]}' and '{family.get('identifier')}'.")
+                continue
+            sheet_family[person_id] = family.get("identifier")
+
+    diagho_family = {}
+    for family_id, family in (families or {}).items():
+        for person in family.get("persons", []):
+            diagho_family[str(_identifier(person))] = family_id
+    for person_id, person in (persons or {}).items():
+        family_id = _identifier(person.get("family"))
+        if family_id is not None:
+            diagho_family[person_id] = str(family_id)
+
+    for person_id, family_id in sheet_family.items():
+        existing = diagho_family.get(str(person_id))
+        if existing is not None and existing != str(family_id):
+            conflicts.append(f"Person '{person_id}' of family '{family_id}' already exists in Diagho in another family: '{existing}'.")
+
+    # Interprétation existante avec le même titre pour un autre cas index
+    for interpretation in json_data.get("interpretations", []):
+        existing = (interpretations or {}).get(str(interpretation.get("title")))
+        if existing is None:
+            continue
+        existing_index = _identifier(existing.get("indexCase"))
+        if existing_index is not None and str(existing_index) != str(interpretation.get("indexCase")):
+            conflicts.append(
+                f"Interpretation '{interpretation.get('title')}' already exists in Diagho for another index case: "
+                f"'{existing_index}' (sheet: '{interpretation.get('indexCase')}')."
+            )
+    return conflicts
+
+
+def run_preflight(json_data, diagho_api, cache=None, fetch=None):
+    """
+    Pre-flight checks before any biofile is uploaded: looks up in bulk the persons,
+    families and interpretations of the sheet in Diagho, then checks for conflicts.
+
+    A lookup that fails (endpoint unavailable, network error) is skipped: its
+    conflicts are then only detected by the final configuration POST.
+
+    Args:
+        json_data (dict): JSON bulkCreation content.
+        diagho_api (dict): API endpoints.
+        cache (PreflightCache, optional): cache of the run.
+        fetch (callable, optional): fetch(endpoint, values), default: bulk GET of the API.
+
+    Returns:
+        list: conflicts (cf. 'find_conflicts').
+    """
+    function_name = inspect.currentframe().f_code.co_name
+    cache = cache if cache is not None else PreflightCache()
+    if fetch is None:
+        def fetch(endpoint, values):
+            return api_get_bulk(diagho_api=diagho_api, endpoint=endpoint, field=LOOKUPS[endpoint], values=values)
+
+    found = {}
+    for endpoint, values in sheet_identifiers(json_data).items():
+        records = cache.lookup(endpoint, values, fetch)
+        found[endpoint] = records = records if records is not None else {}
+        log_message(function_name, "DEBUG", f"Pre-flight '{endpoint}': {len(records)}/{len(values)} already in Diagho.")
+
+    return find_conflicts(json_data, found["get_persons"], found["get_families"], found["get_interpretations"])
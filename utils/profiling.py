@@ -0,0 +1,320 @@
+import collections
+import contextlib
+import cProfile
+import inspect
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+from utils import logger as logger_module
+from utils.logger import log_message
+
+# Modes de profilage et périmètre (cf. section 'profiling' de config.yaml, option --profile de main.py)
+PROFILE_MODES = ("cprofile", "sampling")
+PROFILE_SCOPES = ("job", "window")
+
+# Nombre de lignes des rapports texte
+REPORT_LINES = 40
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler of all the threads: a background thread records the stack of
+    every thread each 'interval' seconds (wall-clock: time waiting for the network or
+    a lock is counted, unlike with cProfile, which only sees the thread that enabled it).
+    """
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.samples = 0
+        self.stacks = collections.Counter()  # (thread name, frame, ...) -> samples
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        """Stacks in the "collapsed" format (thread;caller;...;function count), for flame graphs (speedscope, flamegraph.pl)."""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+    def report(self, lines=REPORT_LINES):
+        """Functions with the most samples: on the top of the stack (self) and anywhere in the stack (total)."""
+        own = collections.Counter()
+        total = collections.Counter()
+        threads = collections.Counter()
+        for stack, count in self.stacks.items():
+            threads[stack[0]] += count
+            if len(stack) > 1:
+                own[stack[-1]] += count
+            for frame in set(stack[1:]):
+                total[frame] += count
+        samples = max(self.samples, 1)
+        out = [f"{self.samples} samples every {self.interval * 1000:g} ms ({self.samples * self.interval:.1f} s), % of the samples:", "", "Threads:"]
+        out += [f"  {count / samples:7.1%}  {name}" for name, count in threads.most_common()]
+        out += ["", "Self (top of the stack):"]
+        out += [f"  {count / samples:7.1%}  {frame}" for frame, count in own.most_common(lines)]
+        out += ["", "Total (anywhere in the stack):"]
+        out += [f"  {count / samples:7.1%}  {frame}" for frame, count in total.most_common(lines)]
+        return "\n".join(out) + "\n"
+
+
+class ProfileSession:
+    """
+    One profiling session (a job or a window): cProfile or sampling profiler,
+    and tracemalloc snapshots at its start and end if 'tracemalloc_frames' > 0.
+    """
+
+    def __init__(self, mode="sampling", interval=0.01, tracemalloc_frames=0):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profiling mode: {mode!r} (allowed: {', '.join(PROFILE_MODES)})")
+        self.mode = mode
+        self.tracemalloc_frames = tracemalloc_frames
+        self.profiler = cProfile.Profile() if mode == "cprofile" else SamplingProfiler(interval)
+        self.elapsed = 0.0
+        self._start = None
+        self._snapshot = None
+        self._memory = None
+
+    def start(self):
+        if self.tracemalloc_frames:
+            tracemalloc.start(self.tracemalloc_frames)
+            self._snapshot = tracemalloc.take_snapshot()
+        self._start = time.perf_counter()
+        if self.mode == "cprofile":
+            self.profiler.enable()
+        else:
+            self.profiler.start()
+
+    def stop(self):
+        if self.mode == "cprofile":
+            self.profiler.disable()
+        else:
+            self.profiler.stop()
+        self.elapsed = time.perf_counter() - self._start
+        if self.tracemalloc_frames:
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            self._memory = (current, peak, snapshot)
+
+    def memory_report(self, lines=REPORT_LINES):
+        """Allocations still alive at the end of the session (compared to its start), and peak."""
+        current, peak, snapshot = self._memory
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap>")]
+        snapshot = snapshot.filter_traces(filters)
+        out = [f"Traced memory: {current / 1024 / 1024:.1f} MB at the end, peak {peak / 1024 / 1024:.1f} MB", "",
+               "Allocations since the start (by line):"]
+        for stat in snapshot.compare_to(self._snapshot.filter_traces(filters), "lineno")[:lines]:
+            out.append(f"  {stat.size_diff / 1024:+12.1f} KB {stat.count_diff:+9d} blocks  {stat.traceback}")
+        out += ["", "Largest allocations alive (with their callers):"]
+        for stat in snapshot.statistics("traceback")[:min(lines, 10)]:
+            out.append(f"  {stat.size / 1024:12.1f} KB {stat.count:9d} blocks")
+            out += [f"      {line}" for line in stat.traceback.format()]
+        return "\n".join(out) + "\n"
+
+    def write(self, directory, name):
+        """
+        Writes the reports of the session in 'directory':
+            cProfile: <name>.prof (pstats / snakeviz) and <name>.profile.txt
+            sampling: <name>.collapsed (flame graph) and <name>.profile.txt
+            tracemalloc: <name>.memory.txt
+
+        Returns:
+            list: files written
+        """
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, name)
+        files = []
+        if self.mode == "cprofile":
+            self.profiler.dump_stats(f"{base}.prof")
+            files.append(f"{base}.prof")
+            stream = io.StringIO()
+            stats = pstats.Stats(self.profiler, stream=stream)
+            stream.write(f"cProfile of the watcher thread (conversion, validation, POST; not the biofile threads), {self.elapsed:.1f} s\n")
+            stats.sort_stats("cumulative").print_stats(REPORT_LINES)
+            stats.sort_stats("tottime").print_stats(REPORT_LINES)
+            report = stream.getvalue()
+        else:
+            with open(f"{base}.collapsed", "w", encoding="utf-8") as file:
+                file.write(self.profiler.collapsed())
+            files.append(f"{base}.collapsed")
+            report = self.profiler.report()
+        with open(f"{base}.profile.txt", "w", encoding="utf-8") as file:
+            file.write(report)
+        files.append(f"{base}.profile.txt")
+        if self._memory is not None:
+            with open(f"{base}.memory.txt", "w", encoding="utf-8") as file:
+                file.write(self.memory_report())
+            files.append(f"{base}.memory.txt")
+        return files
+
+
+class Profiling:
+    """Profiling settings of the process, and the session in progress (one at a time)."""
+
+    def __init__(self):
+        self.enabled = False
+        self.mode = "sampling"
+        self.scope = "job"
+        self.max_jobs = 1
+        self.duration = 600
+        self.interval = 0.01
+        self.tracemalloc_frames = 0
+        self.directory = os.path.join(logger_module.LOG_DIRECTORY, "profiles")
+        self.jobs_profiled = 0
+        self.window = None  # (session, name, deadline) de la fenêtre en cours
+        self._lock = threading.Lock()
+        self._active = False
+
+    def new_session(self):
+        return ProfileSession(self.mode, self.interval, self.tracemalloc_frames)
+
+    def acquire(self):
+        """True if no other session is in progress (cProfile and tracemalloc cannot be nested)."""
+        with self._lock:
+            if self._active:
+                return False
+            self._active = True
+            return True
+
+    def release(self):
+        with self._lock:
+            self._active = False
+
+
+PROFILING = Profiling()
+
+
+def configure_profiling(config, mode=None):
+    """
+    Configures the profiling from the 'profiling' section of the configuration.
+    The reports are written in the 'profiles' sub-directory of the log directory.
+
+    Args:
+        config (dict): configuration (cf. utils/config_loader.py)
+        mode (str, optional): mode given on the command line (--profile): enables the profiling.
+
+    Returns:
+        Profiling: settings (a window session is started at once)
+    """
+    function_name = inspect.currentframe().f_code.co_name
+    profiling_config = config.get("profiling", {})
+    PROFILING.enabled = bool(mode) or bool(profiling_config.get("enabled", False))
+    PROFILING.mode = mode if mode in PROFILE_MODES else profiling_config.get("mode", "sampling")
+    PROFILING.scope = profiling_config.get("scope", "job")
+    PROFILING.max_jobs = int(profiling_config.get("max_jobs", 1))
+    PROFILING.duration = float(profiling_config.get("duration", 600))
+    PROFILING.interval = float(profiling_config.get("interval", 0.01))
+    PROFILING.tracemalloc_frames = int(profiling_config.get("tracemalloc_frames", 10)) if profiling_config.get("tracemalloc", True) else 0
+    PROFILING.directory = os.path.join(config.get("logging", {}).get("log_directory", logger_module.LOG_DIRECTORY), "profiles")
+    if PROFILING.mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profiling mode: {PROFILING.mode!r} (allowed: {', '.join(PROFILE_MODES)})")
+    if PROFILING.scope not in PROFILE_SCOPES:
+        raise ValueError(f"Unknown profiling scope: {PROFILING.scope!r} (allowed: {', '.join(PROFILE_SCOPES)})")
+
+    if PROFILING.enabled:
+        log_message(function_name, "WARNING", "Profiling enabled: mode %s, scope %s, tracemalloc %s, reports in %s",
+                    PROFILING.mode, PROFILING.scope, "on" if PROFILING.tracemalloc_frames else "off", PROFILING.directory)
+        if PROFILING.scope == "window":
+            start_profiling_window(PROFILING.duration)
+    return PROFILING
+
+
+def _write_reports(session, name):
+    function_name = "profiling"
+    try:
+        files = session.write(PROFILING.directory, name)
+        log_message(function_name, "INFO", "Profile written (%.1f s profiled): %s", session.elapsed, ", ".join(files))
+    except OSError as e:
+        log_message(function_name, "ERROR", "Failed to write the profile: %s", e)
+
+
+def start_profiling_window(duration):
+    """
+    Profiles the process for 'duration' seconds from now (reports named 'window_<date>').
+    The window is closed by 'check_profiling_window', from the thread that opened it
+    (cProfile only profiles this thread and must be disabled by it).
+
+    Returns:
+        bool: False if a session is already in progress.
+    """
+    if not PROFILING.acquire():
+        return False
+    PROFILING.window = (PROFILING.new_session(), f"window_{datetime.now():%Y%m%d-%H%M%S}", time.monotonic() + duration)
+    PROFILING.window[0].start()
+    return True
+
+
+def check_profiling_window(force=False):
+    """
+    Closes the profiling window if its duration is over (or if 'force') and writes its reports.
+    Called by the watcher at each iteration: a job in progress is profiled until its end.
+
+    Returns:
+        bool: True if the window was closed.
+    """
+    if PROFILING.window is None:
+        return False
+    session, name, deadline = PROFILING.window
+    if not force and time.monotonic() < deadline:
+        return False
+    PROFILING.window = None
+    try:
+        session.stop()
+        _write_reports(session, name)
+    finally:
+        PROFILING.release()
+    return True
+
+
+@contextlib.contextmanager
+def profile_job(name):
+    """
+    Profiles a job (scope 'job'): the reports are named after the job ('<sheet>_<job ID>').
+    Only the first 'max_jobs' jobs are profiled (0: all); no-op otherwise.
+    """
+    if not (PROFILING.enabled and PROFILING.scope == "job") or (PROFILING.max_jobs and PROFILING.jobs_profiled >= PROFILING.max_jobs):
+        yield None
+        return
+    if not PROFILING.acquire():
+        yield None
+        return
+    PROFILING.jobs_profiled += 1
+    session = PROFILING.new_session()
+    session.start()
+    try:
+        yield session
+    finally:
+        session.stop()
+        try:
+            _write_reports(session, name)
+        finally:
+            PROFILING.release()
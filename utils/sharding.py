@@ -0,0 +1,178 @@
+import concurrent.futures
+import inspect
+import time
+
+from utils.api import api_post_config
+from utils.log_context import submit_in_context
+from utils.logger import log_message
+
+SECTIONS = ("families", "files", "interpretations")
+
+
+class _UnionFind:
+    """Groups of linked nodes (persons, samples, checksums of the payload)."""
+
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, node):
+        self.parent.setdefault(node, node)
+        root = node
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[node] != root:
+            self.parent[node], node = root, self.parent[node]
+        return root
+
+    def union(self, nodes):
+        nodes = list(nodes)
+        if not nodes:
+            return None
+        root = self.find(nodes[0])
+        for node in nodes[1:]:
+            other = self.find(node)
+            if other != root:
+                self.parent[other] = root
+        return root
+
+
+def _entity_nodes(section, item):
+    """Nodes (persons, samples, checksums) referenced by a family, biofile or interpretation."""
+    if section == "families":
+        return [f"family:{item.get('identifier')}"] + [f"person:{person.get('identifier')}" for person in item.get("persons", [])]
+    if section == "files":
+        nodes = [f"checksum:{item.get('checksum')}"] if item.get("checksum") else []
+        for sample in item.get("samples", []):
+            nodes += [f"sample:{sample.get('name')}", f"person:{sample.get('person')}"]
+        return nodes
+    nodes = [f"person:{item['indexCase']}"] if item.get("indexCase") else []
+    for data in item.get("datas", []):
+        for sample in data.get("samples", []):
+            nodes.append(f"sample:{sample.get('name')}")
+            if sample.get("checksum"):
+                nodes.append(f"checksum:{sample.get('checksum')}")
+    return nodes
+
+
+def split_payload(payload, families_per_shard=1):
+    """
+    Splits a bulkCreation payload into independent shards.
+
+    Families, biofiles and interpretations that share a person, a sample or a
+    checksum are always in the same shard: a person is never split across shards
+    (e.g. a parent's VCF shared by two families puts both families together).
+    Groups are packed into shards of at most 'families_per_shard' families.
+
+    Returns:
+        list: shards, each one a payload {"families", "files", "interpretations"}.
+    """
+    groups = _UnionFind()
+    entities = []
+    for section in SECTIONS:
+        for position, item in enumerate(payload.get(section, [])):
+            nodes = _entity_nodes(section, item) or [f"{section}:#{position}"]
+            entities.append((section, item, nodes))
+            groups.union(nodes)
+
+    # Entités regroupées par composante connexe (dans l'ordre du payload)
+    components = {}
+    for section, item, nodes in entities:
+        component = components.setdefault(groups.find(nodes[0]), {key: [] for key in SECTIONS})
+        component[section].append(item)
+
+    shards = []
+    current, current_families = None, 0
+    for component in components.values():
+        families = max(1, len(component["families"]))
+        if current is None or current_families + families > families_per_shard:
+            current, current_families = {key: [] for key in SECTIONS}, 0
+            shards.append(current)
+        for key in SECTIONS:
+            current[key].extend(component[key])
+        current_families += families
+    return shards
+
+
+def is_retryable(response):
+    """
+    True if a failed POST may succeed if retried without risk of posting the shard twice:
+        - no response, and the request was not sent (connection refused, connection timeout);
+        - 408, 429, 502, 503: the request was not processed.
+    Not retried: a 4xx (invalid payload), a 500 or 504, a read timeout or a connection
+    dropped after sending (the server may have created the configuration).
+    """
+    if isinstance(response, dict):
+        # Erreur retournée par 'api_post_config' : {"error", "status_code", "request_sent"}
+        status_code = response.get("status_code")
+        if status_code is None:
+            return response.get("request_sent") is False
+    else:
+        status_code = response.status_code
+    return status_code in (408, 429, 502, 503)
+
+
+def post_shard(index, shard, max_retries, retry_delay, **kwargs):
+    """
+    POST one shard, with retries.
+
+    Returns:
+        dict: result of the shard {"shard", "families", "status", "attempts", "error"}
+    """
+    function_name = inspect.currentframe().f_code.co_name
+    families = [family.get("identifier") for family in shard["families"]]
+    attempt = 0
+    while True:
+        attempt += 1
+        response = api_post_config(**{**kwargs, "payload": shard})
+        if not isinstance(response, dict) and response.status_code == 201:
+            return {"shard": index, "families": families, "status": "ok", "attempts": attempt, "error": None}
+
+        if isinstance(response, dict):
+            error = response.get("error")
+        else:
+            try:
+                error = f"HTTP {response.status_code}: {response.json()}"
+            except ValueError:
+                error = f"HTTP {response.status_code}: {response.text[:500]}"
+        if attempt > max_retries or not is_retryable(response):
+            log_message(function_name, "ERROR", f"Shard {index} ({families}) failed after {attempt} attempt(s): {error}")
+            return {"shard": index, "families": families, "status": "failed", "attempts": attempt, "error": error}
+        log_message(function_name, "WARNING", f"Shard {index} ({families}) attempt {attempt} failed, retry in {retry_delay}s: {error}")
+        time.sleep(retry_delay)
+
+
+def post_config_shards(payload, settings, **kwargs):
+    """
+    POST the payload shard by shard (cf. 'split_payload'), with bounded concurrency
+    and per-shard retries.
+
+    Args:
+        payload (dict): bulkCreation payload.
+        settings (dict): settings ('sharding_*' keys).
+        **kwargs: arguments of 'api_post_config' ('diagho_api', 'file',...).
+
+    Returns:
+        tuple: (shards, results), one result per shard (cf. 'post_shard'), in the order of the shards.
+    """
+    function_name = inspect.currentframe().f_code.co_name
+    shards = split_payload(payload, settings["sharding_families_per_shard"])
+    log_message(function_name, "INFO", f"{len(payload.get('families', []))} families posted in {len(shards)} shards.")
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=settings["sharding_max_workers"]) as executor:
+        futures = [
+            submit_in_context(executor, post_shard, index, shard, settings["sharding_max_retries"], settings["sharding_retry_delay"], **kwargs)
+            for index, shard in enumerate(shards, start=1)
+        ]
+        results = [future.result() for future in futures]
+    return shards, results
+
+
+def format_shard_report(json_file, results):
+    """Job report: summary and one line per failed shard."""
+    failed = [result for result in results if result["status"] != "ok"]
+    lines = [f"JSON file: {json_file}", "", f"{len(results) - len(failed)}/{len(results)} shards posted in Diagho successfully."]
+    if failed:
+        lines += ["", "Failed shards:"]
+        lines += [f"- shard {result['shard']} (families: {', '.join(map(str, result['families'])) or '-'}), "
+                  f"{result['attempts']} attempt(s): {result['error']}" for result in failed]
+    return "\n".join(lines)
@@ -0,0 +1,180 @@
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+
+from utils.logger import log_message
+
+# Clé de chaque entité du JSON bulkCreation, par section
+ENTITY_KEYS = {
+    "families": "identifier",
+    "files": "filename",
+    "interpretations": "title",
+}
+
+
+def fingerprint(item):
+    """Hash of a family, biofile or interpretation (canonical JSON)."""
+    text = json.dumps(item, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def entity_key(section, item):
+    """Key of an entity in its section (its identifier, or its hash if it has none)."""
+    key = item.get(ENTITY_KEYS[section])
+    return str(key) if key not in (None, "") else f"#{fingerprint(item)}"
+
+
+def compute_delta(json_data, previous):
+    """
+    Keeps only the entities of 'json_data' that are new or modified since 'previous'.
+
+    Args:
+        json_data (dict): JSON bulkCreation content {"families", "files", "interpretations"}.
+        previous (dict): fingerprint of the last version of the sheet successfully posted.
+
+    Returns:
+        tuple: (delta JSON content, fingerprint of 'json_data', number of unchanged entities)
+        The fingerprint also holds the checksum of each biofile (section 'biofiles').
+    """
+    fingerprints = {}
+    delta = {}
+    unchanged = 0
+    for section in ENTITY_KEYS:
+        delta[section] = []
+        for item in json_data.get(section, []):
+            key = (section, entity_key(section, item))
+            fingerprints[key] = fingerprint(item)
+            if previous.get(key) == fingerprints[key]:
+                unchanged += 1
+            else:
+                delta[section].append(item)
+    for item in json_data.get("files", []):
+        fingerprints[("biofiles", entity_key("files", item))] = str(item.get("checksum", ""))
+    return delta, fingerprints, unchanged
+
+
+def changed_biofiles(delta, previous):
+    """
+    Filenames of the biofiles of 'delta' to upload: new biofiles or new checksum.
+    A biofile whose samples only changed is already in Diagho.
+    """
+    return [
+        item["filename"] for item in delta.get("files", [])
+        if previous.get(("biofiles", entity_key("files", item))) != str(item.get("checksum", ""))
+    ]
+
+
+def stored_checksums(previous):
+    """Checksums of the biofiles of the last version posted ({filename: checksum})."""
+    return {key: checksum for (section, key), checksum in previous.items() if section == "biofiles" and checksum}
+
+
+def posted_fingerprints(fingerprints, previous, posted):
+    """
+    Fingerprint to store when only some parts of the sheet were posted (e.g. some
+    shards failed): 'previous' updated with the entities of the 'posted' payloads.
+    The entities that failed keep their previous fingerprint and are posted again next time.
+    """
+    merged = dict(previous)
+    for payload in posted:
+        for section in ENTITY_KEYS:
+            for item in payload.get(section, []):
+                key = entity_key(section, item)
+                merged[(section, key)] = fingerprints[(section, key)]
+                if section == "files":
+                    merged[("biofiles", key)] = fingerprints[("biofiles", key)]
+    return merged
+
+
+def is_empty(json_data):
+    """True if the JSON content has no entity to post."""
+    return not any(json_data.get(section) for section in ENTITY_KEYS)
+
+
+class SheetState:
+    """
+    Fingerprints of the sheets already posted in Diagho, for incremental re-processing.
+
+    For each sheet (by filename), the hash of each family, biofile and interpretation
+    of its last version successfully posted. Held in memory and, if 'db_path' is
+    set, persisted in a SQLite database to survive restarts of the watcher.
+
+    Args:
+        db_path (str, optional): SQLite database file. In-memory only if empty.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self._memory = {}
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sheet_entities ("
+                "sheet TEXT, section TEXT, key TEXT, fingerprint TEXT NOT NULL, "
+                "PRIMARY KEY (sheet, section, key))"
+            )
+            self._db.commit()
+
+    def get(self, sheet):
+        """Fingerprint of the last version of 'sheet' posted ({(section, key): hash}, empty if none)."""
+        with self._lock:
+            if sheet not in self._memory and self._db is not None:
+                rows = self._db.execute(
+                    "SELECT section, key, fingerprint FROM sheet_entities WHERE sheet=?", (sheet,)
+                ).fetchall()
+                if rows:
+                    self._memory[sheet] = {(section, key): value for section, key, value in rows}
+            return dict(self._memory.get(sheet, {}))
+
+    def commit(self, sheet, fingerprints):
+        """
+        Stores the fingerprint of 'sheet' once it has been posted successfully.
+        Replaces the previous one: entities removed from the sheet are forgotten.
+        """
+        function_name = inspect.currentframe().f_code.co_name
+        with self._lock:
+            self._memory[sheet] = dict(fingerprints)
+            if self._db is not None:
+                with self._db:
+                    self._db.execute("DELETE FROM sheet_entities WHERE sheet=?", (sheet,))
+                    self._db.executemany(
+                        "INSERT INTO sheet_entities (sheet, section, key, fingerprint) VALUES (?, ?, ?, ?)",
+                        [(sheet, section, key, value) for (section, key), value in fingerprints.items()]
+                    )
+        log_message(function_name, "DEBUG", f"{sheet} - Fingerprint stored ({len(fingerprints)} entities).")
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+# État partagé par tout le process (cf. 'settings.sheet_state')
+_sheet_state = SheetState()
+
+
+def init_sheet_state(db_path):
+    """
+    (Re)initializes the process-wide sheet state with the SQLite file 'db_path'.
+    Nothing is done if the state already uses this file.
+    """
+    global _sheet_state
+    if _sheet_state.db_path == (db_path or None):
+        return _sheet_state
+    _sheet_state.close()
+    _sheet_state = SheetState(db_path or None)
+    return _sheet_state
+
+
+def get_sheet_state():
+    """Returns the process-wide sheet state."""
+    return _sheet_state
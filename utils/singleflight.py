@@ -0,0 +1,91 @@
+import inspect
+import threading
+
+from utils.cancellation import JobCancelledError
+from utils.logger import log_message
+
+# Intervalle (s) de vérification de l'annulation pendant l'attente d'un appel en cours
+WAIT_INTERVAL = 1
+
+
+class _Call:
+    """Call in flight for a key: its result (or error) is shared by all the callers."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Process-wide registry of the calls in flight, by key.
+
+    The first caller for a key (leader) runs the function; callers for the same
+    key arriving meanwhile (followers) wait for it and get the same result, or
+    the same exception. The key is released when the call ends: a later caller
+    starts a new call.
+
+    Used to upload and load a biofile only once when several jobs reference the
+    same checksum at the same time (cf. uploader.process_biofile_task).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, function, cancel_token=None):
+        """
+        Runs 'function()' once for all the concurrent callers with the same 'key'.
+
+        If the leader's job is cancelled (JobCancelledError), a follower whose job
+        is not cancelled runs the function itself instead of failing.
+
+        Args:
+            key (str): key of the call (e.g. checksum of the biofile).
+            function (callable): function without argument.
+            cancel_token (CancellationToken, optional): token of the caller's job,
+                checked while waiting for the leader.
+
+        Returns:
+            tuple: (result, shared): 'shared' is True if the result comes from another caller.
+        """
+        function_name = inspect.currentframe().f_code.co_name
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+
+            if leader:
+                try:
+                    call.result = function()
+                    return call.result, False
+                except BaseException as e:
+                    call.error = e
+                    raise
+                finally:
+                    with self._lock:
+                        self._calls.pop(key, None)
+                    call.done.set()
+
+            log_message(function_name, "DEBUG", f"{key} - Already in flight, wait for its result.")
+            while not call.done.wait(WAIT_INTERVAL):
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+            if isinstance(call.error, JobCancelledError) and not (cancel_token is not None and cancel_token.cancelled):
+                log_message(function_name, "DEBUG", f"{key} - Job of the call in flight cancelled, call again.")
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+
+# Registre partagé par tout le process : upload + chargement des biofiles, par checksum
+_biofile_flights = SingleFlight()
+
+
+def get_biofile_flights():
+    """Returns the process-wide registry of the biofiles being uploaded and loaded."""
+    return _biofile_flights
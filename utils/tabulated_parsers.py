@@ -0,0 +1,164 @@
+import csv
+import importlib.util
+import inspect
+import io
+
+from utils.logger import log_message
+
+# Valeurs considérées comme vides (mêmes valeurs par défaut que pandas.read_csv)
+NA_VALUES = frozenset([
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+])
+
+# Choix automatique du parser : module 'csv' pour les petites feuilles (pas d'import de pandas),
+# pyarrow (sinon pandas) au-delà
+CSV_MAX_BYTES = 5 * 1024 * 1024
+
+
+class SheetTable:
+    """
+    Sample sheet parsed by one of the engines of 'PARSERS', stored by columns.
+    All values are strings, empty cells (cf. NA_VALUES) are "".
+
+    Args:
+        columns (list): column names, in the order of the file.
+        data (list): one list of values per column.
+    """
+
+    def __init__(self, columns, data):
+        self.columns = list(columns)
+        self._data = dict(zip(self.columns, data))
+        self._length = len(data[0]) if data else 0
+
+    def __len__(self):
+        return self._length
+
+    def column(self, name):
+        """Values of the column 'name' (list of strings)."""
+        return self._data[name]
+
+    def to_records(self):
+        """
+        Rows of the table: {row_number: {column: value}}, as 'DataFrame.to_dict(orient="index")'.
+        """
+        columns = self.columns
+        return {i: dict(zip(columns, values)) for i, values in enumerate(zip(*(self._data[col] for col in columns)))}
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """Table from a pandas DataFrame (values converted to strings, NaN as "")."""
+        columns = [str(col) for col in df.columns]
+        return cls(columns, [df[col].fillna("").astype(str).tolist() for col in df.columns])
+
+
+def unique_column_names(names):
+    """Duplicate column names renamed as pandas does ('a', 'a.1', 'a.2',...)."""
+    seen = {}
+    columns = []
+    for name in names:
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        columns.append(name)
+    return columns
+
+
+def parse_with_csv(text):
+    """Pure-stdlib engine ('csv' module): no import cost, for small sheets."""
+    rows = csv.reader(io.StringIO(text), delimiter="\t")
+    header = next(rows, None)
+    if header is None:
+        return SheetTable([], [])
+    columns = unique_column_names(header)
+    width = len(columns)
+    na_values = NA_VALUES
+    table = [
+        [(value if value not in na_values else "") for value in row[:width]] + [""] * (width - len(row))
+        for row in rows
+    ]
+    return SheetTable(columns, [list(values) for values in zip(*table)] if table else [[] for _ in columns])
+
+
+def parse_with_pandas(text):
+    """pandas engine (previous implementation)."""
+    import pandas as pd
+    df = pd.read_csv(io.StringIO(text), sep="\t", dtype=str)  # dtype=str to keep empty fields
+    return SheetTable.from_dataframe(df)
+
+
+def parse_with_pyarrow(text):
+    """
+    pyarrow engine (multi-threaded C++ parser), for large sheets.
+    pyarrow rejects rows with missing trailing cells: such sheets are parsed by the 'csv' engine.
+    """
+    function_name = inspect.currentframe().f_code.co_name
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    header = next(csv.reader(io.StringIO(text), delimiter="\t"), None)
+    if header is None:
+        return SheetTable([], [])
+    columns = unique_column_names(header)
+    try:
+        table = pa_csv.read_csv(
+            io.BytesIO(text.encode("utf-8")),
+            read_options=pa_csv.ReadOptions(column_names=columns, skip_rows=1),
+            parse_options=pa_csv.ParseOptions(delimiter="\t", newlines_in_values=True),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={col: pa.string() for col in columns},
+                null_values=list(NA_VALUES),
+                strings_can_be_null=True,
+            ),
+        )
+    except pa.ArrowInvalid as e:
+        log_message(function_name, "DEBUG", f"pyarrow can't parse the sheet, use the 'csv' parser: {e}")
+        return parse_with_csv(text)
+    return SheetTable(columns, [table.column(col).fill_null("").to_pylist() for col in columns])
+
+
+# Parsers disponibles (cf. 'settings.sheet_parser')
+PARSERS = {
+    "csv": parse_with_csv,
+    "pandas": parse_with_pandas,
+    "pyarrow": parse_with_pyarrow,
+}
+
+
+def is_available(engine):
+    """True if the module needed by 'engine' is installed."""
+    return engine == "csv" or importlib.util.find_spec(engine) is not None
+
+
+def select_engine(size, engine="auto"):
+    """
+    Parser to use for a sheet of 'size' bytes.
+    "auto": 'csv' up to CSV_MAX_BYTES, then 'pyarrow' if installed, else 'pandas'.
+    """
+    if engine != "auto":
+        if engine not in PARSERS:
+            raise ValueError(f"Unknown sheet parser: {engine} (available: auto, {', '.join(PARSERS)}).")
+        return engine
+    if size <= CSV_MAX_BYTES:
+        return "csv"
+    return "pyarrow" if is_available("pyarrow") else "pandas"
+
+
+def parse_sheet(text, engine="auto", name=""):
+    """
+    Parses the text of a TSV sample sheet (without blank lines).
+
+    Args:
+        text (str): content of the sheet.
+        engine (str): "auto", "csv", "pandas" or "pyarrow".
+        name (str, optional): name of the sheet, for the logs.
+
+    Returns:
+        SheetTable
+    """
+    function_name = inspect.currentframe().f_code.co_name
+    engine = select_engine(len(text), engine)
+    log_message(function_name, "DEBUG", f"{name} - Parser: {engine}.")
+    return PARSERS[engine](text)
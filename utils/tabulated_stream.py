@@ -0,0 +1,206 @@
+import codecs
+import csv
+import inspect
+import json
+import os
+from array import array
+
+from utils.logger import log_message
+from utils.tabulated_parsers import NA_VALUES
+from utils.tabulated_validator import COLUMN_RULES, validate_value
+
+# Taille des blocs lus pour la détection de l'encodage
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def detect_file_encoding(file_path):
+    """
+    Detection of the encoding of a file, reading it by chunks (constant memory).
+    BOM and UTF-8 are checked first, 'chardet' is used only for other encodings.
+    """
+    with open(file_path, "rb") as f:
+        head = f.read(4)
+        if head.startswith(codecs.BOM_UTF8):
+            return "utf-8-sig"
+        if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return "utf-16"
+        f.seek(0)
+
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        try:
+            for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+                decoder.decode(chunk)
+            decoder.decode(b"", final=True)
+            return "utf-8"
+        except UnicodeDecodeError:
+            pass
+
+        import chardet
+        f.seek(0)
+        detector = chardet.UniversalDetector()
+        for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+            detector.feed(chunk)
+            if detector.done:
+                break
+        detector.close()
+    return detector.result.get("encoding") or "latin1"
+
+
+class IndexedSheet:
+    """
+    Row index of a TSV sample sheet, for the streaming conversion.
+
+    Only compact indexes are kept in memory: the byte offset of each row, and for
+    each grouping column the row numbers of each value. Rows are read again from
+    disk, group by group, when they are needed.
+
+    Args:
+        file_path (str): TSV file.
+        group_columns (list): columns to index (e.g. 'family_id').
+        encoding (str, optional): encoding of the file (detected if None).
+    """
+
+    def __init__(self, file_path, group_columns, encoding=None):
+        self.file_path = file_path
+        self.group_columns = list(group_columns)
+        self.encoding = encoding or detect_file_encoding(file_path)
+        self.columns = []
+        self.offsets = array("Q")
+        self.groups = {column: {} for column in self.group_columns}
+        # Biofiles sans checksum dans le TSV (pour le calcul en parallèle des MD5)
+        self.empty_checksum_filenames = set()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _decoded_lines(self, f, position):
+        """Yields the decoded lines of 'f'; 'position[0]' is the offset of the next line."""
+        for raw_line in iter(f.readline, b""):
+            position[0] += len(raw_line)
+            yield raw_line.decode(self.encoding)
+
+    def _records(self, f):
+        """
+        Yields (offset, values) for each non-blank record. The records are split by
+        'csv.reader' (same quoting rules as pandas.read_csv): a quoted value may span
+        several lines.
+        """
+        position = [f.tell()]
+        reader = csv.reader(self._decoded_lines(f, position), delimiter="\t")
+        while True:
+            # csv.reader ne lit pas au-delà de la fin de l'enregistrement
+            offset = position[0]
+            values = next(reader, None)
+            if values is None:
+                return
+            if any(value.strip() for value in values):
+                yield offset, values
+
+    def _to_row(self, values):
+        return {column: (values[i] if i < len(values) and values[i] not in NA_VALUES else "") for i, column in enumerate(self.columns)}
+
+    def build(self, required_headers):
+        """
+        Reads the file once to build the indexes, validating each row (cf. COLUMN_RULES).
+
+        Returns:
+            tuple: (missing columns, list of errors {"row", "column", "value"})
+        """
+        function_name = inspect.currentframe().f_code.co_name
+        if self.encoding.lower().replace("_", "-").startswith("utf-16"):
+            raise ValueError(f"Streaming conversion does not support {self.encoding} files.")
+        errors = []
+        with open(self.file_path, "rb") as f:
+            if self.encoding == "utf-8-sig":
+                f.seek(len(codecs.BOM_UTF8))
+            records = self._records(f)
+            header = next(records, None)
+            if header is None:
+                return list(required_headers), []
+            self.columns = header[1]
+            missing_columns = [col for col in required_headers if col not in self.columns]
+            if missing_columns:
+                return missing_columns, []
+
+            rules = [(col, COLUMN_RULES[col]) for col in required_headers if col in COLUMN_RULES]
+            for offset, values in records:
+                row_number = len(self.offsets)
+                self.offsets.append(offset)
+                row = self._to_row(values)
+
+                # Validation de la ligne
+                for col, rule in rules:
+                    if not validate_value(rule, row[col]):
+                        errors.append({"row": row_number + 2, "column": col, "value": row[col]})
+
+                # Index de regroupement
+                for column in self.group_columns:
+                    self.groups[column].setdefault(row[column], array("I")).append(row_number)
+                if not row.get("checksum") and row.get("filename"):
+                    self.empty_checksum_filenames.add(row["filename"])
+
+        log_message(function_name, "DEBUG", f"{os.path.basename(self.file_path)} - {len(self.offsets)} rows indexed ({self.encoding}).")
+        return [], errors
+
+    def read_rows(self, row_numbers):
+        """
+        Reads the given rows again from the file.
+
+        Returns:
+            dict: {row_number: row}, as 'DataFrame.to_dict(orient="index")'.
+        """
+        rows = {}
+        with open(self.file_path, "rb") as f:
+            for row_number in row_numbers:
+                f.seek(self.offsets[row_number])
+                values = next(csv.reader(self._decoded_lines(f, [0]), delimiter="\t"), [])
+                rows[row_number] = self._to_row(values)
+        return rows
+
+
+class JsonStreamWriter:
+    """
+    Incremental writer of a JSON object whose values are lists, written item by item.
+    The output is identical to 'json.dump(data, f, ensure_ascii=False, indent=4)'.
+
+    Usage:
+        writer = JsonStreamWriter(f)
+        writer.start_list("families")
+        writer.write_item({...})
+        writer.close()
+    """
+
+    def __init__(self, file, indent=4):
+        self.file = file
+        self.indent = indent
+        self._keys = 0
+        self._items = 0
+        self._in_list = False
+        self.file.write("{")
+
+    def start_list(self, key):
+        self._end_list()
+        separator = "," if self._keys else ""
+        self.file.write(f"{separator}\n{' ' * self.indent}{json.dumps(key, ensure_ascii=False)}: [")
+        self._keys += 1
+        self._items = 0
+        self._in_list = True
+
+    def write_item(self, item):
+        prefix = " " * (self.indent * 2)
+        text = json.dumps(item, ensure_ascii=False, indent=self.indent)
+        separator = "," if self._items else ""
+        self.file.write(f"{separator}\n{prefix}" + text.replace("\n", f"\n{prefix}"))
+        self._items += 1
+
+    def _end_list(self):
+        if self._in_list:
+            if self._items:
+                self.file.write(f"\n{' ' * self.indent}]")
+            else:
+                self.file.write("]")
+            self._in_list = False
+
+    def close(self):
+        self._end_list()
+        self.file.write("\n}" if self._keys else "}")
@@ -1,98 +1,198 @@
+import codecs
 import csv
 import datetime
 import inspect
 import json
 import os
+import re
 from datetime import datetime
-import shutil
-import chardet
-import pandas as pd
+
+# 'chardet' est importé dans les fonctions qui l'utilisent (démarrage rapide)
 
 from utils.logger import *
-from utils.file import md5
+from utils.checksum_cache import cached_md5
+from utils.checksum_manifest import get_sidecar_checksum
+from utils.tabulated_parsers import SheetTable, parse_sheet
 
 class TSVValidationError(Exception):
     """Exception personnalisée pour les erreurs de validation TSV."""
-    pass
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        # Liste complète des erreurs : [{"row": ..., "column": ..., "value": ...}]
+        self.errors = errors or []
+
+
+# Règles de validation des colonnes du TSV :
+#   required    : valeur non vide
+#   allowed     : valeurs autorisées
+#   date_format : format de date (valeur vide autorisée si 'optional')
+COLUMN_RULES = {
+    'filename': {'required': True},
+    'file_type': {'allowed': ['SNV', 'CNV']},
+    'assembly': {'allowed': ['GRCh37', 'GRCh38', 'T2T']},
+    'sample': {'required': True},
+    'family_id': {'required': True},
+    'person_id': {'required': True},
+    'sex': {'allowed': ['female', 'male', 'unknown', 'F', 'M']},
+    'is_affected': {'allowed': ['0', '1']},
+    'date_of_birth': {'date_format': '%d/%m/%Y', 'optional': True},
+    'interpretation_title': {'required': True},
+    'is_index': {'allowed': ['0', '1']},
+    'project': {'required': True},
+}
+
+# Date 'DD/MM/YYYY'
+DATE_PATTERN = re.compile(r"^([0-9]{1,2})/([0-9]{1,2})/([0-9]{4})$")
+
+# Nombre maximum d'erreurs détaillées dans le message (mail)
+MAX_REPORTED_ERRORS = 100
 
         
-def remove_trailing_empty_lines(file_path, encoding):
+def read_tabulated_file(file_path, encoding=None, engine="auto"):
     """
-    Removes trailing empty lines from a text file.
+    Reads a TSV file in a single pass.
+
+    The bytes are read once, the encoding is detected from them (if not given),
+    blank lines are skipped (without rewriting the input file), and the table is
+    parsed once: the same table is used for the validation and the conversion.
+
+    Args:
+        file_path (str): TSV file.
+        encoding (str, optional): encoding of the file (detected if None).
+        engine (str): parser, cf. utils/tabulated_parsers.py ("auto": chosen by size).
+
+    Returns:
+        SheetTable: all values as strings, empty cells as "".
     """
     function_name = inspect.currentframe().f_code.co_name
+    with open(file_path, "rb") as f:
+        raw_data = f.read()
+
+    if not encoding:
+        encoding = detect_encoding_from_bytes(raw_data)
+    log_message(function_name, "DEBUG", f"{os.path.basename(file_path)} - Encoding: {encoding}.")
+
+    # Supprimer les lignes vides
+    text = raw_data.decode(encoding)
+    lines = [line for line in text.splitlines(keepends=True) if line.strip()]
+
+    return parse_sheet("".join(lines), engine, os.path.basename(file_path))
+
 
-    # Lire le fichier et sauvegarder les lignes non vides
-    with open(file_path, 'r', encoding=encoding) as file:
-        lines = [line for line in file if line.strip()]
-    
-    # Réécrire le fichier sans les lignes vides à la fin
-    with open(file_path, 'w', encoding=encoding) as file:
-        file.writelines(lines)
-            
-    
 def validate_tsv_columns(file_path, required_headers):
     """
     Valide chaque colonne du fichier TSV selon des conditions spécifiques.
+
+    Args:
+        file_path (str, SheetTable or DataFrame): TSV file, or table already read by 'read_tabulated_file'.
+        required_headers (list): required columns.
     """
     function_name = inspect.currentframe().f_code.co_name
         
-    # Lire le fichier TSV
-    df = pd.read_csv(file_path, sep="\t", encoding=detect_encoding(file_path), dtype=str)
+    # Lire le fichier TSV (si pas déjà lu)
+    if not isinstance(file_path, (str, os.PathLike)):
+        table = file_path
+        file_path = "<table>"
+    else:
+        table = read_tabulated_file(file_path)
             
     # Vérifier la présence des colonnes requises
-    missing_columns = [col for col in required_headers if col not in df.columns]
+    missing_columns = [col for col in required_headers if col not in table.columns]
     if missing_columns:
         log_message(function_name, "ERROR", f"Missing columns: {missing_columns}")
         raise TSVValidationError(f"Missing columns: {missing_columns}")
     
-    # Vérification des valeurs présentes dans chaque ligne
-    for col in required_headers:
-        invalid_rows = df[df[col].apply(lambda x: not validate_column_value(col, str(x)))]  # Convertir en str pour éviter les NaN
-        if not invalid_rows.empty:
-            row_num = invalid_rows.index[0] + 2  # Ligne réelle (+2 car pandas indexe à partir de 0 et l'en-tête est à la ligne 1)
-            value = invalid_rows[col].iloc[0]
-            message = f"Valeur invalide dans la colonne '{col}' à la ligne {row_num}: {value}"
-            log_message(function_name, "ERROR", message)
-            raise TSVValidationError(message)
+    # Vérification des valeurs de toutes les lignes (toutes les erreurs en une passe)
+    errors = find_invalid_values(table, required_headers)
+    if errors:
+        message = format_validation_errors(errors)
+        log_message(function_name, "ERROR", message)
+        raise TSVValidationError(message, errors)
         
     log_message(function_name, "DEBUG", f"File '{file_path}' is valid.")
     return True
 
+
+def find_invalid_values(table, columns=None, rules=COLUMN_RULES):
+    """
+    Evaluates the rules of 'COLUMN_RULES' on whole columns.
+    Each distinct value of a column is checked once.
+
+    Args:
+        table (SheetTable or DataFrame): table, all values as strings.
+        columns (list, optional): columns to check (default: all the columns with a rule).
+
+    Returns:
+        list: one dict per invalid cell {"row", "column", "value"}, sorted by row.
+              'row' is the line number in the file (header = line 1).
+    """
+    if not isinstance(table, SheetTable):
+        table = SheetTable.from_dataframe(table)
+    errors = []
+    for col in (columns if columns is not None else rules):
+        rule = rules.get(col)
+        if not rule or col not in table.columns:
+            continue
+        values = table.column(col)
+        invalid_values = {value for value in set(values) if not validate_value(rule, value)}
+        if invalid_values:
+            errors.extend(
+                {"row": index + 2, "column": col, "value": value}  # +2 : en-tête à la ligne 1
+                for index, value in enumerate(values) if value in invalid_values
+            )
+    errors.sort(key=lambda error: error["row"])
+    return errors
+
+
+def format_validation_errors(errors, max_errors=MAX_REPORTED_ERRORS):
+    """
+    Validation report (one line per invalid cell, at most 'max_errors' lines).
+    """
+    lines = [f"{len(errors)} valeur(s) invalide(s) :"]
+    for error in errors[:max_errors]:
+        lines.append(f"Valeur invalide dans la colonne '{error['column']}' à la ligne {error['row']}: {error['value']}")
+    if len(errors) > max_errors:
+        lines.append(f"... et {len(errors) - max_errors} autre(s) erreur(s).")
+    return "\n".join(lines)
+
+
+def validate_value(rule, value):
+    """
+    Valide une valeur selon une règle de 'COLUMN_RULES'.
+    """
+    if rule.get('required') and value == "":
+        return False
+    if 'allowed' in rule and value not in rule['allowed']:
+        return False
+    if 'date_format' in rule and not (rule.get('optional') and value == ""):
+        return is_valid_date(value, rule['date_format'])
+    return True
+
+
+def is_valid_date(value, date_format):
+    """
+    True if 'value' is a date in 'date_format' (fast path without strptime for 'DD/MM/YYYY').
+    """
+    try:
+        match = DATE_PATTERN.match(value) if date_format == '%d/%m/%Y' else None
+        if match:
+            day, month, year = map(int, match.groups())
+            datetime(year, month, day)
+        else:
+            datetime.strptime(value, date_format)
+    except ValueError:
+        return False
+    return True
+
+
 def validate_column_value(column_name, value):
     """
-    Valide la valeur d'une colonne en fonction de conditions spécifiques.
-    """
-    # Conditions spécifiques pour certaines colonnes
-    if column_name == 'filename':
-        return value != ""
-    elif column_name == 'file_type':
-        allowed_file_types = ['SNV', 'CNV']
-        return value in allowed_file_types
-    elif column_name == 'assembly':
-        allowed_assemblies = ['GRCh37', 'GRCh38', 'T2T']
-        return value in allowed_assemblies
-    elif column_name == 'sample':
-        return value != ""
-    elif column_name == 'family_id':
-        return value != ""
-    elif column_name == 'person_id':
-        return value != ""
-    elif column_name == 'sex':
-        allowed_sex = ['female', 'male', 'unknown', 'F', 'M']
-        return value in allowed_sex
-    elif column_name == 'is_affected':
-        allowed_is_affected = ['0', '1']
-        return str(value) in allowed_is_affected
-    elif column_name == 'interpretation_title':
-        return value != ""
-    elif column_name == 'is_index':
-        allowed_is_index = ['0', '1']
-        return str(value) in allowed_is_index
-    elif column_name == 'project':
-        return value != ""
-    else:
+    Valide la valeur d'une colonne en fonction de conditions spécifiques (cf. COLUMN_RULES).
+    """
+    rule = COLUMN_RULES.get(column_name)
+    if not rule:
         return True  # Si aucune condition spécifique n'est définie : true
+    return validate_value(rule, str(value))
     
     
 def parse_date(date_str):
@@ -102,7 +202,13 @@ def parse_date(date_str):
     # Define the expected date format
     date_format = '%d/%m/%Y'
     try:
-        dob_obj = datetime.strptime(date_str, date_format)
+        # Cas standard sans strptime (lent), sinon strptime
+        match = DATE_PATTERN.match(date_str)
+        if match:
+            day, month, year = map(int, match.groups())
+            dob_obj = datetime(year, month, day)
+        else:
+            dob_obj = datetime.strptime(date_str, date_format)
         # Convert the parsed date object to the desired output format
         formatted_date = dob_obj.strftime("%Y-%m-%d")
         return formatted_date
@@ -128,22 +234,36 @@ def remove_empty_keys(d):
     return cleaned_dict
 
 
-def get_or_compute_checksum(sample_data, sample_id, biofiles_directory=None):
+def get_or_compute_checksum(sample_data, sample_id, biofiles_directory=None, use_sidecars=False, stored_checksums=None):
     """
     Récupère le checksum d'un fichier depuis 'sample_data' ou le calcule si nécessaire.
+    Si 'use_sidecars' : le checksum fourni par un fichier '.md5' / md5sum du répertoire
+    des biofiles est utilisé avant de calculer le MD5.
+    'stored_checksums' ({filename: checksum}, retraitement incrémental) : checksum déjà
+    posté, utilisé si le biofile n'est plus dans le répertoire (déjà déplacé en backup).
     """
     function_name = inspect.currentframe().f_code.co_name
     checksum = sample_data.get("checksum")
 
+    if not checksum and use_sidecars:
+        checksum = get_sidecar_checksum(biofiles_directory, sample_data.get("filename"))
+        if checksum:
+            log_message(function_name, "DEBUG", f"Sample: {sample_id} - Checksum found in checksum file: {checksum}")
+
+    filename = sample_data.get("filename")
+    if not checksum and stored_checksums and stored_checksums.get(filename):
+        if not (biofiles_directory and os.path.isfile(os.path.join(biofiles_directory, filename))):
+            checksum = stored_checksums[filename]
+            log_message(function_name, "DEBUG", f"Sample: {sample_id} - Biofile already moved, checksum of the last post: {checksum}")
+
     if not checksum:
-        filename = sample_data.get("filename")
         log_message(function_name, "INFO", f"Sample: {sample_id} - Checksum not found for file: {filename}")
 
         if biofiles_directory:
             log_message(function_name, "DEBUG", f"Sample: {sample_id} - Calculating MD5 for file: {filename}")
             try:
                 file_path = os.path.join(biofiles_directory, filename)
-                checksum = md5(file_path)
+                checksum = cached_md5(file_path)
             except Exception as e:
                 log_message(function_name, "ERROR", f"Function '{function_name}': can't calculate MD5 for file: {filename}: {e}")
                 raise ValueError(f"Function '{function_name}': can't calculate MD5 for file: {filename}: {e}.")
@@ -155,44 +275,28 @@ def get_or_compute_checksum(sample_data, sample_id, biofiles_directory=None):
 
 
 
-def detect_encoding(file_path):
+def detect_encoding_from_bytes(raw_data):
     """
-    Detection of the encoding of the file. If 'latin-1' convert it to 'utf-8'.
+    Detection of the encoding of the content of a file.
+    BOM and UTF-8 are checked first, 'chardet' is used only for other encodings.
     """
-    function_name = inspect.currentframe().f_code.co_name
+    if raw_data.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if raw_data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    try:
+        raw_data.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    import chardet
     logging.getLogger("chardet").setLevel(logging.INFO)
-    with open(file_path, "rb") as f:
-        raw_data = f.read(4096)
-        result = chardet.detect(raw_data)
-        encoding = result["encoding"]
-        
-    log_message(function_name, "DEBUG", f"Encoding detected: {encoding}.")
+    encoding = chardet.detect(raw_data[:65536])["encoding"]
+    # Par défaut (et si chardet se trompe) : latin1 décode tous les octets
+    if not encoding:
+        return "latin1"
+    try:
+        raw_data.decode(encoding)
+    except (UnicodeDecodeError, LookupError):
+        return "latin1"
     return encoding
-    
-
-
-def detect_and_convert_tsv(file_path):
-    """
-    Detection of the encoding of the file. If 'latin-1' convert it to 'utf-8'.
-    """
-    function_name = inspect.currentframe().f_code.co_name
-    logging.getLogger("chardet").setLevel(logging.INFO)
-    
-    with open(file_path, "rb") as f:
-        raw_data = f.read(4096)
-        result = chardet.detect(raw_data)
-        encoding = result["encoding"]
-    
-    # Si encodage = ISO-8859-1 ou latin-1 : conversion en UTF-8
-    if encoding and encoding.lower() in ["iso-8859-1", "latin-1"]:
-        log_message(function_name, "DEBUG", f"Encoding detected: {encoding}, need to encode in 'UTF-8'.")
-        temp_file_path = file_path + ".tmp"
-        with open(file_path, "r", encoding="ISO-8859-1") as f_in, open(temp_file_path, "w", encoding="utf-8") as f_out:
-            for line in f_in:
-                f_out.write(line)
-        # Remplace le fichier original par le nouveau fichier
-        shutil.move(temp_file_path, file_path)
-        log_message(function_name, "DEBUG", f"File '{file_path}' has been converted in 'UTF-8'.")
-        return file_path
-    else:
-        return file_path
\ No newline at end of file
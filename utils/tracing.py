@@ -0,0 +1,227 @@
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import uuid
+
+from utils.cancellation import JobCancelledError
+from utils.logger import log_message
+
+# Spans d'un job (feuille) et de ses biofiles, exportés à la fin du job dans un fichier
+# ouvrable dans un visualiseur de timeline : "chrome" (chrome://tracing, Perfetto) ou "otlp" (JSON OTLP)
+TRACE_FORMATS = ("chrome", "otlp")
+SERVICE_NAME = "diagho-uploader"
+
+_CURRENT_SPAN = contextvars.ContextVar("span", default=None)
+
+
+class Span:
+    """Timed operation of a trace, child of the span current when it started."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "status", "thread_id", "thread_name")
+
+    def __init__(self, name, trace_id, parent_id=None, attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes or {}
+        self.status = "ok"
+        thread = threading.current_thread()
+        self.thread_id = thread.ident
+        self.thread_name = thread.name
+
+    @property
+    def duration_ns(self):
+        return (self.end_ns or time.time_ns()) - self.start_ns
+
+
+class Tracer:
+    """Collects the finished spans by trace; a trace is exported when its root span ends."""
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_format = "chrome"
+        self.directory = "traces"
+        self._lock = threading.Lock()
+        self._spans = {}
+
+    def configure(self, enabled=False, trace_format="chrome", directory="traces"):
+        if trace_format not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format: {trace_format!r} (allowed: {', '.join(TRACE_FORMATS)})")
+        self.enabled = enabled
+        self.trace_format = trace_format
+        self.directory = directory
+
+    def finish(self, span):
+        with self._lock:
+            self._spans.setdefault(span.trace_id, []).append(span)
+
+    def pop_trace(self, trace_id):
+        """Finished spans of a trace, removed from the tracer."""
+        with self._lock:
+            return self._spans.pop(trace_id, [])
+
+
+TRACER = Tracer()
+
+
+def configure_tracing(config):
+    """
+    Configures the tracing from the 'tracing' section of the configuration (disabled by default).
+
+    Args:
+        config (dict): configuration (cf. utils/config_loader.py)
+    """
+    tracing_config = config.get("tracing", {})
+    TRACER.configure(
+        enabled=bool(tracing_config.get("enabled", False)),
+        trace_format=tracing_config.get("format", "chrome"),
+        directory=tracing_config.get("directory", "traces"),
+    )
+
+
+@contextlib.contextmanager
+def span(name, **attributes):
+    """
+    Span of the current trace, child of the current span (the context is copied
+    to the tasks of the executors, cf. 'submit_in_context'). No-op outside of a trace.
+    """
+    parent = _CURRENT_SPAN.get()
+    if parent is None or not TRACER.enabled:
+        yield None
+        return
+    current = Span(name, parent.trace_id, parent.span_id, attributes)
+    token = _CURRENT_SPAN.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "cancelled" if isinstance(e, JobCancelledError) else "error"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _CURRENT_SPAN.reset(token)
+        TRACER.finish(current)
+
+
+@contextlib.contextmanager
+def trace(name, filename, **attributes):
+    """
+    Root span of a trace (one per job): when it ends, the spans of the trace are written
+    in 'filename' (+ '.trace.json' or '.otlp.json') in the tracing directory.
+    """
+    function_name = inspect.currentframe().f_code.co_name
+    if not TRACER.enabled:
+        yield None
+        return
+    root = Span(name, uuid.uuid4().hex, attributes=attributes)
+    token = _CURRENT_SPAN.set(root)
+    try:
+        yield root
+    except BaseException:
+        root.status = "error"
+        raise
+    finally:
+        root.end_ns = time.time_ns()
+        _CURRENT_SPAN.reset(token)
+        TRACER.finish(root)
+        spans = TRACER.pop_trace(root.trace_id)
+        try:
+            path = export_trace(spans, os.path.join(TRACER.directory, filename), TRACER.trace_format)
+            log_message(function_name, "INFO", "Trace of %d spans written: %s", len(spans), path)
+        except OSError as e:
+            log_message(function_name, "ERROR", "Failed to write the trace: %s", e)
+
+
+def traced(name=None):
+    """Decorator: each call of the function is a span (named after the function by default)."""
+    def decorator(function):
+        span_name = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled or _CURRENT_SPAN.get() is None:
+                return function(*args, **kwargs)
+            with span(span_name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def to_chrome_trace(spans):
+    """Spans as Chrome trace events ("X" complete events, µs), one row per thread."""
+    pid = os.getpid()
+    events = []
+    threads = {}
+    for item in sorted(spans, key=lambda item: item.start_ns):
+        threads.setdefault(item.thread_id, item.thread_name)
+        events.append({
+            "name": item.name,
+            "cat": "diagho",
+            "ph": "X",
+            "ts": item.start_ns / 1000,
+            "dur": item.duration_ns / 1000,
+            "pid": pid,
+            "tid": item.thread_id,
+            "args": {**item.attributes, "status": item.status, "span_id": item.span_id, "parent_id": item.parent_id},
+        })
+    metadata = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}} for tid, thread_name in threads.items()]
+    metadata.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": SERVICE_NAME}})
+    return {"traceEvents": metadata + events, "displayTimeUnit": "ms"}
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans):
+    """Spans in the OTLP JSON format (ExportTraceServiceRequest), e.g. for an OpenTelemetry collector."""
+    otlp_spans = []
+    for item in sorted(spans, key=lambda item: item.start_ns):
+        attributes = {**item.attributes, "thread.id": item.thread_id, "thread.name": item.thread_name}
+        otlp_span = {
+            "traceId": item.trace_id,
+            "spanId": item.span_id,
+            "name": item.name,
+            "kind": 1,
+            "startTimeUnixNano": str(item.start_ns),
+            "endTimeUnixNano": str(item.end_ns or item.start_ns + item.duration_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()],
+            "status": {"code": 1} if item.status == "ok" else {"code": 2, "message": item.status},
+        }
+        if item.parent_id:
+            otlp_span["parentSpanId"] = item.parent_id
+        otlp_spans.append(otlp_span)
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{"scope": {"name": "diagho_uploader"}, "spans": otlp_spans}],
+    }]}
+
+
+def export_trace(spans, path, trace_format="chrome"):
+    """
+    Writes the spans in 'path' + '.trace.json' (Chrome) or '.otlp.json' (OTLP).
+
+    Returns:
+        str: file written
+    """
+    if trace_format == "otlp":
+        content, path = to_otlp(spans), f"{path}.otlp.json"
+    else:
+        content, path = to_chrome_trace(spans), f"{path}.trace.json"
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(content, file, default=str)
+    return path
@@ -0,0 +1,110 @@
+import hashlib
+import os
+import uuid
+
+
+class MultipartFileStream:
+    """
+    File-like 'multipart/form-data' body, streamed from disk chunk by chunk.
+
+    'requests' builds the whole multipart body in memory when 'files=' is used:
+    this object is passed as 'data=' instead, so the biofile is read only while
+    it is sent and the transfer can be aborted with a cancellation token.
+
+    Args:
+        biofile (str): path of the biofile to upload.
+        fields (dict): other form fields (e.g. {'accession': 1}).
+        file_field (str): name of the file field.
+        cancel_token (CancellationToken, optional): checked before each read.
+        compute_md5 (bool): compute the MD5 of the biofile from the chunks sent
+            (hash-while-uploading: the biofile is read only once), cf. 'md5_hexdigest'.
+    """
+
+    def __init__(self, biofile, fields=None, file_field="file", content_type="application/octet-stream", cancel_token=None, compute_md5=False):
+        self.biofile = biofile
+        self.cancel_token = cancel_token
+        self.bytes_read = 0
+        self._md5 = hashlib.md5() if compute_md5 else None
+
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+
+        filename = os.path.basename(biofile)
+        head = b""
+        for name, value in (fields or {}).items():
+            head += (
+                f"--{boundary}\r\n"
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                f"{value}\r\n"
+            ).encode("utf-8")
+        head += (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode("utf-8")
+        tail = f"\r\n--{boundary}--\r\n".encode("utf-8")
+
+        self._head = head
+        self._tail = tail
+        self._file_size = os.path.getsize(biofile)
+        self._file = open(biofile, "rb")
+        self._position = 0  # position dans le body complet (head + fichier + tail)
+
+    def __len__(self):
+        return len(self._head) + self._file_size + len(self._tail)
+
+    def read(self, size=-1):
+        """Read at most 'size' bytes of the body (the whole remaining body if size < 0)."""
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled()
+        if size is None or size < 0:
+            size = len(self) - self._position
+
+        chunks = []
+        while size > 0:
+            chunk = self._read_part(size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    def _read_part(self, size):
+        head_size = len(self._head)
+        file_end = head_size + self._file_size
+
+        # En-tête multipart
+        if self._position < head_size:
+            chunk = self._head[self._position:self._position + size]
+        # Contenu du biofile
+        elif self._position < file_end:
+            chunk = self._file.read(min(size, file_end - self._position))
+            if not chunk:
+                raise IOError(f"Biofile truncated while uploading: {self.biofile}")
+            self.bytes_read += len(chunk)
+            if self._md5 is not None:
+                self._md5.update(chunk)
+        # Fin du body
+        else:
+            offset = self._position - file_end
+            chunk = self._tail[offset:offset + size]
+        self._position += len(chunk)
+        return chunk
+
+    def md5_hexdigest(self):
+        """
+        MD5 of the biofile computed while streaming it ('compute_md5=True').
+        None if not computed or if the biofile has not been entirely sent.
+        """
+        if self._md5 is None or self.bytes_read != self._file_size:
+            return None
+        return self._md5.hexdigest()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()